@@ -0,0 +1,309 @@
+"""
+Генераторы текста ответа ИИ: шаблонный и HTTP-клиент локального сервера модели.
+"""
+from __future__ import annotations
+
+import http.client
+import json
+import queue
+import socket
+import threading
+from concurrent.futures import Future, TimeoutError
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from data.missions import get_profile
+
+
+# Значение ``fallback`` по умолчанию: каждый HTTPBackend получает свой TemplateBackend.
+_DEFAULT_FALLBACK: Any = object()
+
+
+class BackendError(RuntimeError):
+    """Сервер модели не ответил или ответил некорректно."""
+
+
+class AnswerBackend:
+    """Интерфейс генератора ответа: получает промпт и миссию, возвращает текст."""
+
+    def generate(self, prompt: str, mission: "Mission") -> str:  # noqa: F821
+        raise NotImplementedError
+
+    def stream(self, prompt: str, mission: "Mission") -> Iterator[str]:  # noqa: F821
+        """Отдаёт ответ кусками по мере генерации; по умолчанию — одним куском."""
+        yield self.generate(prompt, mission)
+
+    def close(self) -> None:
+        """Освобождает ресурсы (соединения и т. п.)."""
+
+
+class TemplateBackend(AnswerBackend):
+    """Офлайн-ответ, собранный из ``mission.response_templates``."""
+
+    def generate(self, prompt: str, mission: "Mission") -> str:  # noqa: F821
+        return self.base_response(mission)
+
+    def stream(self, prompt: str, mission: "Mission") -> Iterator[str]:  # noqa: F821
+        # Построчно: шаблон готов сразу, но экран получает его тем же путём, что и ответ модели.
+        for line in self.base_response(mission).splitlines(keepends=True):
+            yield line
+
+    @staticmethod
+    def base_response(mission: "Mission") -> str:  # noqa: F821
+        return get_profile(mission).base_response
+
+
+class HTTPBackend(AnswerBackend):
+    """Клиент сервера модели с API в стиле Ollama (``POST /api/generate``).
+
+    Держит не больше ``pool_size`` постоянных HTTP/1.1-соединений: когда все
+    заняты, следующий запрос ждёт свободное, а не открывает лишнее. Каждый
+    запрос ограничен таймаутом. Одинаковые запросы, которые уже выполняются,
+    объединяются — и в ``generate``, и в ``stream``: второй поток получает
+    ответ первого вместо нового обращения к серверу. Если сервер недоступен,
+    ответ берётся у ``fallback`` (по умолчанию — шаблонный); при
+    ``fallback=None`` выбрасывается BackendError.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        model: str = "",
+        timeout: float = 20.0,
+        pool_size: int = 4,
+        fallback: Optional[AnswerBackend] = _DEFAULT_FALLBACK,
+    ) -> None:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Некорректный адрес сервера модели: {url}")
+        self.model = model
+        self.timeout = timeout
+        self.fallback = TemplateBackend() if fallback is _DEFAULT_FALLBACK else fallback
+        self._connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path = (parts.path.rstrip("/") or "") + "/api/generate"
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=pool_size)
+        # Слот на каждое соединение — простаивающее или занятое запросом.
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._streams: Dict[Tuple[str, str], _SharedStream] = {}
+        self._inflight_lock = threading.Lock()
+
+    def generate(self, prompt: str, mission: "Mission") -> str:  # noqa: F821
+        try:
+            return self._generate_shared(prompt, mission)
+        except BackendError:
+            if self.fallback is None:
+                raise
+            return self.fallback.generate(prompt, mission)
+
+    def stream(self, prompt: str, mission: "Mission") -> Iterator[str]:  # noqa: F821
+        """Отдаёт куски построчного JSON-потока ``/api/generate``.
+
+        Поток читает фоновый поток-насос, а вызовы с тем же промптом и
+        миссией, пришедшие до конца ответа, получают те же куски. Если
+        сервер недоступен до начала ответа, ответ берётся у ``fallback``;
+        обрыв посреди потока выбрасывает BackendError.
+        """
+        shared = self._join_stream(prompt, mission)
+        try:
+            yield from shared.follow(self.timeout)
+        except BackendError:
+            if shared.opened or self.fallback is None:
+                raise
+            yield from self.fallback.stream(prompt, mission)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _generate_shared(self, prompt: str, mission: "Mission") -> str:  # noqa: F821
+        key = (mission.id, prompt)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+        if not owner:
+            try:
+                return future.result(timeout=self.timeout)
+            except TimeoutError as exc:
+                raise BackendError("Сервер модели не ответил вовремя") from exc
+
+        try:
+            text = self._request(self._build_payload(prompt, mission))
+        except BackendError as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(text)
+            return text
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _join_stream(self, prompt: str, mission: "Mission") -> "_SharedStream":  # noqa: F821
+        key = (mission.id, prompt)
+        with self._inflight_lock:
+            shared = self._streams.get(key)
+            if shared is not None:
+                return shared
+            shared = self._streams[key] = _SharedStream()
+        payload = {**self._build_payload(prompt, mission), "stream": True}
+        # Насос дочитывает ответ, даже если первый читатель бросил поток:
+        # соединение возвращается в пул, остальные читатели получают ответ целиком.
+        threading.Thread(target=self._pump_stream, args=(key, payload, shared), daemon=True).start()
+        return shared
+
+    def _pump_stream(self, key: Tuple[str, str], payload: dict, shared: "_SharedStream") -> None:
+        error: Optional[BackendError] = None
+        try:
+            self._read_stream(payload, shared)
+        except BackendError as exc:
+            error = exc
+        finally:
+            with self._inflight_lock:
+                self._streams.pop(key, None)
+            shared.finish(error)
+
+    def _read_stream(self, payload: dict, shared: "_SharedStream") -> None:
+        connection, response = self._open(payload)
+        shared.opened = True
+        finished = False
+        try:
+            while not finished:
+                line = response.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                    chunk = item.get("response", "")
+                    finished = bool(item.get("done"))
+                except (ValueError, AttributeError) as exc:
+                    raise BackendError("Некорректный поток сервера модели") from exc
+                if chunk:
+                    shared.push(chunk)
+            if finished:
+                response.read()
+        except (OSError, http.client.HTTPException) as exc:
+            finished = False
+            raise BackendError(f"Поток ответа прервался: {exc}") from exc
+        finally:
+            if finished and not response.will_close:
+                self._release(connection)
+            else:
+                self._discard(connection)
+
+    def _build_payload(self, prompt: str, mission: "Mission") -> dict:  # noqa: F821
+        return {
+            "model": self.model,
+            "system": f"Ты — помощник преподавателя. Ситуация: {mission.scenario}",
+            "prompt": prompt,
+            "stream": False,
+        }
+
+    def _request(self, payload: dict) -> str:
+        connection, response = self._open(payload)
+        try:
+            data = response.read()
+        except (OSError, http.client.HTTPException) as exc:
+            self._discard(connection)
+            raise BackendError(f"Сервер модели недоступен: {exc}") from exc
+        if response.will_close:
+            self._discard(connection)
+        else:
+            self._release(connection)
+        try:
+            return json.loads(data)["response"]
+        except (ValueError, KeyError, TypeError) as exc:
+            raise BackendError("Некорректный ответ сервера модели") from exc
+
+    def _open(self, payload: dict) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """Отправляет запрос и возвращает соединение с ответом, тело которого ещё не прочитано."""
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        for _ in range(2):
+            connection = self._acquire()
+            reused = connection.sock is not None
+            try:
+                connection.request("POST", self._path, body=body, headers=headers)
+                response = connection.getresponse()
+            except (OSError, http.client.HTTPException) as exc:
+                self._discard(connection)
+                # Повтор только для соединения из пула: сервер мог закрыть
+                # его, пока оно простаивало. Таймаут не повторяем.
+                if reused and not isinstance(exc, socket.timeout):
+                    continue
+                raise BackendError(f"Сервер модели недоступен: {exc}") from exc
+            if response.status != 200:
+                self._discard(connection)
+                raise BackendError(f"Сервер модели вернул {response.status}")
+            return connection, response
+        raise BackendError("Сервер модели недоступен")
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        """Берёт соединение из пула; если все ``pool_size`` заняты — ждёт свободное."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise BackendError("Все соединения с сервером модели заняты")
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = self._connection_class(self._host, self._port, timeout=self.timeout)
+        connection.timeout = self.timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(self.timeout)
+        return connection
+
+    def _release(self, connection: http.client.HTTPConnection) -> None:
+        self._idle.put_nowait(connection)
+        self._slots.release()
+
+    def _discard(self, connection: http.client.HTTPConnection) -> None:
+        connection.close()
+        self._slots.release()
+
+
+class _SharedStream:
+    """Куски одного потокового ответа; их читают все, кто ждёт этот ответ."""
+
+    def __init__(self) -> None:
+        self.chunks: List[str] = []
+        self.opened = False
+        self._done = False
+        self._error: Optional[BackendError] = None
+        self._changed = threading.Condition()
+
+    def push(self, chunk: str) -> None:
+        with self._changed:
+            self.chunks.append(chunk)
+            self._changed.notify_all()
+
+    def finish(self, error: Optional[BackendError] = None) -> None:
+        with self._changed:
+            self._done = True
+            self._error = error
+            self._changed.notify_all()
+
+    def follow(self, timeout: float) -> Iterator[str]:
+        """Отдаёт куски с начала ответа, дожидаясь новых не дольше ``timeout`` каждый."""
+        index = 0
+        while True:
+            with self._changed:
+                if not self._changed.wait_for(lambda: index < len(self.chunks) or self._done, timeout):
+                    raise BackendError("Сервер модели не ответил вовремя")
+                chunks = self.chunks[index:]
+                done, error = self._done, self._error
+            index += len(chunks)
+            yield from chunks
+            if done and index == len(self.chunks):
+                if error is not None:
+                    raise error
+                return
@@ -0,0 +1,68 @@
+"""
+LRU-кэш результатов оценки промптов.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from core.cache_stats import CacheStats
+
+if TYPE_CHECKING:
+    from ai.engine import EvaluationResult
+
+CacheKey = Tuple[str, str, int]
+
+
+class EvaluationCache:
+    """Хранит последние результаты оценки и вытесняет самые старые.
+
+    Ключ — нормализованный текст промпта, id миссии и версия правил.
+    Ответ ИИ при промахе генерируется генератором случайных чисел с зерном
+    из ключа (``seed_for``), поэтому одинаковый промпт всегда получает один
+    и тот же текст ответа — и из кэша, и после вытеснения.
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        if maxsize <= 0:
+            raise ValueError("Размер кэша должен быть положительным")
+        self.maxsize = maxsize
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[CacheKey, EvaluationResult]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(normalized: str, mission_id: str, ruleset_version: int) -> CacheKey:
+        return (normalized, mission_id, ruleset_version)
+
+    @staticmethod
+    def seed_for(key: CacheKey) -> int:
+        digest = hashlib.blake2b(repr(key).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big")
+
+    def get(self, key: CacheKey) -> Optional["EvaluationResult"]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def put(self, key: CacheKey, value: "EvaluationResult") -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,230 @@
+"""
+Поиск почти одинаковых промптов (MinHash + LSH) для пакетной оценки.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+import zlib
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_NON_WORD = re.compile(r"[\W_]+")
+_EMPTY = 0xFFFFFFFF
+
+
+def normalize(text: str) -> str:
+    """Нижний регистр, без знаков препинания и лишних пробелов."""
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+class MinHasher:
+    """MinHash-подпись по символьным n-граммам нормализованного текста.
+
+    Используется схема с одной хэш-функцией: хэш n-граммы выбирает ячейку
+    подписи, а ячейка хранит минимальный хэш. Пустые ячейки заполняются
+    из соседних («уплотнение»), поэтому доля совпавших ячеек двух подписей
+    оценивает коэффициент Жаккара, а на каждую n-грамму уходит один хэш,
+    а не ``num_perm``.
+    """
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5) -> None:
+        if num_perm <= 0 or num_perm & (num_perm - 1):
+            raise ValueError("num_perm должен быть степенью двойки")
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._shift = num_perm.bit_length() - 1
+
+    def signature(self, text: str) -> array:
+        normalized = normalize(text)
+        size = self.shingle_size
+        bins = array("I", [_EMPTY]) * self.num_perm
+        mask = self.num_perm - 1
+        shift = self._shift
+        count = max(1, len(normalized) - size + 1)
+        encoded = [normalized[i:i + size].encode("utf-8") for i in range(count)] if normalized else []
+        for shingle in encoded:
+            value = zlib.crc32(shingle)
+            slot = value & mask
+            value >>= shift
+            if value < bins[slot]:
+                bins[slot] = value
+        return self._densify(bins) if encoded else bins
+
+    def _densify(self, bins: array) -> array:
+        if _EMPTY not in bins:
+            return bins
+        total = len(bins)
+        result = array("I", bins)
+        for slot in range(total):
+            if bins[slot] != _EMPTY:
+                continue
+            # Ближайшая заполненная ячейка справа (по кругу) и расстояние до неё.
+            offset = 1
+            while bins[(slot + offset) % total] == _EMPTY:
+                offset += 1
+            result[slot] = (bins[(slot + offset) % total] + offset * 0x9E3779B1) & 0xFFFFFFFF
+        return result
+
+
+def estimate_similarity(first: array, second: array) -> float:
+    same = sum(1 for a, b in zip(first, second) if a == b)
+    return same / len(first)
+
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Число полос и строк в полосе, при которых порог LSH ближе всего к ``threshold``."""
+    best = (1, num_perm)
+    best_error = float("inf")
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+@dataclass
+class ClusterMatch:
+    """Куда попал промпт: в новый кластер (он сам — представитель) или в существующий."""
+
+    cluster: int
+    representative: bool
+    representative_label: str
+    similarity: float = 1.0
+
+
+class LSHIndex:
+    """Корзины LSH в памяти. Хранит только представителей кластеров."""
+
+    def __init__(self) -> None:
+        self._buckets: Dict[Tuple[int, int], List[int]] = {}
+        self._signatures: List[array] = []
+        self._labels: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def candidates(self, band_keys: List[int]) -> Iterator[Tuple[int, array, str]]:
+        seen = set()
+        for band, key in enumerate(band_keys):
+            for cluster in self._buckets.get((band, key), ()):
+                if cluster not in seen:
+                    seen.add(cluster)
+                    yield cluster, self._signatures[cluster], self._labels[cluster]
+
+    def add(self, band_keys: List[int], signature: array, label: str) -> int:
+        cluster = len(self._signatures)
+        self._signatures.append(signature)
+        self._labels.append(label)
+        for band, key in enumerate(band_keys):
+            self._buckets.setdefault((band, key), []).append(cluster)
+        return cluster
+
+    def close(self) -> None:
+        """Индексу в памяти закрывать нечего."""
+
+
+class SqliteLSHIndex(LSHIndex):
+    """Корзины LSH в файле SQLite — для корпусов, которые не помещаются в память.
+
+    Файл — рабочее хранилище одного прогона: при открытии он очищается,
+    иначе новые промпты присоединялись бы к представителям прошлого прогона,
+    оценок которых в этом выводе нет.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._db = sqlite3.connect(path)
+        self._db.executescript(
+            """
+            DROP TABLE IF EXISTS clusters;
+            DROP TABLE IF EXISTS buckets;
+            CREATE TABLE clusters (id INTEGER PRIMARY KEY, label TEXT, signature BLOB);
+            CREATE TABLE buckets (band INTEGER, key INTEGER, cluster INTEGER);
+            CREATE INDEX buckets_lookup ON buckets (band, key);
+            """
+        )
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def candidates(self, band_keys: List[int]) -> Iterator[Tuple[int, array, str]]:
+        seen = set()
+        for band, key in enumerate(band_keys):
+            rows = self._db.execute(
+                "SELECT c.id, c.signature, c.label FROM buckets b JOIN clusters c ON c.id = b.cluster "
+                "WHERE b.band = ? AND b.key = ?",
+                (band, key),
+            )
+            for cluster, blob, label in rows:
+                if cluster not in seen:
+                    seen.add(cluster)
+                    signature = array("I")
+                    signature.frombytes(blob)
+                    yield cluster, signature, label
+
+    def add(self, band_keys: List[int], signature: array, label: str) -> int:
+        cluster = self._count
+        self._db.execute(
+            "INSERT INTO clusters (id, label, signature) VALUES (?, ?, ?)", (cluster, label, signature.tobytes())
+        )
+        self._db.executemany(
+            "INSERT INTO buckets (band, key, cluster) VALUES (?, ?, ?)",
+            [(band, key, cluster) for band, key in enumerate(band_keys)],
+        )
+        self._count += 1
+        return cluster
+
+    def close(self) -> None:
+        self._db.commit()
+        self._db.close()
+
+
+class NearDuplicateClusterer:
+    """Потоковая кластеризация: промпт присоединяется к самому похожему представителю.
+
+    Промпты разных миссий не смешиваются: имя миссии входит в ключ корзины.
+    В индексе лежат только представители, поэтому его размер растёт с числом
+    кластеров, а не записей.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        *,
+        hasher: Optional[MinHasher] = None,
+        index: Optional[LSHIndex] = None,
+    ) -> None:
+        self.threshold = threshold
+        self.hasher = hasher or MinHasher()
+        self.index = index if index is not None else LSHIndex()
+        self.bands, self.rows = lsh_params(threshold, self.hasher.num_perm)
+
+    def assign(self, namespace: str, text: str, label: str) -> ClusterMatch:
+        signature = self.hasher.signature(text)
+        band_keys = self._band_keys(namespace, signature)
+        best: Optional[ClusterMatch] = None
+        for cluster, candidate, candidate_label in self.index.candidates(band_keys):
+            similarity = estimate_similarity(signature, candidate)
+            if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                best = ClusterMatch(cluster, False, candidate_label, similarity)
+        if best is not None:
+            return best
+        return ClusterMatch(self.index.add(band_keys, signature, label), True, label)
+
+    def _band_keys(self, namespace: str, signature: array) -> List[int]:
+        prefix = namespace.encode("utf-8") + b"\0"
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            digest = hashlib.blake2b(prefix + chunk, digest_size=8).digest()
+            keys.append(int.from_bytes(digest, "big", signed=True))
+        return keys
+
+    def close(self) -> None:
+        self.index.close()
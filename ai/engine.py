@@ -4,49 +4,35 @@
 from __future__ import annotations
 
 import random
-import textwrap
-from dataclasses import dataclass
-from typing import Dict, List
-
+from array import array
+from dataclasses import dataclass, field, replace
+from functools import partial
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from ai.backends import AnswerBackend, TemplateBackend
+from ai.cache import CacheKey, EvaluationCache
+from ai.matcher import IncrementalScan, Span, fold_case
+from ai.rules import CRITERION_GROUPS, RULESET_VERSION
 from core.settings import CRITERIA_META, MAX_PROMPT_LENGTH
-
-ACTION_KEYWORDS = [
-    "объясни",
-    "расскажи",
-    "составь",
-    "создай",
-    "подготовь",
-    "переведи",
-    "проанализируй",
-]
-
-CONSTRAINT_KEYWORDS = [
-    "в формате",
-    "в виде",
-    "не более",
-    "пункта",
-    "пунктов",
-    "шагов",
-    "примеров",
-]
-
-ETHICS_KEYWORDS = [
-    "честност",
-    "без плагиата",
-    "не списывая",
-    "самостоятельно",
-    "не выдавай ответов",
+from data.missions import MissionProfile, get_profile
+
+ISSUE_TEXTS = (
+    "Ответ ИИ может содержать неточности — перепроверьте факты.",
+    "Промпт слишком короткий, добавьте деталей.",
+    "Промпт близок к лимиту, подумайте о сокращении.",
+)
+
+# Битовые флаги замечаний, индексы совпадают с ISSUE_TEXTS.
+ISSUE_LOW_QUALITY = 1 << 0
+ISSUE_TOO_SHORT = 1 << 1
+ISSUE_NEAR_LIMIT = 1 << 2
+
+HALLUCINATION_WARNINGS = [
+    "⚠ Возможна неточность: в ответе встречается лишний термин, перепроверьте его.",
+    "⚠ Ответ получился общим — попробуйте задать формат.",
 ]
 
-AUDIENCE_KEYWORDS = [
-    "класс",
-    "курс",
-    "студент",
-    "ученик",
-    "нович",
-    "начинающ",
-    "продвинут",
-]
+CriteriaStars = Tuple[int, int, int, int]
 
 
 @dataclass
@@ -54,6 +40,8 @@ class CriterionScore:
     criterion_id: str
     stars: int
     feedback: str
+    # Позиции ключевых слов в промпте, которые принесли баллы по критерию.
+    spans: List[Span] = field(default_factory=list)
 
 
 @dataclass
@@ -65,44 +53,283 @@ class EvaluationResult:
     ai_answer: str
     issues: List[str]
 
+    def copy(self, **changes) -> "EvaluationResult":
+        """Копия, у которой нет общих с оригиналом списков и оценок критериев."""
+        scores = {cid: replace(score, spans=list(score.spans)) for cid, score in self.scores.items()}
+        return replace(self, scores=scores, issues=list(self.issues), **changes)
 
-class AIEngine:
-    """Правила анализа промптов и генерации ответов."""
-
-    def __init__(self) -> None:
-        self.random = random.Random()
-
-    def evaluate_prompt(self, prompt: str, mission: "Mission") -> EvaluationResult:  # noqa: F821
-        text = prompt.strip()
-        normalized = text.lower()
-
-        scores: Dict[str, CriterionScore] = {}
-        issues: List[str] = []
 
-        clarity = self._score_clarity(normalized)
-        scores["clarity"] = CriterionScore("clarity", clarity, self._clarity_feedback(clarity))
+@dataclass
+class BatchEvaluation:
+    """Результаты пакетной оценки в колоночном виде.
+
+    Звёзды, итоги и замечания хранятся в компактных массивах, а полный
+    EvaluationResult собирается только по запросу через ``result``.
+    """
+
+    engine: "AIEngine" = field(repr=False)
+    mission: "Mission"  # noqa: F821
+    prompts: List[str] = field(default_factory=list)
+    stars: Dict[str, array] = field(default_factory=lambda: {cid: array("b") for cid in CRITERIA_META})
+    total_score: array = field(default_factory=lambda: array("b"))
+    total_stars: array = field(default_factory=lambda: array("b"))
+    issue_flags: array = field(default_factory=lambda: array("B"))
+    # Индекс предупреждения из HALLUCINATION_WARNINGS или -1, если его нет.
+    warnings: array = field(default_factory=lambda: array("b"))
+
+    def __len__(self) -> int:
+        return len(self.prompts)
+
+    def append(
+        self, prompt: str, stars: CriteriaStars, total_score: int, total_stars: int, issue_flags: int, warning: int
+    ) -> None:
+        self.prompts.append(prompt)
+        for cid, value in zip(CRITERIA_META, stars):
+            self.stars[cid].append(value)
+        self.total_score.append(total_score)
+        self.total_stars.append(total_stars)
+        self.issue_flags.append(issue_flags)
+        self.warnings.append(warning)
+
+    def result(self, index: int) -> EvaluationResult:
+        prompt = self.prompts[index]
+        stars = tuple(self.stars[cid][index] for cid in CRITERIA_META)
+        # Позиции совпадений пакет не хранит: они нужны только полному результату.
+        profile = get_profile(self.mission)
+        spans = self.engine._criterion_spans(profile.matcher.find(prompt.lower()), profile)
+        return self.engine._build_result(
+            prompt,
+            stars,
+            self.total_score[index],
+            self.total_stars[index],
+            self.issue_flags[index],
+            self.engine._compose_answer(self.mission, self.warnings[index]),
+            spans,
+        )
 
-        context = self._score_context(normalized, mission)
-        scores["context"] = CriterionScore("context", context, self._context_feedback(context))
+    def results(self) -> Iterator[EvaluationResult]:
+        for index in range(len(self)):
+            yield self.result(index)
+
+
+class AnswerStream:
+    """Результат оценки, ответ ИИ к которому приходит кусками.
+
+    Звёзды и замечания в ``result`` готовы сразу, а ``result.ai_answer``
+    заполняется, когда поток дочитан до конца.
+    """
+
+    def __init__(
+        self,
+        result: EvaluationResult,
+        chunks: Iterable[str],
+        on_complete: Optional[Callable[[EvaluationResult], None]] = None,
+    ) -> None:
+        self.result = result
+        self._chunks = chunks
+        self._on_complete = on_complete
+
+    def __iter__(self) -> Iterator[str]:
+        parts: List[str] = []
+        chunks = iter(self._chunks)
+        try:
+            for chunk in chunks:
+                parts.append(chunk)
+                yield chunk
+        finally:
+            # Прерванный поток закрывает генератор бэкенда (и его соединение).
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
+        self.result.ai_answer = "".join(parts)
+        if self._on_complete:
+            self._on_complete(self.result)
+
+
+class LiveScorer:
+    """Оценка критериев «на лету», пока преподаватель набирает промпт.
+
+    Хранит состояние автомата по позициям текста, поэтому правка
+    (``replace``) пересканирует только изменённое окно, а в нижний регистр
+    переводится только вставленный кусок. Позиции критерия собираются
+    заново (слиянием уже отсортированных списков групп), только если
+    изменились позиции одной из его групп. Позиции в
+    ``CriterionScore.spans`` отсчитываются от начала текста.
+    """
+
+    def __init__(self, engine: "AIEngine", mission: "Mission") -> None:  # noqa: F821
+        self.engine = engine
+        self.mission = mission
+        self.profile = get_profile(mission)
+        self._scan: IncrementalScan = self.profile.matcher.incremental()
+        self._groups = {cid: engine._criterion_groups(cid, self.profile) for cid in CRITERION_GROUPS}
+        self._stars: Optional[CriteriaStars] = None
+        self._spans: Dict[str, List[Span]] = {}
+        # Версии групп сканера, из которых собраны позиции критерия.
+        self._versions: Dict[str, Tuple[int, ...]] = {}
+        self._scores: Dict[str, CriterionScore] = {}
+
+    @property
+    def length(self) -> int:
+        """Длина текста без пробелов по краям, как ``len(text.strip())``."""
+        chars = self._scan.chars
+        start, end = 0, len(chars)
+        while start < end and chars[start].isspace():
+            start += 1
+        while end > start and chars[end - 1].isspace():
+            end -= 1
+        return end - start
+
+    def replace(self, start: int, end: int, inserted: str) -> None:
+        """Учитывает правку: ``text[start:end]`` заменён на ``inserted``."""
+        self._scan.replace(start, end, fold_case(inserted))
+
+    def update(self, text: str) -> Dict[str, CriterionScore]:
+        """Сверяет состояние с текстом целиком и возвращает оценки."""
+        self._scan.update(fold_case(text))
+        return self.scores()
+
+    def scores(self) -> Dict[str, CriterionScore]:
+        """Оценки текущего текста; пока они не меняются, возвращается тот же словарь."""
+        scan = self._scan
+        stars = self.engine._criterion_stars(scan.hits, self.length, self.profile)
+        changed = stars != self._stars
+        found = None
+        for cid, groups in self._groups.items():
+            versions = tuple(scan.versions.get(group, 0) for group in groups)
+            if versions == self._versions.get(cid):
+                continue
+            if found is None:
+                found = scan.spans()
+            self._versions[cid] = versions
+            # Списки групп уже отсортированы: sorted сливает готовые отрезки за линейное время.
+            spans = sorted(span for group in groups for span in found.get(group, ()))
+            if spans != self._spans.get(cid, []):
+                changed = True
+                if spans:
+                    self._spans[cid] = spans
+                else:
+                    self._spans.pop(cid, None)
+        if changed:
+            self._stars = stars
+            self._scores = self.engine._build_scores(stars, self._spans)
+        return self._scores
 
-        constraints = self._score_constraints(normalized)
-        scores["constraints"] = CriterionScore("constraints", constraints, self._constraint_feedback(constraints))
 
-        ethics = self._score_ethics(normalized, mission)
-        scores["ethics"] = CriterionScore("ethics", ethics, self._ethic_feedback(ethics))
+class AIEngine:
+    """Правила анализа промптов и генерации ответов."""
 
-        total_score = sum(score.stars for score in scores.values())
-        total_stars = min(3, round(total_score / len(scores)))
+    def __init__(self, cache: Optional[EvaluationCache] = None, backend: Optional[AnswerBackend] = None) -> None:
+        self.random = random.Random()
+        self.cache = cache
+        self.backend = backend or TemplateBackend()
 
-        if total_stars < 2:
-            issues.append("Ответ ИИ может содержать неточности — перепроверьте факты.")
-        if len(text) < 40:
-            issues.append("Промпт слишком короткий, добавьте деталей.")
-        if len(text) > MAX_PROMPT_LENGTH * 0.9:
-            issues.append("Промпт близок к лимиту, подумайте о сокращении.")
+    def evaluate_prompt(self, prompt: str, mission: "Mission") -> EvaluationResult:  # noqa: F821
+        if self.cache is None:
+            return self._evaluate(prompt, mission, self.random)
 
-        ai_answer = self._generate_answer(text, mission, total_stars)
+        text = prompt.strip()
+        key = self.cache.make_key(text.lower(), mission.id, RULESET_VERSION)
+        cached = self.cache.get(key)
+        if cached is not None:
+            # Каждый вызов получает свою копию: правка результата не попадёт в кэш.
+            return cached.copy(prompt=text)
+        result = self._evaluate(prompt, mission, random.Random(self.cache.seed_for(key)))
+        self._remember(key, result)
+        return result
+
+    def evaluate_stream(self, prompt: str, mission: "Mission") -> AnswerStream:  # noqa: F821
+        """Оценивает промпт сразу, а ответ ИИ отдаёт кусками по мере генерации."""
+        text = prompt.strip()
+        rng = self.random
+        on_complete: Optional[Callable[[EvaluationResult], None]] = None
+        if self.cache is not None:
+            key = self.cache.make_key(text.lower(), mission.id, RULESET_VERSION)
+            cached = self.cache.get(key)
+            if cached is not None:
+                result = cached.copy(prompt=text)
+                return AnswerStream(result, [result.ai_answer])
+            rng = random.Random(self.cache.seed_for(key))
+            # Дочитанный до конца ответ попадает в кэш.
+            on_complete = partial(self._remember, key)
+
+        result = self._score_prompt(text, mission)
+        warning = self._pick_warning(result.total_stars, rng)
+        return AnswerStream(result, self._answer_chunks(text, mission, warning), on_complete)
+
+    def _remember(self, key: CacheKey, result: EvaluationResult) -> None:
+        self.cache.put(key, result.copy())
+
+    def _evaluate(self, prompt: str, mission: "Mission", rng: random.Random) -> EvaluationResult:  # noqa: F821
+        text = prompt.strip()
+        result = self._score_prompt(text, mission)
+        result.ai_answer = self._generate_answer(text, mission, result.total_stars, rng)
+        return result
 
+    def _score_prompt(self, text: str, mission: "Mission") -> EvaluationResult:  # noqa: F821
+        """Оценка без ответа ИИ: ``ai_answer`` остаётся пустым."""
+        normalized = text.lower()
+        profile = get_profile(mission)
+        # Один проход даёт и найденные группы, и позиции для подсветки.
+        found = profile.matcher.find(normalized)
+        stars = self._criterion_stars(frozenset(found), len(normalized), profile)
+        total_score = sum(stars)
+        total_stars = min(3, round(total_score / len(stars)))
+        issue_flags = self._issue_flags(total_stars, len(text))
+        spans = self._criterion_spans(found, profile)
+        return self._build_result(text, stars, total_score, total_stars, issue_flags, "", spans)
+
+    def live_scorer(self, mission: "Mission") -> LiveScorer:  # noqa: F821
+        return LiveScorer(self, mission)
+
+    def evaluate_many(self, prompts: Iterable[str], mission: "Mission") -> BatchEvaluation:  # noqa: F821
+        """Оценивает пакет промптов одной миссии за один вызов.
+
+        Автомат миссии выбирается один раз, а итоговые звёзды запоминаются
+        по набору найденных групп, поэтому повторяющиеся сочетания ключевых
+        слов не пересчитываются. Ответы ИИ в пакете не собираются — только
+        индекс предупреждения, который ``BatchEvaluation.result`` превращает
+        в полный текст.
+        """
+        profile = get_profile(mission)
+        scan = profile.matcher.scan
+        table: Dict[Tuple[FrozenSet[str], bool], Tuple[CriteriaStars, int, int]] = {}
+        batch = BatchEvaluation(self, mission)
+
+        for prompt in prompts:
+            text = prompt.strip()
+            normalized = text.lower()
+            hits = scan(normalized)
+            key = (hits, len(normalized) > 40)
+            row = table.get(key)
+            if row is None:
+                stars = self._criterion_stars(hits, len(normalized), profile)
+                total_score = sum(stars)
+                row = (stars, total_score, min(3, round(total_score / len(stars))))
+                table[key] = row
+            stars, total_score, total_stars = row
+            batch.append(
+                text,
+                stars,
+                total_score,
+                total_stars,
+                self._issue_flags(total_stars, len(text)),
+                self._pick_warning(total_stars, self.random),
+            )
+        return batch
+
+    def _build_result(
+        self,
+        text: str,
+        stars: CriteriaStars,
+        total_score: int,
+        total_stars: int,
+        issue_flags: int,
+        ai_answer: str,
+        spans: Optional[Dict[str, List[Span]]] = None,
+    ) -> EvaluationResult:
+        scores = self._build_scores(stars, spans or {})
+        issues = [issue for bit, issue in enumerate(ISSUE_TEXTS) if issue_flags & (1 << bit)]
         return EvaluationResult(
             prompt=text,
             total_score=total_score,
@@ -112,37 +339,86 @@ class AIEngine:
             issues=issues,
         )
 
-    def _score_clarity(self, normalized: str) -> int:
-        has_action = any(keyword in normalized for keyword in ACTION_KEYWORDS)
-        return 3 if has_action and len(normalized) > 40 else (2 if has_action else 1)
+    def _build_scores(self, stars: CriteriaStars, spans: Dict[str, List[Span]]) -> Dict[str, CriterionScore]:
+        return {
+            cid: CriterionScore(cid, value, self._feedback(cid, value), spans.get(cid, []))
+            for cid, value in zip(CRITERIA_META, stars)
+        }
 
-    def _score_context(self, normalized: str, mission: "Mission") -> int:  # noqa: F821
-        has_context = any(keyword in normalized for keyword in AUDIENCE_KEYWORDS)
-        mission_hint = any(token in normalized for token in mission.context_keywords)
+    @staticmethod
+    def _criterion_spans(found: Dict[str, List[Span]], profile: MissionProfile) -> Dict[str, List[Span]]:
+        """Раскладывает совпадения групп по критериям, отсортированными по позиции."""
+        spans: Dict[str, List[Span]] = {}
+        for cid in CRITERION_GROUPS:
+            matched = [span for group in AIEngine._criterion_groups(cid, profile) for span in found.get(group, ())]
+            if matched:
+                spans[cid] = sorted(matched)
+        return spans
+
+    @staticmethod
+    def _criterion_groups(cid: str, profile: MissionProfile) -> Tuple[str, ...]:
+        """Группы ключевых слов, совпадения которых засчитываются критерию."""
+        return tuple(group for group in CRITERION_GROUPS[cid] if group != "honesty" or profile.requires_ethics)
+
+    def _criterion_stars(self, hits: FrozenSet[str], length: int, profile: MissionProfile) -> CriteriaStars:
+        return (
+            self._score_clarity(hits, length),
+            self._score_context(hits),
+            self._score_constraints(hits),
+            self._score_ethics(hits, profile),
+        )
+
+    @staticmethod
+    def _issue_flags(total_stars: int, length: int) -> int:
+        flags = 0
+        if total_stars < 2:
+            flags |= ISSUE_LOW_QUALITY
+        if length < 40:
+            flags |= ISSUE_TOO_SHORT
+        if length > MAX_PROMPT_LENGTH * 0.9:
+            flags |= ISSUE_NEAR_LIMIT
+        return flags
+
+    def _score_clarity(self, hits: FrozenSet[str], length: int) -> int:
+        has_action = "action" in hits
+        return 3 if has_action and length > 40 else (2 if has_action else 1)
+
+    def _score_context(self, hits: FrozenSet[str]) -> int:
+        has_context = "audience" in hits
+        mission_hint = "mission" in hits
         if has_context and mission_hint:
             return 3
         if has_context or mission_hint:
             return 2
         return 1
 
-    def _score_constraints(self, normalized: str) -> int:
-        has_constraints = any(keyword in normalized for keyword in CONSTRAINT_KEYWORDS)
-        has_numbers = any(char.isdigit() for char in normalized)
+    def _score_constraints(self, hits: FrozenSet[str]) -> int:
+        has_constraints = "constraints" in hits
+        has_numbers = "digits" in hits
         if has_constraints and has_numbers:
             return 3
         if has_constraints or has_numbers:
             return 2
         return 1
 
-    def _score_ethics(self, normalized: str, mission: "Mission") -> int:  # noqa: F821
-        mentions_ethics = any(keyword in normalized for keyword in ETHICS_KEYWORDS)
-        mentions_honesty = "честн" in normalized or "этич" in normalized
-        if mission.requires_ethics and (mentions_ethics or mentions_honesty):
+    def _score_ethics(self, hits: FrozenSet[str], profile: MissionProfile) -> int:
+        mentions_ethics = "ethics" in hits
+        mentions_honesty = "honesty" in hits
+        if profile.requires_ethics and (mentions_ethics or mentions_honesty):
             return 3
-        if mission.requires_ethics:
+        if profile.requires_ethics:
             return 1
         return 2 if mentions_ethics else 1
 
+    def _feedback(self, criterion_id: str, stars: int) -> str:
+        if criterion_id == "clarity":
+            return self._clarity_feedback(stars)
+        if criterion_id == "context":
+            return self._context_feedback(stars)
+        if criterion_id == "constraints":
+            return self._constraint_feedback(stars)
+        return self._ethic_feedback(stars)
+
     @staticmethod
     def _clarity_feedback(stars: int) -> str:
         if stars == 3:
@@ -175,25 +451,30 @@ class AIEngine:
             return "Подумайте о рисках и этичных ограничениях."
         return "Добавьте упоминание академической честности."
 
-    def _generate_answer(self, prompt: str, mission: "Mission", stars: int) -> str:  # noqa: F821
-        base_response = textwrap.dedent(
-            f"""
-            Принято! Вот предложение для ситуации «{mission.title}»:
+    def _generate_answer(
+        self, prompt: str, mission: "Mission", stars: int, rng: random.Random  # noqa: F821
+    ) -> str:
+        answer = self.backend.generate(prompt, mission)
+        return self._append_warning(answer, self._pick_warning(stars, rng))
 
-            1. {mission.response_templates[0]}
-            2. {mission.response_templates[1]}
-            3. {mission.response_templates[2]}
-            """
-        ).strip()
+    def _answer_chunks(self, prompt: str, mission: "Mission", warning: int) -> Iterator[str]:  # noqa: F821
+        yield from self.backend.stream(prompt, mission)
+        if warning >= 0:
+            yield f"\n\n{HALLUCINATION_WARNINGS[warning]}"
 
+    @staticmethod
+    def _pick_warning(stars: int, rng: random.Random) -> int:
         if stars >= 2:
-            return base_response
-
-        hallucination = self.random.choice(
-            [
-                "⚠ Возможна неточность: в ответе встречается лишний термин, перепроверьте его.",
-                "⚠ Ответ получился общим — попробуйте задать формат.",
-            ]
-        )
-        return f"{base_response}\n\n{hallucination}"
+            return -1
+        return rng.randrange(len(HALLUCINATION_WARNINGS))
 
+    @staticmethod
+    def _append_warning(answer: str, warning: int) -> str:
+        if warning < 0:
+            return answer
+        return f"{answer}\n\n{HALLUCINATION_WARNINGS[warning]}"
+
+    @classmethod
+    def _compose_answer(cls, mission: "Mission", warning: int) -> str:  # noqa: F821
+        """Шаблонный ответ для пакетных результатов — без обращения к серверу модели."""
+        return cls._append_warning(TemplateBackend.base_response(mission), warning)
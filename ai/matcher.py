@@ -0,0 +1,256 @@
+"""
+Поиск ключевых слов промпта за один проход (автомат Ахо — Корасик).
+"""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, FrozenSet, Iterable, List, Mapping, Tuple
+
+# Совпадение в тексте: [start, end) в символах.
+Span = Tuple[int, int]
+
+
+class KeywordMatcher:
+    """Компилирует группы ключевых слов в один автомат и ищет их все сразу."""
+
+    def __init__(self, groups: Mapping[str, Iterable[str]]) -> None:
+        self.groups: Tuple[str, ...] = tuple(groups)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[FrozenSet[str]] = [frozenset()]
+        # Пары (группа, длина ключевого слова), которые заканчиваются в состоянии.
+        self._matches: List[Tuple[Tuple[str, int], ...]] = [()]
+
+        for group, keywords in groups.items():
+            for keyword in keywords:
+                self._add(keyword.lower(), group)
+        self._build_failure_links()
+        self._group_count = len(frozenset().union(*self._outputs))
+        self.max_length = max((length for found in self._matches for _, length in found), default=0)
+
+    def _add(self, keyword: str, group: str) -> None:
+        if not keyword:
+            return
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append(frozenset())
+                self._matches.append(())
+            state = next_state
+        self._outputs[state] = self._outputs[state] | {group}
+        if (group, len(keyword)) not in self._matches[state]:
+            self._matches[state] = self._matches[state] + ((group, len(keyword)),)
+
+    def _build_failure_links(self) -> None:
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                link = self._goto[fallback].get(char, 0)
+                self._fail[child] = link if link != child else 0
+                self._outputs[child] = self._outputs[child] | self._outputs[self._fail[child]]
+                self._matches[child] = self._matches[child] + self._matches[self._fail[child]]
+
+    def scan(self, text: str) -> FrozenSet[str]:
+        """Возвращает группы, ключевые слова которых встречаются в тексте."""
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        total = self._group_count
+        found: set[str] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+                if len(found) == total:
+                    break
+        return frozenset(found)
+
+    def find(self, text: str) -> Dict[str, List[Span]]:
+        """Как ``scan``, но проходит текст целиком и возвращает позиции совпадений по группам."""
+        goto = self._goto
+        fail = self._fail
+        matches = self._matches
+        found: Dict[str, List[Span]] = {}
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for group, length in matches[state]:
+                found.setdefault(group, []).append((end - length, end))
+        return found
+
+    def incremental(self) -> "IncrementalScan":
+        return IncrementalScan(self)
+
+
+def fold_case(text: str) -> str:
+    """``text.lower()``, сохраняющий длину: позиции в результате совпадают с позициями в ``text``.
+
+    Символы, которые в нижнем регистре становятся длиннее (``İ``), остаются как есть.
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(lower if len(lower) == 1 else char for char, lower in ((char, char.lower()) for char in text))
+
+
+def _common_length(matches: Callable[[int], bool], limit: int) -> int:
+    """Наибольшее ``size <= limit``, при котором ``matches(size)`` ещё верно.
+
+    Двоичный поиск по сравнениям срезов: символы сравниваются в C, а не
+    в цикле Python по каждому символу.
+    """
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if matches(middle):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+class IncrementalScan:
+    """Состояние автомата после каждого символа текста.
+
+    При правке состояния до места правки остаются верными, поэтому
+    пересканируется только изменённое окно — до тех пор, пока состояние
+    автомата не совпадёт с прежним на той же позиции хвоста.
+
+    Позиции совпадений хранятся по группам, отсортированными по (начало,
+    конец), и правятся так же, как счётчики: убираются совпадения,
+    кончавшиеся в окне, добавляются новые, а совпадения после окна
+    сдвигаются на разницу длин. ``versions[group]`` растёт при каждом
+    изменении позиций группы.
+
+    Текст хранится списком символов: правка сдвигает его так же, как
+    список состояний, и строка целиком не собирается.
+    """
+
+    def __init__(self, matcher: KeywordMatcher) -> None:
+        self.matcher = matcher
+        self.chars: List[str] = []
+        self.counts: Dict[str, int] = {group: 0 for group in matcher.groups}
+        self.versions: Dict[str, int] = {group: 0 for group in matcher.groups}
+        # _states[i] — состояние автомата после первых i символов.
+        self._states: List[int] = [0]
+        self._spans: Dict[str, List[Span]] = {group: [] for group in matcher.groups}
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chars)
+
+    @property
+    def hits(self) -> FrozenSet[str]:
+        return frozenset(group for group, count in self.counts.items() if count)
+
+    def spans(self) -> Dict[str, List[Span]]:
+        """Позиции совпадений по группам (только найденные группы), по возрастанию.
+
+        Списки общие со сканером и меняются при следующей правке.
+        """
+        return {group: spans for group, spans in self._spans.items() if spans}
+
+    def update(self, text: str) -> None:
+        """Синхронизирует состояние с новой версией текста.
+
+        Сравнивает её с прежней целиком; если место правки известно,
+        дешевле вызвать ``replace``.
+        """
+        old = self.text
+        if text == old:
+            return
+        if text.startswith(old):
+            self.replace(len(old), len(old), text[len(old):])
+            return
+        if old.startswith(text):
+            self.replace(len(text), len(old), "")
+            return
+
+        limit = min(len(old), len(text))
+        prefix = _common_length(lambda size: old[:size] == text[:size], limit)
+        suffix = _common_length(lambda size: old[len(old) - size:] == text[len(text) - size:], limit - prefix)
+        self.replace(prefix, len(old) - suffix, text[prefix:len(text) - suffix])
+
+    def replace(self, start: int, end: int, inserted: str) -> None:
+        """Заменяет ``text[start:end]`` на ``inserted`` и пересчитывает совпадения."""
+        goto = self.matcher._goto
+        fail = self.matcher._fail
+        outputs = self.matcher._outputs
+        chars = self.chars
+        old_states = self._states
+
+        new_states: List[int] = []
+        state = old_states[start]
+        for char in inserted:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            new_states.append(state)
+
+        position = end
+        length = len(chars)
+        while position < length and state != old_states[position]:
+            char = chars[position]
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            new_states.append(state)
+            position += 1
+
+        counts = self.counts
+        for old_state in old_states[start + 1:position + 1]:
+            for group in outputs[old_state]:
+                counts[group] -= 1
+        for new_state in new_states:
+            for group in outputs[new_state]:
+                counts[group] += 1
+
+        self._update_spans(start, position, len(inserted) - (end - start), new_states)
+        old_states[start + 1:position + 1] = new_states
+        chars[start:end] = inserted
+
+    def _update_spans(self, start: int, position: int, delta: int, new_states: List[int]) -> None:
+        """Правит позиции: совпадения с концом в ``(start, position]`` заменяются найденными в окне."""
+        matches = self.matcher._matches
+        added: Dict[str, List[Span]] = {}
+        for end, state in enumerate(new_states, start + 1):
+            for group, length in matches[state]:
+                added.setdefault(group, []).append((end - length, end))
+
+        # Совпадение, начавшееся раньше first, кончилось не позже start и правку не задевает.
+        first = start - self.matcher.max_length + 1
+        for group, spans in self._spans.items():
+            low = bisect_left(spans, (first, first))
+            # Дальше начала после конца окна: эти совпадения только сдвигаются.
+            high = bisect_right(spans, (position, len(self.chars) + 1), low)
+            window = added.get(group, [])
+            if low == high and not window and (not delta or high == len(spans)):
+                continue
+            for span in spans[low:high]:
+                if span[1] <= start:
+                    window.append(span)
+                elif span[1] > position:
+                    window.append((span[0] + delta, span[1] + delta))
+            window.sort()
+            tail = spans[high:]
+            if delta:
+                tail = [(span_start + delta, span_end + delta) for span_start, span_end in tail]
+            spans[low:] = window + tail
+            self.versions[group] += 1
@@ -0,0 +1,29 @@
+"""
+Правила, по которым оцениваются промпты.
+
+Сами ключевые слова лежат в data/rules.json и загружаются вместе с
+каталогом миссий.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+from data.missions import CATALOG
+
+# Версия правил входит в ключ кэша оценок; её задаёт файл data/rules.json.
+RULESET_VERSION = CATALOG.ruleset_version
+
+# Группы ключевых слов, общие для всех миссий. Ключевые слова миссии
+# добавляются в тот же автомат под именем группы "mission", а все цифры
+# Юникода (``str.isdigit``) — под именем "digits".
+BASE_KEYWORD_GROUPS: Dict[str, List[str]] = CATALOG.keyword_groups
+
+# Группы, совпадения которых приносят баллы по каждому критерию. Ясность
+# зависит ещё и от длины промпта, а "honesty" засчитывается только в
+# миссиях с requires_ethics.
+CRITERION_GROUPS: Dict[str, Tuple[str, ...]] = {
+    "clarity": ("action",),
+    "context": ("audience", "mission"),
+    "constraints": ("constraints", "digits"),
+    "ethics": ("ethics", "honesty"),
+}
@@ -0,0 +1,232 @@
+"""
+Локальная заглушка сервера модели и генератор нагрузки для HTTPBackend.
+
+    python -m ai.stub_server serve --port 11434 --delay 0.3
+    python -m ai.stub_server load --url http://127.0.0.1:11434 --kiosks 40 --prompts 25
+
+Заглушка отвечает по тому же протоколу, что и ``/api/generate`` у Ollama
+(в том числе потоком при ``"stream": true``), и считает открытые TCP-соединения (``GET /stats``), так что по итогам
+нагрузки видно, переиспользует ли клиент соединения.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from urllib.parse import urlsplit
+
+from ai.backends import BackendError, HTTPBackend
+from data.missions import MISSIONS
+
+
+class StubStats:
+    def __init__(self) -> None:
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def add(self, *, connections: int = 0, requests: int = 0) -> None:
+        with self._lock:
+            self.connections += connections
+            self.requests += requests
+
+
+def make_handler(stats: StubStats, delay: float, token_delay: float):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def setup(self) -> None:
+            super().setup()
+            stats.add(connections=1)
+
+        def do_GET(self) -> None:  # noqa: N802 - имя задаёт http.server
+            if self.path != "/stats":
+                self._send(404, {"error": "not found"})
+                return
+            self._send(200, {"connections": stats.connections, "requests": stats.requests})
+
+        def do_POST(self) -> None:  # noqa: N802
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                payload = json.loads(self.rfile.read(length))
+            except ValueError:
+                self._send(400, {"error": "bad json"})
+                return
+            if self.path != "/api/generate":
+                self._send(404, {"error": "not found"})
+                return
+            stats.add(requests=1)
+            time.sleep(delay)
+            prompt = str(payload.get("prompt", ""))
+            text = f"Заглушка модели получила промпт ({len(prompt)} симв.) и отвечает по частям."
+            if payload.get("stream"):
+                self._stream(text)
+            else:
+                self._send(200, {"response": text, "done": True})
+
+        def _stream(self, text: str) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            words = text.split(" ")
+            try:
+                for index, word in enumerate(words):
+                    chunk = word if index == len(words) - 1 else word + " "
+                    self._write_chunk({"response": chunk, "done": False})
+                    time.sleep(token_delay)
+                self._write_chunk({"response": "", "done": True})
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                # Клиент прервал поток (например, ответ отменён) — это нормально.
+                self.close_connection = True
+
+        def _write_chunk(self, payload: dict) -> None:
+            line = (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+            self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+
+        def _send(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:  # noqa: A002
+            pass
+
+    return StubHandler
+
+
+def serve(host: str, port: int, delay: float, token_delay: float) -> None:
+    server = ThreadingHTTPServer((host, port), make_handler(StubStats(), delay, token_delay))
+    server.daemon_threads = True
+    print(f"[stub] Заглушка модели слушает http://{host}:{port} (задержка {delay} с)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def fetch_stats(url: str) -> dict:
+    parts = urlsplit(url)
+    connection = HTTPConnection(parts.hostname, parts.port, timeout=5)
+    try:
+        connection.request("GET", "/stats")
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+
+def load(url: str, kiosks: int, prompts: int, duplicates: float, pool_size: int, timeout: float) -> None:
+    """Киоски — потоки, у каждого свой HTTPBackend, как у отдельной игры.
+
+    Киоск шлёт промпты по одному через ``stream`` — тем же путём, что и
+    игра. С вероятностью ``duplicates`` промпт отправляется дважды
+    одновременно (повторное нажатие Enter), и клиент объединяет такие
+    запросы в один. По итогам видно, сколько запросов дошло до сервера и
+    сколько запросов пришлось на одно TCP-соединение.
+    """
+    latencies: List[float] = []
+    sent = 0
+    errors = 0
+    lock = threading.Lock()
+
+    def ask(backend: HTTPBackend, prompt: str, mission) -> None:
+        nonlocal sent, errors
+        started = time.perf_counter()
+        try:
+            for _ in backend.stream(prompt, mission):
+                pass
+        except BackendError:
+            with lock:
+                errors += 1
+            return
+        with lock:
+            sent += 1
+            latencies.append(time.perf_counter() - started)
+
+    def kiosk(index: int) -> None:
+        rnd = random.Random(index)
+        backend = HTTPBackend(url, timeout=timeout, pool_size=pool_size, fallback=None)
+        try:
+            for step in range(prompts):
+                prompt = f"Киоск {index}, промпт {step}: составь тест из 5 вопросов"
+                mission = rnd.choice(MISSIONS)
+                if rnd.random() < duplicates:
+                    repeat = threading.Thread(target=ask, args=(backend, prompt, mission))
+                    repeat.start()
+                    ask(backend, prompt, mission)
+                    repeat.join()
+                else:
+                    ask(backend, prompt, mission)
+        finally:
+            backend.close()
+
+    before = fetch_stats(url)
+    started = time.perf_counter()
+    threads = [threading.Thread(target=kiosk, args=(i,)) for i in range(kiosks)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    after = fetch_stats(url)
+
+    latencies.sort()
+
+    def percentile(q: float) -> float:
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+    received = after["requests"] - before["requests"]
+    connections = after["connections"] - before["connections"] - 1
+    print(f"[load] Запросов: {sent}, ошибок: {errors}, за {elapsed:.2f} с ({sent / elapsed:.1f} запр./с)")
+    print(f"[load] Задержка p50 {percentile(0.5):.1f} мс, p95 {percentile(0.95):.1f} мс, p99 {percentile(0.99):.1f} мс")
+    print(
+        f"[load] Сервер получил запросов: {received}, новых TCP-соединений: {connections} "
+        f"({received / max(connections, 1):.1f} запр. на соединение, киосков: {kiosks})"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Заглушка сервера модели и нагрузочный тест HTTPBackend.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Запустить заглушку сервера модели.")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=11434)
+    serve_parser.add_argument("--delay", type=float, default=0.2, help="Искусственная задержка ответа, с.")
+    serve_parser.add_argument(
+        "--token-delay", type=float, default=0.05, help="Пауза между кусками потокового ответа, с."
+    )
+
+    load_parser = commands.add_parser("load", help="Нагрузить сервер запросами от нескольких киосков.")
+    load_parser.add_argument("--url", default="http://127.0.0.1:11434")
+    load_parser.add_argument("--kiosks", type=int, default=20)
+    load_parser.add_argument("--prompts", type=int, default=20, help="Запросов на один киоск.")
+    load_parser.add_argument("--duplicates", type=float, default=0.2, help="Доля повторяющихся промптов.")
+    load_parser.add_argument(
+        "--pool-size", type=int, default=2, help="Сколько соединений держит клиент одного киоска."
+    )
+    load_parser.add_argument("--timeout", type=float, default=20.0)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.host, args.port, args.delay, args.token_delay)
+    else:
+        load(args.url, args.kiosks, args.prompts, args.duplicates, args.pool_size, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
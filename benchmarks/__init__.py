@@ -0,0 +1 @@
+# Бенчмарки движка оценки промптов.
@@ -0,0 +1,221 @@
+"""
+Бенчмарк движка оценки промптов.
+
+    python -m benchmarks.engine                  # замер и сравнение с базовой линией
+    python -m benchmarks.engine --save-baseline  # сохранить текущие цифры как базовую линию
+
+Для каждой миссии генерируются синтетические русские промпты разной длины
+(до MAX_PROMPT_LENGTH) и разной плотности ключевых слов. Отчёт содержит
+промпты в секунду, задержки p50/p95/p99 и память, выделяемую за вызов.
+Каждый случай замеряется ``--repeat`` раз, в отчёт идёт лучший замер —
+так меньше шума от планировщика ОС.
+Если пропускная способность или p95 хуже базовой линии больше чем на
+``--threshold``, скрипт завершается с кодом 1.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from ai.engine import AIEngine
+from ai.rules import BASE_KEYWORD_GROUPS
+from core.settings import MAX_PROMPT_LENGTH
+from data.missions import MISSIONS, Mission
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+LENGTHS = (40, 150, 300, MAX_PROMPT_LENGTH)
+DENSITIES = (0.0, 0.1, 0.3)
+
+FILLER_WORDS = (
+    "пожалуйста", "тема", "урок", "задание", "материал", "вопрос", "пример", "текст",
+    "помоги", "нужно", "сегодня", "для", "и", "по", "с", "о", "короткий", "подробный",
+    "ответ", "список", "интересный", "важно", "домашняя", "работа", "контрольная",
+)
+
+
+@dataclass
+class CaseResult:
+    mission_id: str
+    length: int
+    density: float
+    prompts_per_sec: float
+    batch_prompts_per_sec: float
+    p50_us: float
+    p95_us: float
+    p99_us: float
+    alloc_bytes_per_call: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.mission_id}/{self.length}/{self.density}"
+
+
+def make_corpus(mission: Mission, length: int, density: float, count: int, seed: int) -> List[str]:
+    """Промпты примерно заданной длины, где доля ``density`` слов — ключевые."""
+    rnd = random.Random(seed)
+    keywords = [word for words in BASE_KEYWORD_GROUPS.values() for word in words] + list(mission.context_keywords)
+    corpus = []
+    for _ in range(count):
+        words: List[str] = []
+        size = 0
+        while size < length:
+            word = rnd.choice(keywords) if rnd.random() < density else rnd.choice(FILLER_WORDS)
+            words.append(word)
+            size += len(word) + 1
+        corpus.append(" ".join(words)[:length])
+    return corpus
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    index = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return sorted_values[index]
+
+
+def run_case(engine: AIEngine, mission: Mission, length: int, density: float, corpus: List[str]) -> CaseResult:
+    evaluate = engine.evaluate_prompt
+    for prompt in corpus[:50]:
+        evaluate(prompt, mission)
+
+    timings: List[float] = []
+    clock = time.perf_counter_ns
+    gc.disable()
+    try:
+        started = clock()
+        for prompt in corpus:
+            begin = clock()
+            evaluate(prompt, mission)
+            timings.append((clock() - begin) / 1000)
+        elapsed = (clock() - started) / 1e9
+
+        started = clock()
+        engine.evaluate_many(corpus, mission)
+        batch_elapsed = (clock() - started) / 1e9
+    finally:
+        gc.enable()
+
+    sample = corpus[:100]
+    tracemalloc.start()
+    try:
+        allocated = 0
+        for prompt in sample:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            evaluate(prompt, mission)
+            allocated += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return CaseResult(
+        mission_id=mission.id,
+        length=length,
+        density=density,
+        prompts_per_sec=len(corpus) / elapsed,
+        batch_prompts_per_sec=len(corpus) / batch_elapsed,
+        p50_us=percentile(timings, 0.50),
+        p95_us=percentile(timings, 0.95),
+        p99_us=percentile(timings, 0.99),
+        alloc_bytes_per_call=allocated / len(sample),
+    )
+
+
+def best_of(runs: List[CaseResult]) -> CaseResult:
+    best = runs[0]
+    for run in runs[1:]:
+        best.prompts_per_sec = max(best.prompts_per_sec, run.prompts_per_sec)
+        best.batch_prompts_per_sec = max(best.batch_prompts_per_sec, run.batch_prompts_per_sec)
+        best.p50_us = min(best.p50_us, run.p50_us)
+        best.p95_us = min(best.p95_us, run.p95_us)
+        best.p99_us = min(best.p99_us, run.p99_us)
+        best.alloc_bytes_per_call = min(best.alloc_bytes_per_call, run.alloc_bytes_per_call)
+    return best
+
+
+def run_suite(count: int, seed: int, repeat: int) -> List[CaseResult]:
+    engine = AIEngine()
+    results = []
+    for mission in MISSIONS:
+        for length in LENGTHS:
+            for density in DENSITIES:
+                corpus = make_corpus(mission, length, density, count, seed)
+                runs = [run_case(engine, mission, length, density, corpus) for _ in range(max(1, repeat))]
+                results.append(best_of(runs))
+    return results
+
+
+def print_report(results: List[CaseResult]) -> None:
+    header = (
+        f"{'миссия':<24}{'длина':>6}{'плотн.':>7}{'промпт/с':>11}{'пакет/с':>11}"
+        f"{'p50 мкс':>9}{'p95 мкс':>9}{'p99 мкс':>9}{'байт/вызов':>12}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r.mission_id:<24}{r.length:>6}{r.density:>7.1f}{r.prompts_per_sec:>11.0f}{r.batch_prompts_per_sec:>11.0f}"
+            f"{r.p50_us:>9.1f}{r.p95_us:>9.1f}{r.p99_us:>9.1f}{r.alloc_bytes_per_call:>12.0f}"
+        )
+
+
+def compare(results: List[CaseResult], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    regressions = []
+    for r in results:
+        base = baseline.get(r.key)
+        if not base:
+            continue
+        if r.prompts_per_sec < base["prompts_per_sec"] * (1 - threshold):
+            regressions.append(
+                f"{r.key}: промпт/с {r.prompts_per_sec:.0f} < {base['prompts_per_sec']:.0f} (базовая линия)"
+            )
+        if r.p95_us > base["p95_us"] * (1 + threshold):
+            regressions.append(f"{r.key}: p95 {r.p95_us:.1f} мкс > {base['p95_us']:.1f} мкс (базовая линия)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк движка оценки промптов AI Teacher Quest.")
+    parser.add_argument("--prompts", type=int, default=500, help="Промптов на один случай.")
+    parser.add_argument("--repeat", type=int, default=3, help="Сколько раз замерять каждый случай.")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Файл базовой линии.")
+    parser.add_argument("--save-baseline", action="store_true", help="Сохранить результаты как базовую линию.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.15,
+        help="Допустимое ухудшение относительно базовой линии (0.15 — 15%%).",
+    )
+    args = parser.parse_args()
+
+    results = run_suite(args.prompts, args.seed, args.repeat)
+    print_report(results)
+
+    if args.save_baseline:
+        payload = {r.key: asdict(r) for r in results}
+        args.baseline.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[bench] Базовая линия сохранена в {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print("[bench] Базовая линия не найдена, сравнение пропущено (см. --save-baseline).")
+        return
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"[bench] Регрессии больше {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  - {line}")
+        sys.exit(1)
+    print(f"[bench] Регрессий больше {args.threshold:.0%} нет.")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@
 from __future__ import annotations
 
 import argparse
+import os
 import shutil
 import subprocess
 import sys
@@ -17,6 +18,8 @@ APP_BINARY_NAME = "AI_Teacher_Quest"
 ROOT = Path(__file__).parent.resolve()
 DIST_DIR = ROOT / "dist" / APP_BINARY_NAME
 INNO_SCRIPT = ROOT / "installer" / "AI_Teacher_Quest.iss"
+# Файлы данных, которые методисты правят без пересборки: кладутся рядом с модулем data.
+DATA_FILES = [ROOT / "data" / "rules.json", ROOT / "data" / "missions.json"]
 
 
 def run(command: list[str]) -> None:
@@ -49,6 +52,8 @@ def build_executable(debug: bool = False) -> None:
         "--clean",
         "--windowed",
     ]
+    for path in DATA_FILES:
+        cmd += ["--add-data", f"{path}{os.pathsep}data"]
     if debug:
         cmd.append("--debug=all")
     run(cmd)
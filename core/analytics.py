@@ -0,0 +1,185 @@
+"""
+Аналитика журнала попыток (нужен numpy).
+
+    python -m core.analytics                # журнал из настроек
+    python -m core.analytics attempts.bin
+
+Журнал открывается через numpy.memmap, все агрегаты считаются
+векторно (bincount, сортировка по ключу) — без циклов по записям, так что
+отчёт по миллионам попыток строится за доли секунды.
+"""
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Mapping
+
+import numpy as np
+
+from core.attempts import ATTEMPT_CRITERIA, HEADER_SIZE, MAGIC, RECORD, read_mission_ids, record_count
+from core.settings import ATTEMPTS_PATH
+from data.missions import MISSIONS_BY_ID
+
+ATTEMPT_DTYPE = np.dtype(
+    [
+        ("timestamp_ns", "<i8"),
+        ("session", "<u4"),
+        ("mission", "<u2"),
+        ("stars", "i1", (len(ATTEMPT_CRITERIA),)),
+        ("total_score", "i1"),
+        ("total_stars", "i1"),
+    ]
+)
+assert ATTEMPT_DTYPE.itemsize == RECORD.size
+
+
+@dataclass
+class Attempts:
+    """Колонки журнала (без копирования) и список id миссий по номерам."""
+
+    records: np.ndarray
+    mission_ids: List[str]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+def load_attempts(path: Path) -> Attempts:
+    path = Path(path)
+    count = record_count(path)
+    mission_ids = read_mission_ids(path)
+    if not count:
+        return Attempts(np.zeros(0, dtype=ATTEMPT_DTYPE), mission_ids)
+    with path.open("rb") as handle:
+        if handle.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: это не журнал попыток")
+    records = np.memmap(path, dtype=ATTEMPT_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+    return Attempts(records, mission_ids)
+
+
+def mean_stars(attempts: Attempts) -> Dict[str, Dict[str, float]]:
+    """Средние звёзды по каждому критерию для каждой миссии."""
+    missions = attempts.records["mission"]
+    size = len(attempts.mission_ids)
+    counts = np.bincount(missions, minlength=size)
+    stars = attempts.records["stars"]
+    result: Dict[str, Dict[str, float]] = {}
+    sums = [np.bincount(missions, weights=stars[:, column], minlength=size) for column in range(stars.shape[1])]
+    for index, mission_id in enumerate(attempts.mission_ids):
+        if counts[index]:
+            result[mission_id] = {
+                cid: float(sums[column][index] / counts[index]) for column, cid in enumerate(ATTEMPT_CRITERIA)
+            }
+    return result
+
+
+def _thresholds(attempts: Attempts, success_thresholds: Mapping[str, int]) -> np.ndarray:
+    # Миссии, которых уже нет в каталоге, пройти нельзя.
+    never = np.iinfo(np.int16).max
+    return np.array([success_thresholds.get(mid, never) for mid in attempts.mission_ids], dtype=np.int16)
+
+
+def passed_mask(attempts: Attempts, success_thresholds: Mapping[str, int]) -> np.ndarray:
+    if not len(attempts):
+        return np.zeros(0, dtype=bool)
+    thresholds = _thresholds(attempts, success_thresholds)
+    return attempts.records["total_score"] >= thresholds[attempts.records["mission"]]
+
+
+def pass_rates(attempts: Attempts, success_thresholds: Mapping[str, int]) -> Dict[str, float]:
+    """Доля попыток, набравших ``success_threshold`` миссии."""
+    missions = attempts.records["mission"]
+    size = len(attempts.mission_ids)
+    counts = np.bincount(missions, minlength=size)
+    passed = np.bincount(missions, weights=passed_mask(attempts, success_thresholds), minlength=size)
+    return {mid: float(passed[i] / counts[i]) for i, mid in enumerate(attempts.mission_ids) if counts[i]}
+
+
+@dataclass
+class AttemptsToPass:
+    """Распределение числа попыток до первого прохождения миссии в сессии."""
+
+    # histogram[k] — сколько сессий прошли миссию ровно с k-й попытки (histogram[0] = 0).
+    histogram: np.ndarray
+    # Сессии, в которых миссию пробовали, но так и не прошли.
+    not_passed: int
+
+    @property
+    def median(self) -> float:
+        total = int(self.histogram.sum())
+        if not total:
+            return float("nan")
+        return float(np.searchsorted(np.cumsum(self.histogram), (total + 1) / 2))
+
+
+def attempts_to_pass(attempts: Attempts, success_thresholds: Mapping[str, int]) -> Dict[str, AttemptsToPass]:
+    """Сколько попыток понадобилось до первого прохождения — по парам (сессия, миссия).
+
+    Записи идут в журнале по времени, поэтому устойчивая сортировка по
+    ключу сессия × миссия сохраняет порядок попыток внутри группы.
+    """
+    total = len(attempts)
+    size = len(attempts.mission_ids)
+    if not total:
+        return {}
+    records = attempts.records
+    keys = records["session"].astype(np.int64) * size + records["mission"]
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    passed = passed_mask(attempts, success_thresholds)[order]
+
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    group_missions = (keys[starts] % size).astype(np.intp)
+    lengths = np.diff(np.r_[starts, total])
+    # Номер попытки внутри группы, начиная с 1.
+    rank = np.arange(total) - np.repeat(starts, lengths) + 1
+
+    passed_rows = np.flatnonzero(passed)
+    groups_of_passed = np.searchsorted(starts, passed_rows, side="right") - 1
+    passed_groups, first = np.unique(groups_of_passed, return_index=True)
+    first_rank = rank[passed_rows[first]]
+
+    longest = int(first_rank.max()) + 1 if len(first_rank) else 1
+    histograms = np.zeros((size, longest), dtype=np.int64)
+    np.add.at(histograms, (group_missions[passed_groups], first_rank), 1)
+    tried = np.bincount(group_missions, minlength=size)
+    succeeded = np.bincount(group_missions[passed_groups], minlength=size)
+
+    return {
+        mid: AttemptsToPass(histograms[i], int(tried[i] - succeeded[i]))
+        for i, mid in enumerate(attempts.mission_ids)
+        if tried[i]
+    }
+
+
+def print_report(attempts: Attempts, success_thresholds: Mapping[str, int]) -> None:
+    print(f"[analytics] Попыток: {len(attempts)}")
+    if not len(attempts):
+        return
+    means = mean_stars(attempts)
+    rates = pass_rates(attempts, success_thresholds)
+    to_pass = attempts_to_pass(attempts, success_thresholds)
+    header = f"{'миссия':<24}" + "".join(f"{cid:>13}" for cid in ATTEMPT_CRITERIA) + f"{'проходят':>10}{'медиана':>9}"
+    print(header)
+    print("-" * len(header))
+    for mission_id, criteria in means.items():
+        stats = to_pass.get(mission_id)
+        median = f"{stats.median:.0f}" if stats and stats.histogram.sum() else "-"
+        print(
+            f"{mission_id:<24}"
+            + "".join(f"{criteria[cid]:>13.2f}" for cid in ATTEMPT_CRITERIA)
+            + f"{rates.get(mission_id, 0.0):>10.0%}{median:>9}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Отчёт по журналу попыток AI Teacher Quest.")
+    parser.add_argument("path", nargs="?", type=Path, default=Path(ATTEMPTS_PATH), help="Файл журнала попыток.")
+    args = parser.parse_args()
+    thresholds = {mid: mission.success_threshold for mid, mission in MISSIONS_BY_ID.items()}
+    print_report(load_attempts(args.path), thresholds)
+
+
+if __name__ == "__main__":
+    main()
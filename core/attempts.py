@@ -0,0 +1,113 @@
+"""
+Журнал попыток: каждая оценённая попытка дописывается в бинарный файл.
+
+Файл состоит из заголовка и записей фиксированного размера (колонки
+упакованы подряд, little-endian), поэтому core.analytics открывает его
+через numpy.memmap без разбора и копирования. Идентификаторы миссий лежат
+рядом, в ``<файл>.missions`` (по одному в строке); в записи хранится номер
+строки. Сама игра пишет журнал стандартной библиотекой — numpy нужен
+только для аналитики.
+"""
+from __future__ import annotations
+
+import os
+import struct
+import time
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional
+
+from core.settings import CRITERIA_META
+
+MAGIC = b"ATQATT01"
+HEADER_SIZE = 16
+# timestamp_ns, session, mission, 4 × stars, total_score, total_stars
+RECORD = struct.Struct("<qIH4bbb")
+# Порядок колонок звёзд в записи.
+ATTEMPT_CRITERIA = tuple(CRITERIA_META)
+
+
+def missions_path(path: Path) -> Path:
+    return path.with_name(path.name + ".missions")
+
+
+def read_mission_ids(path: Path) -> List[str]:
+    try:
+        return missions_path(path).read_text(encoding="utf-8").split()
+    except FileNotFoundError:
+        return []
+
+
+def record_count(path: Path) -> int:
+    """Число целых записей; недописанный хвост (сбой при записи) не считается."""
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return 0
+    return max(0, size - HEADER_SIZE) // RECORD.size
+
+
+class AttemptStore:
+    """Дописывает попытки в журнал; каждый запуск игры — новая сессия."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._mission_ids: Dict[str, int] = {mid: index for index, mid in enumerate(read_mission_ids(self.path))}
+        self.session = self._last_session() + 1
+        self._file: Optional[BinaryIO] = None
+
+    def _last_session(self) -> int:
+        count = record_count(self.path)
+        if not count:
+            return 0
+        with self.path.open("rb") as handle:
+            handle.seek(HEADER_SIZE + (count - 1) * RECORD.size)
+            return RECORD.unpack(handle.read(RECORD.size))[1]
+
+    def _open(self) -> BinaryIO:
+        if self._file is None:
+            count = record_count(self.path)
+            handle = self.path.open("r+b" if self.path.exists() else "w+b")
+            if handle.seek(0, os.SEEK_END) < HEADER_SIZE:
+                handle.seek(0)
+                handle.truncate()
+                handle.write(MAGIC.ljust(HEADER_SIZE, b"\0"))
+            else:
+                handle.seek(0)
+                if handle.read(len(MAGIC)) != MAGIC:
+                    handle.close()
+                    raise ValueError(f"{self.path}: это не журнал попыток")
+                # Отрезаем недописанную запись, чтобы следующие легли ровно.
+                handle.truncate(HEADER_SIZE + count * RECORD.size)
+                handle.seek(0, os.SEEK_END)
+            self._file = handle
+        return self._file
+
+    def _mission_index(self, mission_id: str) -> int:
+        index = self._mission_ids.get(mission_id)
+        if index is None:
+            index = len(self._mission_ids)
+            with missions_path(self.path).open("a", encoding="utf-8") as handle:
+                handle.write(mission_id + "\n")
+            self._mission_ids[mission_id] = index
+        return index
+
+    def record(self, mission_id: str, result: "EvaluationResult") -> None:  # noqa: F821
+        stars = [result.scores[cid].stars for cid in ATTEMPT_CRITERIA]
+        handle = self._open()
+        handle.write(
+            RECORD.pack(
+                time.time_ns(),
+                self.session,
+                self._mission_index(mission_id),
+                *stars,
+                result.total_score,
+                result.total_stars,
+            )
+        )
+        handle.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
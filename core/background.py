@@ -4,88 +4,190 @@
 from __future__ import annotations
 
 import math
-import random
-from dataclasses import dataclass
-from typing import List, Tuple
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
 
+import numpy as np
 import pygame
 
-from core.settings import COLORS, WINDOW
+from core.settings import BACKGROUND_NODES, COLORS
+
+# Сколько градиентов под разные размеры окна держать готовыми.
+GRADIENT_CACHE_SIZE = 4
+# Базовые радиусы узлов; радиус «дышит» на NODE_PULSE от базового.
+MIN_NODE_RADIUS = 10
+MAX_NODE_RADIUS = 22
+NODE_PULSE = 0.2
+# Узел, ушедший за край окна дальше этого, поворачивает обратно.
+NODE_MARGIN = 40
+# При большем числе узлов фон перерисовывается целиком, без списка областей.
+MAX_DIRTY_NODES = 256
+_SPRITE_KEY = (255, 0, 255)
+
+
+class NodeField:
+    """Узлы фона в массивах NumPy: позиции, скорости, радиусы и цвета.
+
+    Движение и отражение от краёв считаются одной векторной операцией для
+    всех узлов. Рисуются узлы блитом готовых спрайтов — по одному на каждый
+    целый радиус и цвет, — поэтому узлов могут быть тысячи.
+    """
+
+    def __init__(
+        self,
+        count: int,
+        size: Tuple[int, int],
+        colors: Sequence[Tuple[int, int, int]],
+        rng: Optional[np.random.Generator] = None,
+    ) -> None:
+        self.count = count
+        self.colors = list(colors)
+        self.rng = rng or np.random.default_rng()
+        self._min_radius = int(MIN_NODE_RADIUS * (1 - NODE_PULSE))
+        self._sprites = self._render_sprites()
+        self.resize(size)
 
+    def resize(self, size: Tuple[int, int]) -> None:
+        """Расставляет узлы заново под новый размер окна."""
+        width, height = size
+        count, rng = self.count, self.rng
+        self._limits = np.array([width + NODE_MARGIN, height + NODE_MARGIN], dtype=float)
+        self.positions = rng.uniform((0, 0), (width, height), size=(count, 2))
+        angles = rng.uniform(0, 2 * math.pi, count)
+        speeds = rng.uniform(15, 35, count)
+        self.velocities = np.column_stack((np.cos(angles), np.sin(angles))) * speeds[:, None]
+        self.base_radii = rng.uniform(MIN_NODE_RADIUS, MAX_NODE_RADIUS, count)
+        self.radii = self.base_radii.copy()
+        self.color_index = rng.integers(0, len(self.colors), count)
+
+    def _render_sprites(self) -> np.ndarray:
+        """Круг с белой обводкой для каждой пары (целый радиус, цвет)."""
+        max_radius = math.ceil(MAX_NODE_RADIUS * (1 + NODE_PULSE))
+        display = pygame.display.get_surface()
+        sprites = []
+        for radius in range(self._min_radius, max_radius + 1):
+            for color in self.colors:
+                sprite = pygame.Surface((radius * 2 + 2, radius * 2 + 2))
+                sprite.fill(_SPRITE_KEY)
+                center = (radius + 1, radius + 1)
+                pygame.draw.circle(sprite, color, center, radius)
+                pygame.draw.circle(sprite, (255, 255, 255), center, radius, 1)
+                if display is not None:
+                    sprite = sprite.convert()
+                sprite.set_colorkey(_SPRITE_KEY)
+                sprites.append(sprite)
+        # Массив объектов: спрайты всех узлов выбираются одной индексацией.
+        table = np.empty(len(sprites), dtype=object)
+        table[:] = sprites
+        return table
+
+    def _buckets(self) -> np.ndarray:
+        return np.rint(self.radii).astype(np.intp)
+
+    def sprite_rects(self) -> np.ndarray:
+        """Прямоугольники спрайтов узлов: столбцы x, y, ширина, высота."""
+        radius = self._buckets()
+        centers = np.rint(self.positions).astype(np.intp)
+        size = radius * 2 + 2
+        return np.column_stack((centers - (radius + 1)[:, None], size, size))
+
+    def update(self, dt: float, phase: float) -> None:
+        positions = self.positions
+        positions += self.velocities * dt
+        speeds = np.abs(self.velocities)
+        self.velocities = np.where(
+            positions < -NODE_MARGIN, speeds, np.where(positions > self._limits, -speeds, self.velocities)
+        )
+        self.radii = self.base_radii * (1 + NODE_PULSE * math.sin(phase))
 
-@dataclass
-class FloatingNode:
-    """Простая частица для анимации."""
+    def draw(self, surface: pygame.Surface) -> None:
+        keys = (self._buckets() - self._min_radius) * len(self.colors) + self.color_index
+        topleft = self.sprite_rects()[:, :2].tolist()
+        surface.blits(list(zip(self._sprites[keys].tolist(), topleft)), doreturn=False)
 
-    position: pygame.math.Vector2
-    velocity: pygame.math.Vector2
-    radius: float
-    base_radius: float
-    color: Tuple[int, int, int]
 
-    def update(self, dt: float) -> None:
-        self.position += self.velocity * dt
-        self.radius = self.base_radius + (self.base_radius * 0.2) * math.sin(pygame.time.get_ticks() / 500.0)
+class DynamicBackground:
+    """Отвечает за отрисовку градиента и узлов.
 
+    Узлы движутся постоянно, поэтому после каждого ``update`` фон сообщает
+    через ``dirty_rects`` области, где узел был и где он теперь (если узлов
+    много — весь экран).
 
-class DynamicBackground:
-    """Отвечает за отрисовку градиента и узлов."""
+    Градиенты кэшируются по размеру окна, поэтому переключение между
+    оконным и полноэкранным режимом не строит их заново.
+    """
 
     def __init__(self, size: Tuple[int, int]) -> None:
         self.width, self.height = size
-        self.gradient_surface = self._create_gradient_surface()
-        self.nodes: List[FloatingNode] = self._spawn_nodes()
+        self._gradients: "OrderedDict[Tuple[int, int], pygame.Surface]" = OrderedDict()
+        self.gradient_surface = self._gradient_surface()
+        self.nodes = NodeField(BACKGROUND_NODES, size, (COLORS.accent, COLORS.accent_secondary))
+        self._dirty: Optional[List[pygame.Rect]] = None
 
     def resize(self, size: Tuple[int, int]) -> None:
         self.width, self.height = size
-        self.gradient_surface = self._create_gradient_surface()
-        self.nodes = self._spawn_nodes()
+        self.gradient_surface = self._gradient_surface()
+        self.nodes.resize(size)
+
+    def _gradient_surface(self) -> pygame.Surface:
+        size = (self.width, self.height)
+        gradient = self._gradients.get(size)
+        if gradient is None:
+            gradient = self._create_gradient_surface()
+            self._gradients[size] = gradient
+            if len(self._gradients) > GRADIENT_CACHE_SIZE:
+                self._gradients.popitem(last=False)
+        else:
+            self._gradients.move_to_end(size)
+        return gradient
 
     def _create_gradient_surface(self) -> pygame.Surface:
-        gradient = pygame.Surface((self.width, self.height))
-        for y in range(self.height):
-            mix = y / self.height
-            color = [
-                int(COLORS.background_top[i] * (1 - mix) + COLORS.background_bottom[i] * mix)
-                for i in range(3)
-            ]
-            pygame.draw.line(gradient, color, (0, y), (self.width, y))
-        gradient.set_alpha(230)
+        """Столбец высотой в окно размножается по ширине — без цикла по строкам."""
+        width, height = max(self.width, 1), max(self.height, 1)
+        strip = bytearray(height * 3)
+        for i in range(3):
+            top, bottom = COLORS.background_top[i], COLORS.background_bottom[i]
+            strip[i::3] = bytes(int(top * (1 - y / height) + bottom * (y / height)) for y in range(height))
+        column = pygame.image.frombuffer(bytes(strip), (1, height), "RGB")
+
+        # В формате окна градиент копируется на экран без преобразования пикселей.
+        display = pygame.display.get_surface()
+        gradient = pygame.Surface((width, height), 0, display) if display is not None else pygame.Surface((width, height))
+        gradient.blit(column, (0, 0))
+        # Каждый шаг копирует уже заполненную часть вправо: log2(ширины) блитов.
+        filled = 1
+        while filled < width:
+            step = min(filled, width - filled)
+            gradient.blit(gradient, (filled, 0), (0, 0, step, height))
+            filled += step
         return gradient
 
-    def _spawn_nodes(self) -> List[FloatingNode]:
-        nodes: List[FloatingNode] = []
-        for _ in range(24):
-            x = random.uniform(0, self.width)
-            y = random.uniform(0, self.height)
-            angle = random.uniform(0, 360)
-            speed = random.uniform(15, 35)
-            velocity = pygame.math.Vector2(speed, 0).rotate(angle)
-            base_radius = random.uniform(10, 22)
-            color = COLORS.accent if random.random() > 0.5 else COLORS.accent_secondary
-            nodes.append(
-                FloatingNode(
-                    position=pygame.math.Vector2(x, y),
-                    velocity=velocity,
-                    radius=base_radius,
-                    base_radius=base_radius,
-                    color=color,
-                )
-            )
-        return nodes
-
     def update(self, dt: float) -> None:
-        for node in self.nodes:
-            node.update(dt)
-            if node.position.x < -40 or node.position.x > self.width + 40:
-                node.velocity.x *= -1
-            if node.position.y < -40 or node.position.y > self.height + 40:
-                node.velocity.y *= -1
-
-    def draw(self, surface: pygame.Surface) -> None:
-        surface.blit(self.gradient_surface, (0, 0))
-        for node in self.nodes:
-            pygame.draw.circle(surface, node.color, node.position, node.radius)
-        for node in self.nodes:
-            pygame.draw.circle(surface, (255, 255, 255, 40), node.position, node.radius, 1)
+        nodes = self.nodes
+        before = nodes.sprite_rects()
+        nodes.update(dt, pygame.time.get_ticks() / 500.0)
+        if nodes.count > MAX_DIRTY_NODES:
+            self._dirty = None
+            return
+        after = nodes.sprite_rects()
+        left_top = np.minimum(before[:, :2], after[:, :2])
+        right_bottom = np.maximum(before[:, :2] + before[:, 2:], after[:, :2] + after[:, 2:])
+        self._dirty = [pygame.Rect(rect) for rect in np.hstack((left_top, right_bottom - left_top)).tolist()]
+
+    def dirty_rects(self) -> Optional[List[pygame.Rect]]:
+        """Области, изменившиеся при последнем ``update``; ``None`` — весь экран."""
+        return self._dirty
+
+    def draw(self, surface: pygame.Surface, areas: Optional[Sequence[pygame.Rect]] = None) -> None:
+        """Рисует фон целиком или только под ``areas``.
+
+        Узлы рисуются без отсечения: их области всегда входят в ``dirty_rects``,
+        а значит, и в перерисовываемые ``areas``.
+        """
+        if areas is None:
+            surface.blit(self.gradient_surface, (0, 0))
+        else:
+            for area in areas:
+                surface.blit(self.gradient_surface, area, area)
+        self.nodes.draw(surface)
 
@@ -8,7 +8,9 @@ from typing import Callable, Dict, Optional, Tuple
 
 import pygame
 
-from core.settings import WINDOW
+from core.attempts import AttemptStore
+from core.jobs import JobRunner
+from core.settings import JOB_WORKERS, WINDOW
 
 
 @dataclass
@@ -37,12 +39,14 @@ class GameProgress:
 
 @dataclass
 class GameContext:
-    """Общий контекст — поверхность окна, шрифты, ИИ-модуль, прогресс."""
+    """Общий контекст — поверхность окна, шрифты, ИИ-модуль, фоновые задачи, прогресс."""
 
     surface: pygame.Surface
     fonts: "FontManager"  # type: ignore  # определён в ui.fonts
     ai_engine: "AIEngine"  # type: ignore  # определён в ai.engine
     progress: GameProgress = field(default_factory=GameProgress)
+    jobs: JobRunner = field(default_factory=lambda: JobRunner(JOB_WORKERS))
+    attempts: Optional[AttemptStore] = None
     fullscreen: bool = False
     screen_size: Tuple[int, int] = field(default_factory=lambda: (WINDOW.width, WINDOW.height))
     _fullscreen_handler: Optional[Callable[[bool], pygame.Surface]] = field(default=None, repr=False)
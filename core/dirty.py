@@ -0,0 +1,76 @@
+"""
+Учёт изменившихся областей кадра.
+"""
+from __future__ import annotations
+
+from typing import Iterable, List, Optional, Tuple
+
+import pygame
+
+
+class DirtyRegion:
+    """Набор непересекающихся прямоугольников, которые нужно перерисовать.
+
+    Пересекающиеся прямоугольники сливаются при добавлении. Если общая
+    площадь превышает ``full_ratio`` экрана, область считается полной —
+    дешевле перерисовать кадр целиком.
+    """
+
+    def __init__(self, size: Tuple[int, int], *, full_ratio: float = 0.5) -> None:
+        self.full_ratio = full_ratio
+        self._rects: List[pygame.Rect] = []
+        self._area = 0
+        self.full = True
+        self.resize(size)
+
+    def resize(self, size: Tuple[int, int]) -> None:
+        self._bounds = pygame.Rect((0, 0), size)
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Помечает весь кадр."""
+        self.full = True
+        self._rects = []
+        self._area = 0
+
+    def add(self, rect: pygame.Rect) -> None:
+        if self.full:
+            return
+        rect = self._bounds.clip(rect)
+        if not rect.width or not rect.height:
+            return
+        index = rect.collidelist(self._rects)
+        while index != -1:
+            merged = self._rects.pop(index)
+            self._area -= merged.width * merged.height
+            rect.union_ip(merged)
+            index = rect.collidelist(self._rects)
+        self._rects.append(rect)
+        self._area += rect.width * rect.height
+        if self._area > self.full_ratio * self._bounds.width * self._bounds.height:
+            self.invalidate()
+
+    def add_all(self, rects: Optional[Iterable[pygame.Rect]]) -> None:
+        """Добавляет прямоугольники; ``None`` означает весь кадр."""
+        if rects is None:
+            self.invalidate()
+            return
+        for rect in rects:
+            self.add(rect)
+
+    def bounding_rect(self) -> pygame.Rect:
+        if self.full or not self._rects:
+            return self._bounds.copy() if self.full else pygame.Rect(0, 0, 0, 0)
+        return self._rects[0].unionall(self._rects[1:])
+
+    @property
+    def rects(self) -> List[pygame.Rect]:
+        return [self._bounds.copy()] if self.full else list(self._rects)
+
+    def __bool__(self) -> bool:
+        return self.full or bool(self._rects)
+
+    def clear(self) -> None:
+        self.full = False
+        self._rects = []
+        self._area = 0
@@ -0,0 +1,84 @@
+"""
+Фоновые задачи: тяжёлая работа выполняется в пуле потоков, а экраны
+забирают готовые результаты в ``update()``.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, TypeVar, Union
+
+T = TypeVar("T")
+
+
+class StreamJob:
+    """Фоновая задача, которая отдаёт результат частями.
+
+    Исполнитель складывает элементы в очередь, экран забирает их в
+    ``update()`` через ``drain()``. Отмена останавливает перебор на
+    следующем элементе и закрывает исходный генератор.
+    """
+
+    def __init__(self) -> None:
+        self.future: Optional[Future] = None
+        self._items: "queue.SimpleQueue[object]" = queue.SimpleQueue()
+        self._cancelled = threading.Event()
+
+    def _run(self, fn: Callable[..., Iterable[object]], args, kwargs) -> None:
+        items = iter(fn(*args, **kwargs))
+        try:
+            for item in items:
+                if self._cancelled.is_set():
+                    break
+                self._items.put(item)
+        finally:
+            close = getattr(items, "close", None)
+            if close:
+                close()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def drain(self) -> List[object]:
+        items: List[object] = []
+        while True:
+            try:
+                items.append(self._items.get_nowait())
+            except queue.Empty:
+                return items
+
+    def done(self) -> bool:
+        """Задача завершилась, и все её элементы уже забраны."""
+        return self.future is not None and self.future.done() and self._items.empty()
+
+
+class JobRunner:
+    """Пул исполнителей для задач, которые нельзя выполнять в игровом цикле."""
+
+    def __init__(self, max_workers: int = 2) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+
+    def submit(self, fn: Callable[..., T], *args, **kwargs) -> Future:
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def submit_stream(self, fn: Callable[..., Iterable[object]], *args, **kwargs) -> StreamJob:
+        """Запускает генератор ``fn`` в пуле; его элементы читаются через StreamJob."""
+        job = StreamJob()
+        job.future = self._executor.submit(job._run, fn, args, kwargs)
+        return job
+
+    @staticmethod
+    def cancel(job: Union[Future, StreamJob, None]) -> None:
+        """Отменяет задачу; если она уже выполняется, результат просто игнорируется."""
+        if job is not None:
+            job.cancel()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,50 @@
+"""
+Темп главного цикла: полный FPS во время анимаций и ожидание событий в простое.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+import pygame
+
+ACTIVE = "active"
+IDLE = "idle"
+
+
+class FramePacer:
+    """Выбирает, как ждать следующий кадр, и считает время в каждом режиме.
+
+    Пока что-то анимируется, кадры идут с частотой ``fps``. В простое цикл
+    блокируется в ``pygame.event.wait`` не дольше ``1 / idle_fps`` секунды:
+    ввод будит его сразу, а фон продолжает двигаться с низкой частотой.
+    ``idle_fps`` не больше нуля отключает простой.
+    """
+
+    def __init__(self, fps: int, idle_fps: int) -> None:
+        self.fps = fps
+        self.idle_fps = idle_fps
+        self.clock = pygame.time.Clock()
+        self.seconds: Dict[str, float] = {ACTIVE: 0.0, IDLE: 0.0}
+        self.frames: Dict[str, int] = {ACTIVE: 0, IDLE: 0}
+
+    def next_frame(self, animating: bool) -> Tuple[float, List[pygame.event.Event]]:
+        """Ждёт следующий кадр; возвращает прошедшее время в секундах и накопившиеся события."""
+        if animating or self.idle_fps <= 0:
+            mode = ACTIVE
+            dt = self.clock.tick(self.fps) / 1000
+            events = pygame.event.get()
+        else:
+            mode = IDLE
+            first = pygame.event.wait(1000 // self.idle_fps)
+            events = [] if first.type == pygame.NOEVENT else [first]
+            events.extend(pygame.event.get())
+            dt = self.clock.tick() / 1000
+        self.seconds[mode] += dt
+        self.frames[mode] += 1
+        return dt, events
+
+    def report(self) -> str:
+        return ", ".join(
+            f"{label}: {self.seconds[mode]:.1f} с ({self.frames[mode]} кадров)"
+            for mode, label in ((ACTIVE, "анимация"), (IDLE, "простой"))
+        )
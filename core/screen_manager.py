@@ -3,12 +3,14 @@
 """
 from __future__ import annotations
 
-from typing import Callable, Dict, Optional
+from typing import Callable, Dict, List, Optional
 
 import pygame
 
 from core.background import DynamicBackground
 from core.context import GameContext
+from core.dirty import DirtyRegion
+from core.settings import DIRTY_FULL_RATIO, DIRTY_MAX_PASSES, DIRTY_RECTS
 
 if False:  # pragma: no cover - подсказка для типов
     from screens.base import BaseScreen
@@ -18,7 +20,14 @@ ScreenFactory = Callable[[GameContext], "BaseScreen"]
 
 
 class ScreenManager:
-    """Отвечает за переключение экранов, переходы и фон."""
+    """Отвечает за переключение экранов, переходы и фон.
+
+    В режиме ``DIRTY_RECTS`` экран рисуется в отдельный прозрачный слой, а
+    кадр собирается из фона и этого слоя только там, где что-то изменилось:
+    область, о которой сообщил экран, перерисовывается в слое, а под
+    движущимися узлами фона слой просто накладывается заново. ``draw``
+    возвращает эти прямоугольники для ``pygame.display.update``.
+    """
 
     def __init__(self, context: GameContext) -> None:
         self.context = context
@@ -36,6 +45,13 @@ class ScreenManager:
         self._fade_surface = pygame.Surface(self.context.surface.get_size(), pygame.SRCALPHA)
         self.background = DynamicBackground(self.context.surface.get_size())
 
+        self.dirty_rects = DIRTY_RECTS
+        self._target: Optional[pygame.Surface] = None
+        self._layer = pygame.Surface(self.context.surface.get_size(), pygame.SRCALPHA)
+        self._layer_dirty = DirtyRegion(self.context.surface.get_size(), full_ratio=DIRTY_FULL_RATIO)
+        self._frame_dirty = DirtyRegion(self.context.surface.get_size(), full_ratio=DIRTY_FULL_RATIO)
+        self._fade_drawn = False
+
         self._register_defaults()
         self.change("menu")
 
@@ -79,6 +95,10 @@ class ScreenManager:
         if self._current and not self._transition_active:
             self._current.handle_event(event)
 
+    def is_animating(self) -> bool:
+        """Нужны ли кадры с полной частотой (переход, анимация экрана)."""
+        return self._transition_active or bool(self._current and self._current.is_animating())
+
     def update(self, dt: float) -> None:
         self.background.update(dt)
         if self._current:
@@ -94,18 +114,81 @@ class ScreenManager:
                 self._transition_active = False
                 self._transition_alpha = 0
 
-    def draw(self) -> None:
+    def draw(self) -> Optional[List[pygame.Rect]]:
+        """Рисует кадр и возвращает изменившиеся области; ``None`` — обновить окно целиком."""
         surface = self.context.surface
-        self.background.draw(surface)
-        if self._current:
-            self._current.draw(surface)
-        if self._transition_active:
-            self._fade_surface.fill((10, 12, 25, int(255 * self._transition_alpha)))
-            surface.blit(self._fade_surface, (0, 0))
+        if not self.dirty_rects:
+            self.background.draw(surface)
+            if self._current:
+                self._current.draw(surface)
+            self._draw_fade(surface)
+            return None
+
+        if surface is not self._target:
+            # Окно пересоздано (например, переключён полноэкранный режим).
+            if self._target is not None and surface.get_size() != self._layer.get_size():
+                self.handle_resize(surface.get_size())
+            self._target = surface
+            self._frame_dirty.invalidate()
+
+        layer_dirty, frame_dirty = self._layer_dirty, self._frame_dirty
+        layer_dirty.add_all(self._current.take_dirty() if self._current else [])
+        self._draw_layer(layer_dirty)
+        if layer_dirty.full:
+            frame_dirty.invalidate()
+        else:
+            frame_dirty.add_all(layer_dirty.rects)
+        frame_dirty.add_all(self.background.dirty_rects())
+        if self._transition_active or self._fade_drawn:
+            frame_dirty.invalidate()
+
+        if frame_dirty.full:
+            self.background.draw(surface)
+            surface.blit(self._layer, (0, 0))
+            rects = None
+        else:
+            rects = frame_dirty.rects
+            self.background.draw(surface, rects)
+            for rect in rects:
+                surface.blit(self._layer, rect, rect)
+        self._fade_drawn = self._draw_fade(surface)
+        layer_dirty.clear()
+        frame_dirty.clear()
+        return rects
+
+    def _draw_layer(self, dirty: DirtyRegion) -> None:
+        """Перерисовывает экран в слое — целиком или только в изменившихся областях."""
+        layer = self._layer
+        if not dirty:
+            return
+        if dirty.full or not self._current:
+            layer.fill((0, 0, 0, 0))
+            if self._current:
+                self._current.draw(layer)
+            return
+        rects = dirty.rects
+        if len(rects) > DIRTY_MAX_PASSES:
+            # Каждый проход рисует экран заново, поэтому мелкие области объединяем.
+            rects = [dirty.bounding_rect()]
+        for rect in rects:
+            layer.set_clip(rect)
+            layer.fill((0, 0, 0, 0), rect)
+            self._current.draw(layer)
+        layer.set_clip(None)
+
+    def _draw_fade(self, surface: pygame.Surface) -> bool:
+        if not self._transition_active:
+            return False
+        self._fade_surface.fill((10, 12, 25, int(255 * self._transition_alpha)))
+        surface.blit(self._fade_surface, (0, 0))
+        return True
 
     def handle_resize(self, size: tuple[int, int]) -> None:
         self._fade_surface = pygame.Surface(size, pygame.SRCALPHA)
         self.background.resize(size)
+        self._layer = pygame.Surface(size, pygame.SRCALPHA)
+        self._layer_dirty.resize(size)
+        self._frame_dirty.resize(size)
         if self._current and hasattr(self._current, "on_resize"):
             self._current.on_resize(size)
 
@@ -113,7 +196,10 @@ class ScreenManager:
         if not self._pending_target:
             return
         factory = self._factories[self._pending_target]
+        if self._current:
+            self._current.on_exit()
         self._current = factory(self.context, self._pending_kwargs)
+        self._layer_dirty.invalidate()
         self._current_name = self._pending_target
         self._pending_target = None
         self._pending_kwargs = {}
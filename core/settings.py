@@ -3,6 +3,7 @@
 """
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
 from typing import Dict, Tuple
 
@@ -14,6 +15,8 @@ class WindowConfig:
     width: int = 1500
     height: int = 900
     fps: int = 60
+    # Частота кадров в простое, когда ничего не анимируется (0 — простоя нет).
+    idle_fps: int = 10
     title: str = "AI Teacher Quest"
     fullscreen: bool = False
 
@@ -35,12 +38,42 @@ class Palette:
     success: Tuple[int, int, int] = (104, 227, 168)
 
 
+@dataclass(frozen=True)
+class LLMConfig:
+    """Подключение к локальному серверу модели. Пустой url — шаблонные ответы."""
+
+    url: str = ""
+    model: str = ""
+    timeout: float = 20.0
+    pool_size: int = 4
+
+
 WINDOW = WindowConfig()
 COLORS = Palette()
+LLM = LLMConfig(
+    url=os.environ.get("AI_TEACHER_LLM_URL", ""),
+    model=os.environ.get("AI_TEACHER_LLM_MODEL", ""),
+)
 
 MAX_PROMPT_LENGTH = 600
 MIN_PROMPT_LENGTH = 12
 MAX_PROMPT_HISTORY = 3
+# Сколько последних оценок держать в кэше движка; по умолчанию кэш выключен.
+EVALUATION_CACHE_SIZE = int(os.environ.get("AI_TEACHER_EVALUATION_CACHE", "0"))
+# Потоки для фоновых задач (оценка промптов и т. п.).
+JOB_WORKERS = 2
+# Число движущихся узлов на фоне.
+BACKGROUND_NODES = int(os.environ.get("AI_TEACHER_BACKGROUND_NODES", "24"))
+# Перерисовывать только изменившиеся области кадра («0» — весь кадр каждый раз).
+DIRTY_RECTS = os.environ.get("AI_TEACHER_DIRTY_RECTS", "1") != "0"
+# Если изменилось больше этой доли экрана, кадр перерисовывается целиком.
+DIRTY_FULL_RATIO = 0.5
+# Сколько раз за кадр можно перерисовать экран по частям; больше — одним прямоугольником.
+DIRTY_MAX_PASSES = 4
+# Журнал всех оценённых попыток (см. core.attempts); пустая строка — не вести.
+ATTEMPTS_PATH = os.environ.get(
+    "AI_TEACHER_ATTEMPTS", os.path.join(os.path.expanduser("~"), ".ai_teacher_quest", "attempts.bin")
+)
 
 # Метаданные критериев оценки промптов. Используются UI и движком.
 CRITERIA_META: Dict[str, Dict[str, str]] = {
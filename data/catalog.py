@@ -0,0 +1,124 @@
+"""
+Загрузка файлов данных (JSON/TOML) с кэшем скомпилированного результата.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Sequence, TypeVar
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+T = TypeVar("T")
+
+# Увеличивайте, когда меняется устройство скомпилированных структур
+# (например, KeywordMatcher): старые файлы кэша станут недействительными.
+CACHE_FORMAT = 3
+
+
+@dataclass(frozen=True)
+class SourceStamp:
+    """Отпечаток исходного файла на момент компиляции."""
+
+    name: str
+    mtime_ns: int
+    size: int
+    digest: str
+
+
+def read_data_file(path: Path) -> Any:
+    """Читает JSON или TOML (по расширению файла)."""
+    if path.suffix == ".toml":
+        if tomllib is None:
+            raise ValueError(f"{path}: для TOML нужен Python 3.11+")
+        with path.open("rb") as handle:
+            return tomllib.load(handle)
+    with path.open("r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def file_digest(path: Path) -> str:
+    return hashlib.blake2b(path.read_bytes(), digest_size=16).hexdigest()
+
+
+def stamp_source(path: Path) -> SourceStamp:
+    stat = path.stat()
+    return SourceStamp(path.name, stat.st_mtime_ns, stat.st_size, file_digest(path))
+
+
+def load_compiled(sources: Sequence[Path], compile_sources: Callable[[], T], cache_path: Path) -> T:
+    """Возвращает результат ``compile_sources`` из кэша, если исходники не менялись.
+
+    Кэш действителен, пока у каждого исходника совпадают время изменения
+    и размер. Если они разошлись (например, файл скопирован заново), файл
+    хэшируется: при совпадении хэша кэш используется и перезаписывается
+    с новыми отметками, иначе исходники разбираются и компилируются заново.
+    Не удалось записать кэш (каталог только для чтения) — не страшно.
+    """
+    payload = _read_cache(cache_path)
+    if payload is not None:
+        stamps = _revalidate(sources, payload["stamps"])
+        if stamps is not None:
+            if stamps != payload["stamps"]:
+                _write_cache(cache_path, stamps, payload["value"])
+            return payload["value"]
+
+    stamps = [stamp_source(path) for path in sources]
+    value = compile_sources()
+    _write_cache(cache_path, stamps, value)
+    return value
+
+
+def _read_cache(cache_path: Path) -> Optional[dict]:
+    try:
+        with cache_path.open("rb") as handle:
+            payload = pickle.load(handle)
+    except Exception:  # нет файла, он повреждён или устарел — кэш просто пересобирается
+        return None
+    if not isinstance(payload, dict) or payload.get("format") != CACHE_FORMAT:
+        return None
+    return payload
+
+
+def _revalidate(sources: Sequence[Path], stamps: List[SourceStamp]) -> Optional[List[SourceStamp]]:
+    """Актуальные отметки исходников или None, если содержимое изменилось."""
+    if len(stamps) != len(sources):
+        return None
+    fresh: List[SourceStamp] = []
+    for path, old in zip(sources, stamps):
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        if old.name != path.name:
+            return None
+        if stat.st_mtime_ns == old.mtime_ns and stat.st_size == old.size:
+            fresh.append(old)
+            continue
+        if stat.st_size != old.size or file_digest(path) != old.digest:
+            return None
+        fresh.append(SourceStamp(old.name, stat.st_mtime_ns, stat.st_size, old.digest))
+    return fresh
+
+
+def _write_cache(cache_path: Path, stamps: List[SourceStamp], value: Any) -> None:
+    payload = {"format": CACHE_FORMAT, "stamps": stamps, "value": value}
+    try:
+        descriptor, temp_name = tempfile.mkstemp(prefix=cache_path.name, dir=cache_path.parent)
+        try:
+            with os.fdopen(descriptor, "wb") as handle:
+                pickle.dump(payload, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_name, cache_path)
+        except BaseException:
+            os.unlink(temp_name)
+            raise
+    except OSError:
+        pass
@@ -1,10 +1,43 @@
 """
 Описание миссий для AI Teacher Quest.
+
+Миссии и ключевые слова правил лежат в ``missions.json`` и ``rules.json``
+— методисты правят их без пересборки игры. Если рядом лежит файл с тем же
+именем и расширением ``.toml``, читается он.
+Скомпилированный каталог кэшируется в ``catalog.cache`` рядом с ними.
+Каталог с файлами данных можно переопределить переменной окружения
+``AI_TEACHER_DATA_DIR``.
 """
 from __future__ import annotations
 
+import os
+import sys
+import textwrap
 from dataclasses import dataclass, field
-from typing import Dict, List
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Mapping, Tuple
+
+from ai.matcher import KeywordMatcher
+from data.catalog import load_compiled, read_data_file
+
+DATA_DIR = Path(os.environ.get("AI_TEACHER_DATA_DIR") or Path(__file__).resolve().parent)
+# Сколько шаблонов ответа берёт ``build_profile``.
+RESPONSE_TEMPLATE_COUNT = 3
+# Группы, которые ``build_profile`` собирает сам; в rules.json их задавать нельзя.
+MISSION_GROUP = "mission"
+DIGITS_GROUP = "digits"
+
+
+def data_file(name: str) -> Path:
+    """Файл данных ``name`` из ``DATA_DIR``: ``.toml``, если он есть, иначе ``.json``."""
+    toml_path = DATA_DIR / f"{name}.toml"
+    return toml_path if toml_path.exists() else DATA_DIR / f"{name}.json"
+
+
+RULES_PATH = data_file("rules")
+MISSIONS_PATH = data_file("missions")
+CATALOG_CACHE_PATH = DATA_DIR / "catalog.cache"
 
 
 @dataclass
@@ -21,88 +54,122 @@ class Mission:
     tips: List[str] = field(default_factory=list)
 
 
-MISSIONS: List[Mission] = [
-    Mission(
-        id="test_design",
-        title="Экспресс-тест по русскому языку",
-        summary="Учителю русского языка нужен мини-тест по теме урока.",
-        scenario="Вы — преподаватель русского языка. Нужно за несколько минут подготовить тест по теме «Правописание безударных гласных в корне» для 6 класса.",
-        difficulty=1,
-        success_threshold=8,
-        requires_ethics=False,
-        context_keywords=["русский", "орфограф", "6 класс", "правопис"],
-        response_templates=[
-            "Попросите ИИ составить 5 вопросов: три с выбором ответа и два на вставку пропущенных букв.",
-            "Добавьте задание, где ученики должны объяснить правило или привести пример.",
-            "В конце попросите перечислить правильные ответы и краткую шкалу оценивания.",
-        ],
-        tips=[
-            "Укажите тему, класс и желаемый формат вопросов.",
-            "Определите количество заданий и необходимость ключей ответов.",
-        ],
-    ),
-    Mission(
-        id="simplify_ml",
-        title="Проверить и оценить работы",
-        summary="Нужно выстроить инструкцию ИИ для проверки работ и выставления баллов.",
-        scenario="Вы проверяете письменные работы студентов. Требуется промпт, который поможет ИИ анализировать тексты по критериям (логика, аргументация, грамотность) и предлагать балл с комментариями.",
-        difficulty=2,
-        success_threshold=9,
-        requires_ethics=True,
-        context_keywords=["критерий", "оцен", "эссе", "рубрика"],
-        response_templates=[
-            "Опишите структуру проверки: сначала соответствие теме, затем аргументация и стиль.",
-            "Попросите ИИ сформировать таблицу с баллами по каждому критерию и общий итог.",
-            "Добавьте требование упоминать академическую честность и указывать сомнительные места.",
-        ],
-        tips=[
-            "Перечислите критерии и шкалу оценивания.",
-            "Уточните, какой формат ответа хотите (таблица, список рекомендаций).",
-        ],
-    ),
-    Mission(
-        id="detect_hallucinations",
-        title="Практические работы на учебный год",
-        summary="Нужно спланировать серию практических заданий на весь год.",
-        scenario="Вы — методист. Требуется составить список практических работ по информатике на весь учебный год: по одной работе на четверть, с целями, оборудованием и критериями защиты.",
-        difficulty=3,
-        success_threshold=10,
-        requires_ethics=False,
-        context_keywords=["практическ", "четверть", "план", "календар"],
-        response_templates=[
-            "Попросите ИИ распределить темы практических работ по четвертям (осень, зима, весна, итог).",
-            "Добавьте требование перечислить материалы/ПО и ожидаемые навыки.",
-            "Попросите кратко описать формат защиты работы и чек-лист для оценивания.",
-        ],
-        tips=[
-            "Укажите дисциплину, количество работ и необходимость привязки к четвертям.",
-            "Попросите добавить критерии оценки и ресурсы.",
-        ],
-    ),
-    Mission(
-        id="creative_tasks",
-        title="Задания против списывания",
-        summary="Придумать задания, которые трудно списать через ИИ.",
-        scenario="Вы планируете домашнюю работу и хотите задания, которые сложнее решить, просто задав вопрос ИИ. Нужно сформулировать требования к таким заданиям.",
-        difficulty=2,
-        success_threshold=9,
-        requires_ethics=True,
-        context_keywords=["проект", "практик", "личный опыт", "рефлекс"],
-        response_templates=[
-            "Попросите предложить задания, требующие личного опыта или наблюдений студентов.",
-            "Сформулируйте критерии оригинальности и способы проверки результата.",
-            "Добавьте напоминание о важности самостоятельной работы.",
-        ],
-        tips=[
-            "Уточните дисциплину или тему, чтобы ИИ дал релевантные примеры.",
-            "Добавьте ограничения по формату ответа (например, список идей).",
-        ],
-    ),
-]
+@dataclass(frozen=True)
+class MissionProfile:
+    """Скомпилированные правила оценки миссии — не зависят от промпта."""
+
+    mission_id: str
+    matcher: KeywordMatcher
+    requires_ethics: bool
+    base_response: str
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """Разобранные файлы данных вместе со скомпилированными профилями миссий."""
+
+    ruleset_version: int
+    keyword_groups: Dict[str, List[str]]
+    missions: List[Mission]
+    profiles: Dict[str, MissionProfile]
+
+
+def parse_rules(path: Path) -> Tuple[int, Dict[str, List[str]]]:
+    data = read_data_file(path)
+    try:
+        version = int(data["version"])
+        groups = {str(name): [str(word) for word in words] for name, words in data["groups"].items()}
+    except (KeyError, TypeError, ValueError, AttributeError) as exc:
+        raise ValueError(f"{path}: ожидаются поля version и groups") from exc
+    for reserved in (MISSION_GROUP, DIGITS_GROUP):
+        if reserved in groups:
+            raise ValueError(f'{path}: имя группы "{reserved}" зарезервировано и заполняется автоматически')
+    return version, groups
 
+
+def parse_missions(path: Path) -> List[Mission]:
+    data = read_data_file(path)
+    missions = []
+    for index, item in enumerate(data.get("missions", [])):
+        try:
+            mission = Mission(**item)
+        except TypeError as exc:
+            raise ValueError(f"{path}: миссия №{index + 1}: {exc}") from exc
+        if len(mission.response_templates) < RESPONSE_TEMPLATE_COUNT:
+            raise ValueError(
+                f"{path}: миссия №{index + 1}: нужно не меньше {RESPONSE_TEMPLATE_COUNT} шаблонов ответа"
+                " в response_templates"
+            )
+        missions.append(mission)
+    if not missions:
+        raise ValueError(f"{path}: список миссий пуст")
+    return missions
+
+
+def compile_catalog(rules_path: Path = RULES_PATH, missions_path: Path = MISSIONS_PATH) -> Catalog:
+    version, groups = parse_rules(rules_path)
+    missions = parse_missions(missions_path)
+    return Catalog(
+        ruleset_version=version,
+        keyword_groups=groups,
+        missions=missions,
+        profiles={mission.id: build_profile(mission, groups) for mission in missions},
+    )
+
+
+def load_catalog(
+    rules_path: Path = RULES_PATH,
+    missions_path: Path = MISSIONS_PATH,
+    cache_path: Path = CATALOG_CACHE_PATH,
+) -> Catalog:
+    """Каталог из кэша, если файлы данных не менялись, иначе — компиляция заново."""
+    return load_compiled(
+        [rules_path, missions_path],
+        lambda: compile_catalog(rules_path, missions_path),
+        cache_path,
+    )
+
+
+@lru_cache(maxsize=1)
+def unicode_digits() -> Tuple[str, ...]:
+    """Все символы, для которых ``str.isdigit()`` верно: не только 0–9, но и «１», «²», «٣»."""
+    return tuple(char for char in map(chr, range(sys.maxunicode + 1)) if char.isdigit())
+
+
+def build_profile(mission: Mission, keyword_groups: Mapping[str, List[str]]) -> MissionProfile:
+    base_response = textwrap.dedent(
+        f"""
+        Принято! Вот предложение для ситуации «{mission.title}»:
+
+        1. {mission.response_templates[0]}
+        2. {mission.response_templates[1]}
+        3. {mission.response_templates[2]}
+        """
+    ).strip()
+    return MissionProfile(
+        mission_id=mission.id,
+        matcher=KeywordMatcher(
+            {**keyword_groups, DIGITS_GROUP: unicode_digits(), MISSION_GROUP: mission.context_keywords}
+        ),
+        requires_ethics=mission.requires_ethics,
+        base_response=base_response,
+    )
+
+
+CATALOG = load_catalog()
+MISSIONS: List[Mission] = CATALOG.missions
 MISSIONS_BY_ID: Dict[str, Mission] = {mission.id: mission for mission in MISSIONS}
+PROFILES_BY_ID: Dict[str, MissionProfile] = CATALOG.profiles
 
 
 def get_mission(mission_id: str) -> Mission:
     return MISSIONS_BY_ID[mission_id]
 
+
+def get_profile(mission: Mission) -> MissionProfile:
+    """Профиль миссии из каталога; для миссий вне каталога собирается на месте."""
+    profile = PROFILES_BY_ID.get(mission.id)
+    if profile is None or MISSIONS_BY_ID.get(mission.id) is not mission:
+        profile = build_profile(mission, CATALOG.keyword_groups)
+    return profile
+
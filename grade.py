@@ -0,0 +1,250 @@
+"""
+Пакетная оценка промптов без запуска игры.
+
+Читает JSONL-поток записей ``{"mission_id": ..., "prompt": ...}``, оценивает
+их в пуле процессов и пишет результаты в JSONL в исходном порядке.
+pygame при этом не импортируется.
+
+С ``--dedup`` почти одинаковые промпты одной миссии собираются в кластеры
+(MinHash + LSH), и оценивается только первый промпт кластера — его
+представитель. У остальных в выводе вместо баллов стоят номер кластера,
+``duplicate_of`` (``id`` представителя или номер его строки) и оценка
+сходства, чтобы результат представителя можно было разнести по кластеру.
+С ``--dedup-index`` индекс кластеров хранится в SQLite, а не в памяти;
+файл очищается в начале каждого прогона.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Deque, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from ai.cache import EvaluationCache
+from ai.dedup import ClusterMatch, LSHIndex, NearDuplicateClusterer, SqliteLSHIndex
+from ai.engine import AIEngine
+from data.missions import MISSIONS_BY_ID
+
+_engine: Optional[AIEngine] = None
+
+# Строка входа и её кластер (None, если дедупликация выключена).
+Item = Tuple[str, Optional[ClusterMatch]]
+
+
+def _init_worker(cache_size: int) -> None:
+    global _engine
+    _engine = AIEngine(cache=EvaluationCache(cache_size) if cache_size else None)
+
+
+def grade_record(engine: AIEngine, line: str) -> dict:
+    try:
+        record = json.loads(line)
+    except ValueError as exc:
+        return {"error": f"Некорректная запись: {exc}"}
+    return grade_payload(engine, record)
+
+
+def grade_payload(engine: AIEngine, record: dict) -> dict:
+    """Оценивает уже разобранную запись ``{"mission_id": ..., "prompt": ...}``."""
+    try:
+        mission = MISSIONS_BY_ID[record["mission_id"]]
+        prompt = record["prompt"]
+    except TypeError as exc:
+        return {"error": f"Некорректная запись: {exc}"}
+    except KeyError as exc:
+        return {"error": f"Неизвестная миссия или нет поля: {exc}"}
+    if not isinstance(prompt, str):
+        return {"error": "Поле prompt должно быть строкой"}
+
+    evaluation = engine.evaluate_prompt(prompt, mission)
+    result = {
+        "mission_id": mission.id,
+        "total_score": evaluation.total_score,
+        "total_stars": evaluation.total_stars,
+        "scores": {cid: score.stars for cid, score in evaluation.scores.items()},
+        "issues": evaluation.issues,
+        "ai_answer": evaluation.ai_answer,
+    }
+    if "id" in record:
+        result["id"] = record["id"]
+    return result
+
+
+def duplicate_record(line: str, match: ClusterMatch) -> dict:
+    record = json.loads(line)
+    result = {
+        "mission_id": record["mission_id"],
+        "cluster": match.cluster,
+        "duplicate_of": match.representative_label,
+        "similarity": round(match.similarity, 3),
+    }
+    if "id" in record:
+        result["id"] = record["id"]
+    return result
+
+
+def grade_chunk(items: List[Item]) -> List[str]:
+    """Оценивает кусок входного потока в процессе-исполнителе."""
+    engine = _engine or AIEngine()
+    results = []
+    for line, match in items:
+        if match is not None and not match.representative:
+            result = duplicate_record(line, match)
+        else:
+            result = grade_record(engine, line)
+            if match is not None and "error" not in result:
+                result["cluster"] = match.cluster
+        results.append(json.dumps(result, ensure_ascii=False))
+    return results
+
+
+def grade_payloads(records: List[dict]) -> List[dict]:
+    """Оценивает список записей в процессе-исполнителе (для сервиса оценки)."""
+    engine = _engine or AIEngine()
+    return [grade_payload(engine, record) for record in records]
+
+
+def iter_items(stream: TextIO, clusterer: Optional[NearDuplicateClusterer]) -> Iterator[Item]:
+    """Непустые строки входа; при дедупликации каждой назначается кластер."""
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        number += 1
+        if clusterer is None:
+            yield line, None
+            continue
+        try:
+            record = json.loads(line)
+            namespace, prompt = record["mission_id"], record["prompt"]
+        except (ValueError, TypeError, KeyError):
+            # Ошибку в записи сообщит grade_record.
+            yield line, None
+            continue
+        if not isinstance(namespace, str) or namespace not in MISSIONS_BY_ID or not isinstance(prompt, str):
+            yield line, None
+            continue
+        label = record.get("id", number)
+        yield line, clusterer.assign(namespace, prompt, str(label))
+
+
+def iter_chunks(items: Iterable[Item], chunk_size: int) -> Iterator[List[Item]]:
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def grade_stream(
+    source: TextIO,
+    target: TextIO,
+    *,
+    workers: int,
+    chunk_size: int,
+    max_pending: int,
+    cache_size: int = 0,
+    clusterer: Optional[NearDuplicateClusterer] = None,
+) -> int:
+    """Раздаёт куски по процессам и пишет ответы по порядку.
+
+    В памяти одновременно находится не больше ``max_pending`` кусков, поэтому
+    потребление памяти не зависит от размера входного файла. Кластеры
+    назначаются здесь же, в основном процессе, по мере чтения входа.
+    """
+    graded = 0
+    pending: Deque[Future] = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cache_size,)) as pool:
+        for chunk in iter_chunks(iter_items(source, clusterer), chunk_size):
+            pending.append(pool.submit(grade_chunk, chunk))
+            if len(pending) >= max_pending:
+                graded += _write_results(target, pending.popleft().result())
+        while pending:
+            graded += _write_results(target, pending.popleft().result())
+    return graded
+
+
+def _write_results(target: TextIO, lines: Iterable[str]) -> int:
+    count = 0
+    for line in lines:
+        target.write(line)
+        target.write("\n")
+        count += 1
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Пакетная оценка промптов AI Teacher Quest (JSONL → JSONL).")
+    parser.add_argument("input", nargs="?", default="-", help="Входной JSONL-файл или «-» для stdin.")
+    parser.add_argument("-o", "--output", default="-", help="Выходной JSONL-файл или «-» для stdout.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Количество процессов-исполнителей.",
+    )
+    parser.add_argument("--chunk-size", type=int, default=512, help="Сколько записей отправлять процессу за раз.")
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=0,
+        help="Сколько кусков может ждать записи (по умолчанию — вдвое больше числа процессов).",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=0,
+        help="Размер LRU-кэша оценок в каждом процессе (0 — без кэша).",
+    )
+    parser.add_argument(
+        "--dedup",
+        type=float,
+        default=0.0,
+        metavar="THRESHOLD",
+        help="Оценивать один промпт на кластер почти одинаковых (порог сходства, например 0.8).",
+    )
+    parser.add_argument(
+        "--dedup-index",
+        default="",
+        help="Файл SQLite для индекса кластеров; очищается при запуске (по умолчанию индекс в памяти).",
+    )
+    args = parser.parse_args()
+    max_pending = args.max_pending or args.workers * 2
+    if not 0 <= args.dedup <= 1:
+        parser.error("--dedup: порог сходства должен быть от 0 до 1")
+    clusterer = None
+    if args.dedup:
+        index = SqliteLSHIndex(args.dedup_index) if args.dedup_index else LSHIndex()
+        clusterer = NearDuplicateClusterer(args.dedup, index=index)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        graded = grade_stream(
+            source,
+            target,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            max_pending=max_pending,
+            cache_size=args.cache_size,
+            clusterer=clusterer,
+        )
+    finally:
+        if clusterer is not None:
+            clusterer.close()
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+    print(f"[grade] Оценено записей: {graded}", file=sys.stderr)
+    if clusterer is not None:
+        print(f"[grade] Кластеров почти одинаковых промптов: {len(clusterer.index)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,14 @@ from __future__ import annotations
 
 import pygame
 
+from ai.backends import HTTPBackend
+from ai.cache import EvaluationCache
 from ai.engine import AIEngine
+from core.attempts import AttemptStore
 from core.context import GameContext
+from core.pacing import FramePacer
 from core.screen_manager import ScreenManager
-from core.settings import WINDOW
+from core.settings import ATTEMPTS_PATH, EVALUATION_CACHE_SIZE, LLM, WINDOW
 from ui.fonts import FontManager
 
 
@@ -28,14 +32,27 @@ def run_game() -> None:
         return surface
 
     surface = set_display(WINDOW.fullscreen)
-    clock = pygame.time.Clock()
+    pacer = FramePacer(WINDOW.fps, WINDOW.idle_fps)
 
     fonts = FontManager()
-    ai_engine = AIEngine()
+    backend = None
+    if LLM.url:
+        backend = HTTPBackend(LLM.url, model=LLM.model, timeout=LLM.timeout, pool_size=LLM.pool_size)
+    ai_engine = AIEngine(
+        cache=EvaluationCache(EVALUATION_CACHE_SIZE) if EVALUATION_CACHE_SIZE else None,
+        backend=backend,
+    )
+    attempts = None
+    if ATTEMPTS_PATH:
+        try:
+            attempts = AttemptStore(ATTEMPTS_PATH)
+        except OSError as exc:
+            print(f"[game] Журнал попыток недоступен: {exc}")
     context = GameContext(
         surface=surface,
         fonts=fonts,
         ai_engine=ai_engine,
+        attempts=attempts,
         fullscreen=WINDOW.fullscreen,
         screen_size=surface.get_size(),
     )
@@ -46,8 +63,8 @@ def run_game() -> None:
 
     running = True
     while running:
-        dt = clock.tick(WINDOW.fps) / 1000
-        for event in pygame.event.get():
+        dt, events = pacer.next_frame(manager.is_animating())
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
             else:
@@ -65,9 +82,17 @@ def run_game() -> None:
                 manager.handle_resize(event.size)
 
         manager.update(dt)
-        manager.draw()
-        pygame.display.flip()
+        dirty = manager.draw()
+        if dirty is None:
+            pygame.display.flip()
+        elif dirty:
+            pygame.display.update(dirty)
 
+    print(f"[game] Время работы — {pacer.report()}")
+    context.jobs.shutdown()
+    ai_engine.backend.close()
+    if attempts is not None:
+        attempts.close()
     pygame.quit()
 
 
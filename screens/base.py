@@ -3,7 +3,7 @@
 """
 from __future__ import annotations
 
-from typing import Optional, TYPE_CHECKING
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
 
 import pygame
 
@@ -14,13 +14,21 @@ if TYPE_CHECKING:
 
 
 class BaseScreen:
-    """Единый интерфейс для экранов."""
+    """Единый интерфейс для экранов.
+
+    Экран сообщает менеджеру, что изменилось с прошлого кадра: виджеты из
+    ``widgets`` помечают себя ``dirty``, остальное экран отмечает через
+    ``invalidate`` или ``watch``.
+    """
 
     def __init__(self, manager: "ScreenManager", context: GameContext) -> None:  # noqa: F821
         self.manager = manager
         self.context = context
         self.widgets = []
         self.back_button: Optional["Button"] = None  # noqa: F821
+        self._dirty: List[pygame.Rect] = []
+        self._dirty_all = True
+        self._watched: Dict[str, Tuple[Any, pygame.Rect]] = {}
         self._init_layout()
 
     def _init_layout(self) -> None:
@@ -39,6 +47,48 @@ class BaseScreen:
         if self.back_button:
             self.back_button.draw(surface)
 
+    def invalidate(self, rect: Optional[pygame.Rect] = None) -> None:
+        """Отмечает область для перерисовки; без аргумента — весь экран."""
+        if rect is None:
+            self._dirty_all = True
+        else:
+            self._dirty.append(pygame.Rect(rect))
+
+    def watch(self, key: str, state: Any, rect: pygame.Rect) -> None:
+        """Перерисовывает ``rect`` (и прошлую область под тем же ключом), когда меняется ``state``."""
+        previous = self._watched.get(key)
+        if previous is not None and previous[0] == state:
+            return
+        if previous is not None:
+            self.invalidate(previous[1])
+        self.invalidate(rect)
+        self._watched[key] = (state, pygame.Rect(rect))
+
+    def is_animating(self) -> bool:
+        """Идёт ли анимация, которой нужны кадры с полной частотой."""
+        widgets = list(self.widgets)
+        if self.back_button:
+            widgets.append(self.back_button)
+        return any(widget.animating for widget in widgets)
+
+    def take_dirty(self) -> Optional[List[pygame.Rect]]:
+        """Области, изменившиеся с прошлого вызова; ``None`` — весь экран."""
+        widgets = list(self.widgets)
+        if self.back_button:
+            widgets.append(self.back_button)
+        for widget in widgets:
+            if widget.dirty:
+                widget.dirty = False
+                self._dirty.append(widget.bounds)
+        rects, self._dirty = self._dirty, []
+        if self._dirty_all:
+            self._dirty_all = False
+            return None
+        return rects
+
     def on_resize(self, size: tuple[int, int]) -> None:
         """Экран может переопределить реакцию на изменение размера."""
 
+    def on_exit(self) -> None:
+        """Вызывается, когда менеджер заменяет экран другим."""
+
@@ -39,6 +39,7 @@ class MenuScreen(BaseScreen):
             Button(button_rects[i], labels[i], fonts, on_click=actions[i], accent=(i == 0))
             for i in range(4)
         ]
+        self.widgets = list(self.buttons)
         self.title_animation = 0.0
         self.pulse = 0.0
 
@@ -56,12 +57,12 @@ class MenuScreen(BaseScreen):
             btn.update(dt, mouse_pos)
         self.title_animation += dt
         self.pulse = 0.5 + 0.5 * math.sin(self.title_animation * 1.5)
+        _, title_rect, _, subtitle_rect = self._title_layout(self.context.surface.get_size())
+        self.watch("title", title_rect.topleft, title_rect.union(subtitle_rect))
 
-    def draw(self, surface: pygame.Surface) -> None:
-        super().draw(surface)
+    def _title_layout(self, size: tuple[int, int]):
         fonts = self.context.fonts
-        width, height = surface.get_size()
-
+        width, height = size
         title = fonts.render("AI Teacher Quest", 64, COLORS.text_primary, bold=True)
         subtitle = fonts.render(
             "Интерактивное обучение работе с промптами для преподавателей",
@@ -69,8 +70,13 @@ class MenuScreen(BaseScreen):
             COLORS.text_secondary,
         )
         title_rect = title.get_rect(center=(width // 2, int(height * 0.2) + int(self.pulse * 6)))
+        return title, title_rect, subtitle, subtitle.get_rect(center=(width // 2, title_rect.bottom + 40))
+
+    def draw(self, surface: pygame.Surface) -> None:
+        super().draw(surface)
+        title, title_rect, subtitle, subtitle_rect = self._title_layout(surface.get_size())
         surface.blit(title, title_rect)
-        surface.blit(subtitle, subtitle.get_rect(center=(width // 2, title_rect.bottom + 40)))
+        surface.blit(subtitle, subtitle_rect)
 
         for btn in self.buttons:
             btn.draw(surface)
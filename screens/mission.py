@@ -3,16 +3,27 @@
 """
 from __future__ import annotations
 
-import textwrap
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Union
 
 import pygame
 
-from ai.engine import AIEngine, EvaluationResult
+from ai.engine import AIEngine, CriterionScore, EvaluationResult
+from core.jobs import StreamJob
 from core.settings import COLORS, CRITERIA_META, GameTexts, MAX_PROMPT_LENGTH, MAX_PROMPT_HISTORY
 from data.missions import Mission, get_mission
 from screens.base import BaseScreen
-from ui.components import Button, StarMeter, TextInput, Tooltip, TooltipManager, draw_rounded_rect, draw_shadow
+from ui.components import (
+    Button,
+    StarMeter,
+    StreamingWrap,
+    TextBlock,
+    TextInput,
+    Tooltip,
+    TooltipManager,
+    draw_rounded_rect,
+    draw_shadow,
+    shadow_bounds,
+)
 
 
 class MissionScreen(BaseScreen):
@@ -22,6 +33,15 @@ class MissionScreen(BaseScreen):
         self.mission: Mission = get_mission(mission_id)
         self.ai_engine: AIEngine = context.ai_engine
         self.evaluation: Optional[EvaluationResult] = None
+        self.live_scorer = self.ai_engine.live_scorer(self.mission)
+        # Оценки набираемого текста; None — показываем последнюю отправленную оценку.
+        self.live_scores: Optional[Dict[str, CriterionScore]] = None
+        # Оценки, по которым построена подсветка в поле ввода.
+        self._highlighted_scores: Optional[Dict[str, CriterionScore]] = None
+        self._pending_job: Optional[StreamJob] = None
+        # Результат, ответ к которому ещё приходит, и уже полученные куски ответа.
+        self._streaming: Optional[EvaluationResult] = None
+        self._streamed_parts: List[str] = []
         self.status_message = ""
         self.status_color = COLORS.text_secondary
         self.tooltip_manager = TooltipManager(context.fonts)
@@ -41,6 +61,7 @@ class MissionScreen(BaseScreen):
             fonts,
             placeholder="Сформулируйте промпт для ИИ...",
             max_length=MAX_PROMPT_LENGTH,
+            on_edit=self.live_scorer.replace,
         )
         self.retry_button = Button(
             pygame.Rect(0, 0, 10, 10),
@@ -63,7 +84,12 @@ class MissionScreen(BaseScreen):
         )
         self.ai_panel_rect = pygame.Rect(0, 0, 10, 10)
         self.answer_wrap_width = 36
+        self.answer_wrap = StreamingWrap(self.answer_wrap_width)
         self.total_star_meter = StarMeter(pygame.Rect(0, 0, 10, 10), fonts)
+        self.scenario_text = TextBlock(fonts, 22, COLORS.text_secondary, 10, text=self.mission.scenario, line_spacing=6)
+        self.criteria_feedback = {
+            cid: TextBlock(fonts, 16, COLORS.text_secondary, 10, line_spacing=2) for cid in CRITERIA_META
+        }
         self.criteria_side = False
         self.eval_column_x = 0
         self.eval_column_top = 0
@@ -76,6 +102,14 @@ class MissionScreen(BaseScreen):
         self.history_nav_y = 0
         self._recalculate_layout()
         self.ai_response_lines: List[str] = []
+        self.widgets = [
+            self.prompt_input,
+            self.retry_button,
+            self.send_button,
+            self.finish_button,
+            self.total_star_meter,
+            self.tooltip_manager,
+        ]
 
     def _recalculate_layout(self) -> None:
         width, height = self.context.surface.get_size()
@@ -92,6 +126,7 @@ class MissionScreen(BaseScreen):
         button_spacing = 18
 
         self.scenario_rect.update(start_x, scenario_top, left_width, scenario_height)
+        self.scenario_text.width = left_width - 40
         prompt_rect = pygame.Rect(start_x, self.scenario_rect.bottom + 30, left_width, prompt_height)
         self.prompt_input.rect = prompt_rect
 
@@ -159,6 +194,7 @@ class MissionScreen(BaseScreen):
                 rect_height = 100
             rect = pygame.Rect(start_x, y, width, rect_height)
             self.criteria_rects.append(rect)
+            self.criteria_feedback[cid].width = width - 24
             y += rect_height + 12
         self.tooltips = [
             Tooltip(CRITERIA_META[cid]["tooltip"], rect) for cid, rect in zip(CRITERIA_META, self.criteria_rects)
@@ -175,17 +211,79 @@ class MissionScreen(BaseScreen):
             self.status_color = COLORS.warning
             return
 
-        evaluation = self.ai_engine.evaluate_prompt(text, self.mission)
-        self._append_history(evaluation)
+        # Новая отправка вытесняет предыдущую, ещё не завершённую.
+        self._cancel_pending()
+        self._pending_job = self.context.jobs.submit_stream(self._evaluation_stream, text)
+        self.status_message = "ИИ анализирует промпт..."
+        self.status_color = COLORS.text_secondary
+
+    def _evaluation_stream(self, text: str) -> Iterator[Union[EvaluationResult, str]]:
+        """Выполняется в пуле: сначала оценка, затем куски ответа ИИ."""
+        stream = self.ai_engine.evaluate_stream(text, self.mission)
+        yield stream.result
+        yield from stream
+
+    def _collect_evaluation(self) -> None:
+        job = self._pending_job
+        if job is None:
+            return
+        for item in job.drain():
+            if isinstance(item, EvaluationResult):
+                self._streaming = item
+                self._streamed_parts = []
+                self._append_history(item)
+                self._record_attempt(item)
+                self.status_message = "ИИ отвечает..."
+            else:
+                self._append_answer_chunk(item)
+        if not job.done():
+            return
+        failed = job.future.exception() is not None
+        self._cancel_pending()
+        if failed:
+            self.status_message = "Не удалось оценить промпт, попробуйте ещё раз."
+            self.status_color = COLORS.warning
+            return
         self.status_message = "Промпт оценён!"
         self.status_color = COLORS.accent_secondary
 
+    def _record_attempt(self, evaluation: EvaluationResult) -> None:
+        if self.context.attempts is None:
+            return
+        try:
+            self.context.attempts.record(self.mission.id, evaluation)
+        except (OSError, ValueError):
+            # Журнал нужен для аналитики, игру из-за него не прерываем.
+            self.context.attempts = None
+
+    def _append_answer_chunk(self, chunk: str) -> None:
+        self._streamed_parts.append(chunk)
+        if self.evaluation is self._streaming:
+            self.answer_wrap.feed(chunk)
+            self.ai_response_lines = self.answer_wrap.lines
+
+    def _cancel_pending(self) -> None:
+        self.context.jobs.cancel(self._pending_job)
+        self._pending_job = None
+        if self._streaming is not None and not self._streaming.ai_answer:
+            # В истории остаётся та часть ответа, что успела прийти.
+            self._streaming.ai_answer = "".join(self._streamed_parts)
+        self._streaming = None
+
+    def on_exit(self) -> None:
+        self._cancel_pending()
+
     def _reset_prompt(self) -> None:
         self.prompt_input.clear()
+        self._refresh_live_scores()
         self.status_message = GameTexts.RETRY_HINT
         self.status_color = COLORS.text_secondary
 
     def _complete_mission(self) -> None:
+        if self._pending_job is not None:
+            self.status_message = "Дождитесь оценки промпта."
+            self.status_color = COLORS.warning
+            return
         if not self.evaluation:
             self.status_message = "Сначала отправьте промпт."
             self.status_color = COLORS.warning
@@ -211,6 +309,8 @@ class MissionScreen(BaseScreen):
         submitted = self.prompt_input.handle_event(event)
         if submitted:
             self._submit_prompt()
+        elif event.type == pygame.KEYDOWN and self.prompt_input.active:
+            self._refresh_live_scores()
         self.send_button.handle_event(event)
         self.retry_button.handle_event(event)
         self.finish_button.handle_event(event)
@@ -222,12 +322,51 @@ class MissionScreen(BaseScreen):
 
     def update(self, dt: float) -> None:
         super().update(dt)
+        self._collect_evaluation()
         mouse_pos = pygame.mouse.get_pos()
         self.prompt_input.update(dt)
         self.send_button.update(dt, mouse_pos)
         self.retry_button.update(dt, mouse_pos)
         self.finish_button.update(dt, mouse_pos)
         self.tooltip_manager.update(mouse_pos, self.tooltips)
+        self._watch_panels()
+
+    def is_animating(self) -> bool:
+        # Пока идёт оценка, результат и куски ответа забираются каждый кадр.
+        return self._pending_job is not None or super().is_animating()
+
+    def _watch_panels(self) -> None:
+        """Отмечает для перерисовки панели, содержимое которых поменялось."""
+        width = self.context.surface.get_width()
+        x, y = self.status_position
+        self.watch("status", (self.status_message, self.status_color), pygame.Rect(x, y, width - x, 32))
+        self.watch("answer", (self.ai_response_lines, self.history_index, len(self.history)), self._answer_bounds())
+        scores = self._displayed_scores()
+        self.watch("criteria", scores, self._criteria_bounds(scores))
+
+    def _answer_bounds(self) -> pygame.Rect:
+        panel = self.ai_panel_rect
+        line_height = self.context.fonts.get(20).get_height() + 4
+        # Строки ответа переносятся по числу символов и могут выйти за панель.
+        text = pygame.Rect(
+            panel.x, panel.y + 60, self.context.surface.get_width() - panel.x, len(self.ai_response_lines) * line_height
+        )
+        history = pygame.Rect(panel.x, self.history_nav_y - 32, panel.width, 44)
+        return shadow_bounds(panel, 5).unionall([text, history])
+
+    def _criteria_bounds(self, scores: Optional[Dict[str, CriterionScore]]) -> pygame.Rect:
+        rects = [shadow_bounds(rect, 3) for rect in self.criteria_rects]
+        if scores:
+            for cid, rect in zip(CRITERIA_META, self.criteria_rects):
+                feedback = self.criteria_feedback[cid]
+                feedback.set_text(scores[cid].feedback)
+                rects.append(feedback.bounds((rect.x + 12, rect.y + 40)))
+        return rects[0].unionall(rects[1:])
+
+    def _displayed_scores(self) -> Optional[Dict[str, CriterionScore]]:
+        if self.live_scores is None and self.evaluation:
+            return self.evaluation.scores
+        return self.live_scores
 
     def draw(self, surface: pygame.Surface) -> None:
         super().draw(surface)
@@ -250,14 +389,8 @@ class MissionScreen(BaseScreen):
         draw_shadow(surface, card, blur=5, alpha=70)
         draw_rounded_rect(surface, COLORS.surface, card, radius=20)
         title = fonts.render(self.mission.title, 32, COLORS.text_primary, bold=True)
-        width_chars = max(42, self.scenario_rect.width // 14)
-        scenario_lines = self._wrap_text(self.mission.scenario, width_chars)
         surface.blit(title, (card.x + 20, card.y + 20))
-        y = card.y + 70
-        for line in scenario_lines:
-            label = fonts.render(line, 22, COLORS.text_secondary)
-            surface.blit(label, (card.x + 20, y))
-            y += label.get_height() + 6
+        self.scenario_text.draw(surface, (card.x + 20, card.y + 70))
 
     def _draw_ai_response(self, surface: pygame.Surface, fonts) -> None:
         panel = self.ai_panel_rect
@@ -278,27 +411,32 @@ class MissionScreen(BaseScreen):
         self._draw_history_nav(surface)
 
     def _draw_criteria(self, surface: pygame.Surface, fonts) -> None:
+        scores = self._displayed_scores()
         for (cid, meta), rect in zip(CRITERIA_META.items(), self.criteria_rects):
             draw_shadow(surface, rect, blur=3, alpha=40)
             draw_rounded_rect(surface, COLORS.surface, rect, radius=14)
             title = fonts.render(meta["title"], 22, COLORS.text_primary)
             surface.blit(title, (rect.x + 12, rect.y + 12))
             score_text = "-"
-            if self.evaluation:
-                score = self.evaluation.scores[cid]
+            if scores:
+                score = scores[cid]
                 score_text = f"{score.stars}/3"
-                wrap_width = max(24, rect.width // 14)
-                feedback_lines = self._wrap_text(score.feedback, wrap_width)
-                feedback_y = rect.y + 40
-                for line in feedback_lines:
-                    feedback = fonts.render(line, 16, COLORS.text_secondary)
-                    surface.blit(feedback, (rect.x + 12, feedback_y))
-                    feedback_y += feedback.get_height() + 2
+                feedback = self.criteria_feedback[cid]
+                feedback.set_text(score.feedback)
+                feedback.draw(surface, (rect.x + 12, rect.y + 40))
+                # Нет ни одного засчитанного ключевого слова — критерий не раскрыт.
+                marker = COLORS.success if score.spans else COLORS.warning
+                pygame.draw.circle(surface, marker, (rect.right - 84, rect.y + 24), 5)
             value = fonts.render(score_text, 20, COLORS.accent_secondary)
             surface.blit(value, (rect.right - 70, rect.y + 12))
 
-    def _wrap_text(self, text: str, width: int) -> List[str]:
-        return textwrap.wrap(text, width)
+    def _refresh_live_scores(self) -> None:
+        # Правки уже переданы LiveScorer через on_edit поля ввода.
+        scores = self.live_scorer.scores()
+        self.live_scores = scores if self.live_scorer.length else None
+        if scores is not self._highlighted_scores:
+            self._highlighted_scores = scores
+            self.prompt_input.set_highlights(span for score in scores.values() for span in score.spans)
 
     def _append_history(self, evaluation: EvaluationResult) -> None:
         self.history.append(evaluation)
@@ -313,15 +451,21 @@ class MissionScreen(BaseScreen):
         index = max(0, min(index, len(self.history) - 1))
         self.history_index = index
         self.evaluation = self.history[index]
+        self.live_scores = None
         self.total_star_meter.set_value(self.evaluation.total_stars)
         self._refresh_current_answer_lines()
 
     def _refresh_current_answer_lines(self) -> None:
         if 0 <= self.history_index < len(self.history):
-            answer = self.history[self.history_index].ai_answer
-            self.ai_response_lines = self._wrap_text(answer, self.answer_wrap_width)
+            result = self.history[self.history_index]
         elif self.evaluation:
-            self.ai_response_lines = self._wrap_text(self.evaluation.ai_answer, self.answer_wrap_width)
+            result = self.evaluation
+        else:
+            return
+        answer = "".join(self._streamed_parts) if result is self._streaming else result.ai_answer
+        self.answer_wrap.reset(self.answer_wrap_width)
+        self.answer_wrap.feed(answer)
+        self.ai_response_lines = self.answer_wrap.lines
 
     def _draw_history_nav(self, surface: pygame.Surface) -> None:
         if len(self.history) <= 1:
@@ -24,6 +24,7 @@ class MissionSelectScreen(BaseScreen):
         )
         self.cards: list[MissionCard] = []
         self._create_cards()
+        self.widgets = list(self.cards)
         self._recalculate_layout()
 
     def _create_cards(self) -> None:
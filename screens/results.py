@@ -7,7 +7,7 @@ import pygame
 
 from core.settings import COLORS
 from screens.base import BaseScreen
-from ui.components import Button, StarMeter, draw_rounded_rect, draw_shadow
+from ui.components import Button, StarMeter, TextBlock, draw_rounded_rect, draw_shadow
 
 
 class ResultsScreen(BaseScreen):
@@ -40,6 +40,24 @@ class ResultsScreen(BaseScreen):
         )
         self.star_meter = StarMeter(pygame.Rect(500, 360, 200, 40), fonts)
         self.star_meter.set_value(self.result["stars"])
+        self.panel = pygame.Rect(200, 120, 840, 360)
+        # Отзыв по каждому критерию начинается с новой строки.
+        self.feedback_text = TextBlock(
+            fonts,
+            20,
+            COLORS.text_secondary,
+            self.panel.width - 40,
+            text="\n".join(self.result["feedback"].values()),
+            line_spacing=6,
+        )
+        self.issues_text = TextBlock(
+            fonts,
+            20,
+            COLORS.text_secondary,
+            self.panel.width - 60,
+            text="\n".join(f"- {issue}" for issue in self.result["issues"]),
+        )
+        self.widgets = [self.retry_button, self.select_button, self.star_meter]
 
     def handle_event(self, event: pygame.event.Event) -> None:
         super().handle_event(event)
@@ -55,7 +73,7 @@ class ResultsScreen(BaseScreen):
     def draw(self, surface: pygame.Surface) -> None:
         super().draw(surface)
         fonts = self.context.fonts
-        panel = pygame.Rect(200, 120, 840, 360)
+        panel = self.panel
         draw_shadow(surface, panel, blur=8, alpha=90)
         draw_rounded_rect(surface, COLORS.surface, panel, radius=24)
 
@@ -69,19 +87,14 @@ class ResultsScreen(BaseScreen):
         self.star_meter.draw(surface)
 
         feedback_y = panel.y + 140
-        for cid, text in self.result["feedback"].items():
-            line = fonts.render(text, 20, COLORS.text_secondary)
-            surface.blit(line, (panel.x + 20, feedback_y))
-            feedback_y += line.get_height() + 6
+        self.feedback_text.draw(surface, (panel.x + 20, feedback_y))
+        if self.result["feedback"]:
+            feedback_y += self.feedback_text.height + 6
 
         if self.result["issues"]:
             issues_title = fonts.render("Обратите внимание:", 22, COLORS.warning)
             surface.blit(issues_title, (panel.x + 20, feedback_y + 10))
-            y = feedback_y + 50
-            for issue in self.result["issues"]:
-                issue_label = fonts.render(f"- {issue}", 20, COLORS.text_secondary)
-                surface.blit(issue_label, (panel.x + 40, y))
-                y += issue_label.get_height() + 4
+            self.issues_text.draw(surface, (panel.x + 40, feedback_y + 50))
 
         self.retry_button.draw(surface)
         self.select_button.draw(surface)
@@ -46,6 +46,7 @@ class SettingsScreen(BaseScreen):
                 initial=True,
             ),
         ]
+        self.widgets = list(self.toggles)
 
     def _handle_fullscreen_toggle(self, enabled: bool) -> None:
         self.context.apply_fullscreen(enabled)
@@ -0,0 +1,386 @@
+"""
+Сервис оценки промптов по HTTP/JSON для интеграции с LMS (без pygame).
+
+    python service.py serve --port 8765 --workers 4
+    python service.py load --url http://127.0.0.1:8765 --concurrency 200 --requests 5000
+
+Эндпоинты:
+    POST /evaluate        {"mission_id": ..., "prompt": ..., "id": ...} → результат оценки
+    POST /evaluate/batch  {"items": [{...}, ...]}                       → {"results": [...]}
+    GET  /health          → {"status": "ok"}
+    GET  /stats           → гистограммы задержек по эндпоинтам и состояние очереди
+
+Оценка выполняется в пуле процессов, цикл событий только принимает и
+отдаёт запросы. Очередь ограничена числом промптов в работе
+(``--queue-size``): сверх него сервис сразу отвечает 429 с Retry-After.
+Пакет больше очереди не поместится в неё никогда, поэтому наибольший
+размер пакета не превышает ``--queue-size``, а такие пакеты получают 413.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from data.missions import MISSIONS
+from grade import _init_worker, grade_payloads
+
+MAX_BODY_BYTES = 1 << 20
+MAX_HEADERS = 100
+IDLE_TIMEOUT = 30.0
+# Верхние границы корзин гистограммы задержек, мс.
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@dataclass
+class LatencyHistogram:
+    """Счётчики по корзинам задержек; перцентили оцениваются по верхней границе корзины."""
+
+    counts: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+    total: int = 0
+    sum_ms: float = 0.0
+    statuses: Dict[int, int] = field(default_factory=dict)
+
+    def record(self, elapsed_ms: float, status: int) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        self.total += 1
+        self.sum_ms += elapsed_ms
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return float(bound)
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        buckets = {f"<={bound}ms": count for bound, count in zip(LATENCY_BUCKETS_MS, self.counts)}
+        buckets[f">{LATENCY_BUCKETS_MS[-1]}ms"] = self.counts[-1]
+        return {
+            "count": self.total,
+            "mean_ms": round(self.sum_ms / self.total, 3) if self.total else None,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "buckets": buckets,
+        }
+
+
+class GradingService:
+    """HTTP-сервер на asyncio, отдающий оценку промптов в пул процессов."""
+
+    def __init__(self, pool: ProcessPoolExecutor, *, queue_size: int, max_batch: int) -> None:
+        self.pool = pool
+        self.queue_size = queue_size
+        # Пакет больше очереди получал бы 429 при любой нагрузке.
+        self.max_batch = min(max_batch, queue_size)
+        self.in_flight = 0
+        self.rejected = 0
+        self.started = time.monotonic()
+        self.histograms: Dict[str, LatencyHistogram] = {}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), IDLE_TIMEOUT)
+                except HTTPError as exc:
+                    await self._respond(writer, exc.status, {"error": exc.message}, keep_alive=False)
+                    return
+                if request is None:
+                    return
+                method, path, body, keep_alive = request
+                started = time.perf_counter()
+                headers: Dict[str, str] = {}
+                try:
+                    status, payload = await self._dispatch(method, path, body)
+                except HTTPError as exc:
+                    status, payload = exc.status, {"error": exc.message}
+                    if status == 429:
+                        headers["Retry-After"] = "1"
+                except Exception as exc:  # сбой в исполнителе не должен ронять сервер
+                    status, payload = 500, {"error": f"Ошибка оценки: {exc}"}
+                await self._respond(writer, status, payload, keep_alive=keep_alive, headers=headers)
+                self._histogram(method, path).record((time.perf_counter() - started) * 1000, status)
+                if not keep_alive:
+                    return
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _histogram(self, method: str, path: str) -> LatencyHistogram:
+        key = f"{method} {path}" if path in ("/evaluate", "/evaluate/batch", "/health", "/stats") else "other"
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        return histogram
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, bytes, bool]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError as exc:
+            raise HTTPError(400, "Некорректная строка запроса") from exc
+        headers: Dict[str, str] = {}
+        count = 0
+        while True:
+            header = await reader.readline()
+            if header in (b"\r\n", b"\n", b""):
+                break
+            count += 1
+            if count > MAX_HEADERS:
+                raise HTTPError(431, "Слишком много заголовков")
+            name, _, value = header.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError as exc:
+            raise HTTPError(400, "Некорректный Content-Length") from exc
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Слишком большой запрос")
+        body = await reader.readexactly(length) if length else b""
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        return method, urlsplit(target).path, body, keep_alive
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, dict]:
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/stats":
+            return 200, self.stats()
+        if path not in ("/evaluate", "/evaluate/batch"):
+            raise HTTPError(404, "Неизвестный адрес")
+        if method != "POST":
+            raise HTTPError(405, "Нужен POST")
+        try:
+            payload = json.loads(body)
+        except ValueError as exc:
+            raise HTTPError(400, f"Некорректный JSON: {exc}") from exc
+
+        if path == "/evaluate":
+            if not isinstance(payload, dict):
+                raise HTTPError(400, "Ожидается объект JSON")
+            results = await self._evaluate([payload])
+            result = results[0]
+            return (400 if "error" in result else 200), result
+
+        items = payload.get("items") if isinstance(payload, dict) else None
+        if not isinstance(items, list) or not items:
+            raise HTTPError(400, "Ожидается непустой список items")
+        if len(items) > self.max_batch:
+            raise HTTPError(413, f"В пакете не больше {self.max_batch} записей")
+        return 200, {"results": await self._evaluate(items)}
+
+    async def _evaluate(self, records: List[dict]) -> List[dict]:
+        # Ёмкость очереди считается в промптах: пакет занимает столько мест, сколько в нём записей.
+        if self.in_flight + len(records) > self.queue_size:
+            self.rejected += 1
+            raise HTTPError(429, "Сервис перегружен, повторите позже")
+        self.in_flight += len(records)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.pool, grade_payloads, records)
+        finally:
+            self.in_flight -= len(records)
+
+    async def _respond(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: dict,
+        *,
+        keep_alive: bool,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        lines = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    def stats(self) -> dict:
+        return {
+            "uptime_s": round(time.monotonic() - self.started, 1),
+            "in_flight": self.in_flight,
+            "queue_size": self.queue_size,
+            "rejected": self.rejected,
+            "endpoints": {key: histogram.snapshot() for key, histogram in sorted(self.histograms.items())},
+        }
+
+
+async def serve(host: str, port: int, workers: int, queue_size: int, max_batch: int, cache_size: int) -> None:
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cache_size,)) as pool:
+        service = GradingService(pool, queue_size=queue_size, max_batch=max_batch)
+        server = await asyncio.start_server(service.handle_connection, host, port)
+        print(
+            f"[service] Сервис оценки слушает http://{host}:{port} "
+            f"({workers} процессов, очередь {queue_size}, пакет до {service.max_batch})"
+        )
+        async with server:
+            await server.serve_forever()
+
+
+async def _request(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, path: str, payload: dict
+) -> Tuple[int, bytes]:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Сервер закрыл соединение")
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = header.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def load(url: str, concurrency: int, requests: int, batch: int, seed: int) -> None:
+    """Каждый «клиент» — отдельное keep-alive-соединение, как компьютер в классе."""
+    parts = urlsplit(url)
+    host, port = parts.hostname or "127.0.0.1", parts.port or 80
+    path = "/evaluate/batch" if batch > 1 else "/evaluate"
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    errors = 0
+    remaining = requests
+
+    def make_record(rnd: random.Random, index: int) -> dict:
+        mission = rnd.choice(MISSIONS)
+        prompt = (
+            f"Объясни тему №{rnd.randint(1, 50)} ученикам {rnd.randint(5, 11)} класса "
+            f"в {rnd.randint(3, 7)} пунктах"
+        )
+        return {"id": index, "mission_id": mission.id, "prompt": prompt}
+
+    async def client(number: int) -> None:
+        nonlocal remaining, errors
+        rnd = random.Random(seed + number)
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while remaining > 0:
+                remaining -= 1
+                if batch > 1:
+                    payload: dict = {"items": [make_record(rnd, i) for i in range(batch)]}
+                else:
+                    payload = make_record(rnd, number)
+                started = time.perf_counter()
+                try:
+                    status, _ = await _request(reader, writer, host, path, payload)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    errors += 1
+                    writer.close()
+                    reader, writer = await asyncio.open_connection(host, port)
+                    continue
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == 429:
+                    await asyncio.sleep(0.05)
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(q: float) -> float:
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+    ok = statuses.get(200, 0)
+    print(f"[load] Запросов: {len(latencies)}, ошибок соединения: {errors}, за {elapsed:.2f} с")
+    print(f"[load] Успешных: {ok} ({ok / elapsed:.1f} запр./с, {ok * max(batch, 1) / elapsed:.1f} промптов/с)")
+    print(f"[load] Коды ответов: {dict(sorted(statuses.items()))}")
+    print(f"[load] Задержка p50 {percentile(0.5):.1f} мс, p95 {percentile(0.95):.1f} мс, p99 {percentile(0.99):.1f} мс")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сервис оценки промптов AI Teacher Quest и нагрузочный тест к нему.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Запустить сервис оценки.")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Процессов-исполнителей.")
+    serve_parser.add_argument(
+        "--queue-size", type=int, default=2048, help="Сколько промптов может быть в работе, сверх — 429."
+    )
+    serve_parser.add_argument(
+        "--max-batch", type=int, default=500, help="Наибольший размер пакета (не больше --queue-size)."
+    )
+    serve_parser.add_argument(
+        "--cache-size", type=int, default=0, help="Размер LRU-кэша оценок в каждом процессе (0 — без кэша)."
+    )
+
+    load_parser = commands.add_parser("load", help="Нагрузить сервис запросами от многих клиентов.")
+    load_parser.add_argument("--url", default="http://127.0.0.1:8765")
+    load_parser.add_argument("--concurrency", type=int, default=50, help="Одновременных соединений.")
+    load_parser.add_argument("--requests", type=int, default=2000, help="Всего запросов.")
+    load_parser.add_argument("--batch", type=int, default=1, help="Промптов в запросе (>1 — /evaluate/batch).")
+    load_parser.add_argument("--seed", type=int, default=2024)
+
+    args = parser.parse_args()
+    try:
+        if args.command == "serve":
+            asyncio.run(serve(args.host, args.port, args.workers, args.queue_size, args.max_batch, args.cache_size))
+        else:
+            asyncio.run(load(args.url, args.concurrency, args.requests, args.batch, args.seed))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
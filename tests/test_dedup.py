@@ -0,0 +1,25 @@
+from ai.dedup import NearDuplicateClusterer, SqliteLSHIndex
+
+
+def _run(path, prompts):
+    index = SqliteLSHIndex(str(path))
+    clusterer = NearDuplicateClusterer(0.8, index=index)
+    try:
+        return [clusterer.assign("mission", prompt, str(label)) for label, prompt in enumerate(prompts)]
+    finally:
+        index.close()
+
+
+def test_sqlite_index_starts_empty_on_each_run(tmp_path):
+    path = tmp_path / "clusters.sqlite"
+    prompts = ["Составь тест из пяти вопросов для шестого класса", "Составь тест из пяти вопросов для шестого класса"]
+
+    first = _run(path, prompts)
+    second = _run(path, prompts)
+
+    assert [match.representative for match in first] == [True, False]
+    # Второй прогон не ссылается на представителей первого.
+    assert [(match.cluster, match.representative, match.representative_label) for match in second] == [
+        (0, True, "0"),
+        (0, False, "0"),
+    ]
@@ -0,0 +1,61 @@
+import random
+
+from ai.matcher import KeywordMatcher, fold_case
+
+GROUPS = {
+    "action": ["составь", "план", "сост"],
+    "audience": ["класс", "7 класс", "ученик"],
+    "digits": ["1", "2", "7"],
+    "overlap": ["ааа", "аа", "ааб"],
+}
+ALPHABET = "абвгдлнопрстуикс 127ьа"
+
+
+def _expected(matcher, text):
+    return {group: sorted(spans) for group, spans in matcher.find(text).items()}
+
+
+def test_scan_and_find_agree():
+    matcher = KeywordMatcher(GROUPS)
+    text = "составь план для 7 класса: аааб"
+
+    assert matcher.scan(text) == frozenset(matcher.find(text))
+
+
+def test_incremental_scan_matches_full_scan_after_random_edits():
+    matcher = KeywordMatcher(GROUPS)
+    rnd = random.Random(7)
+    scan = matcher.incremental()
+    text = ""
+    for _ in range(2000):
+        start = rnd.randint(0, len(text))
+        end = min(len(text), start + rnd.choice((0, 0, 1, 3, 12)))
+        inserted = "".join(rnd.choice(ALPHABET) for _ in range(rnd.choice((0, 1, 1, 2, 8))))
+        scan.replace(start, end, inserted)
+        text = text[:start] + inserted + text[end:]
+
+        expected = _expected(matcher, text)
+        assert scan.text == text
+        assert scan.spans() == expected
+        assert scan.hits == frozenset(expected)
+        # counts — число позиций, где кончается слово группы.
+        ends = {group: len({end for _, end in expected.get(group, ())}) for group in matcher.groups}
+        assert scan.counts == ends
+
+
+def test_update_diffs_whole_text():
+    matcher = KeywordMatcher(GROUPS)
+    scan = matcher.incremental()
+    for text in ("составь план", "составь план для 7 класса", "план для 7 класса", "сост", ""):
+        scan.update(text)
+        assert scan.text == text
+        assert scan.spans() == _expected(matcher, text)
+
+
+def test_fold_case_keeps_length():
+    text = "İstanbul ПЛАН"
+
+    folded = fold_case(text)
+
+    assert len(folded) == len(text)
+    assert folded.endswith("план")
@@ -0,0 +1,25 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame  # noqa: E402
+
+from core.settings import COLORS  # noqa: E402
+from ui.components import TextBlock  # noqa: E402
+from ui.fonts import FontManager  # noqa: E402
+
+
+def test_bounds_cover_drawn_area():
+    pygame.init()
+    text = "Слишком общий запрос, нет аудитории и формата."
+    block = TextBlock(FontManager(), 24, COLORS.text_primary, 300, text=text)
+    surface = pygame.Surface((400, 400), pygame.SRCALPHA)
+    surface.fill((0, 0, 0, 0))
+    position = (10, 20)
+
+    block.draw(surface, position)
+
+    drawn = surface.get_bounding_rect()
+    bounds = block.bounds(position)
+    assert len(block.lines) > 1
+    assert bounds.contains(drawn)
@@ -0,0 +1,53 @@
+import random
+
+from ui.text_buffer import MIN_GAP, TextBuffer
+
+
+def test_buffer_matches_string_operations():
+    rnd = random.Random(3)
+    edits = []
+    buffer = TextBuffer("начало", on_change=lambda *edit: edits.append(edit))
+    text = "начало"
+    for _ in range(1500):
+        start = rnd.randint(0, len(text))
+        end = min(len(text), start + rnd.choice((0, 0, 1, 5, 40)))
+        # Изредка вставка больше разрыва — буфер должен его расширить.
+        size = rnd.choice((0, 1, 2, 7, MIN_GAP + 1))
+        inserted = "".join(rnd.choice("абв\n ") for _ in range(size))
+        edits.clear()
+        buffer.replace(start, end, inserted)
+        text = text[:start] + inserted + text[end:]
+
+        assert edits == ([(start, end, len(inserted))] if start != end or inserted else [])
+        assert len(buffer) == len(text)
+        assert buffer.cursor == buffer.anchor == start + len(inserted)
+        low = rnd.randint(0, len(text))
+        high = rnd.randint(low, len(text))
+        assert buffer.slice(low, high) == text[low:high]
+        if rnd.random() < 0.1:
+            assert buffer.text == text
+    assert buffer.text == text
+
+
+def test_selection_editing():
+    buffer = TextBuffer("план урока")
+    buffer.move_to(0)
+    buffer.move_to(4, extend=True)
+
+    assert buffer.selection == (0, 4)
+    assert buffer.selected_text() == "план"
+
+    buffer.insert("конспект")
+    assert buffer.text == "конспект урока"
+    assert buffer.cursor == 8 and not buffer.has_selection
+
+    buffer.delete_backward()
+    buffer.move_to(0)
+    buffer.delete_forward()
+    assert buffer.text == "онспек урока"
+
+    buffer.select_all()
+    buffer.delete_backward()
+    assert buffer.text == ""
+    buffer.delete_backward()
+    assert buffer.text == "" and buffer.cursor == 0
@@ -0,0 +1,91 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame  # noqa: E402
+import pytest  # noqa: E402
+
+from ui.components import TextInput  # noqa: E402
+from ui.fonts import FontManager  # noqa: E402
+
+
+class FakeScrap:
+    """Буфер обмена вместо ``pygame.scrap``: хранит байты по типу."""
+
+    def __init__(self, *, writable: bool = True) -> None:
+        self.data = {}
+        self.writable = writable
+        self.ready = False
+
+    def init(self):
+        self.ready = True
+
+    def get_init(self):
+        return self.ready
+
+    def get(self, kind):
+        return self.data.get(kind)
+
+    def put(self, kind, data):
+        if not self.writable:
+            raise pygame.error("clipboard is read-only")
+        self.data[kind] = data
+
+
+@pytest.fixture
+def field():
+    pygame.init()
+    field = TextInput(pygame.Rect(0, 0, 400, 200), FontManager())
+    field.active = True
+    return field
+
+
+def _press(field, key, mod=pygame.KMOD_CTRL):
+    field.handle_event(pygame.event.Event(pygame.KEYDOWN, key=key, mod=mod, unicode=""))
+
+
+def test_cut_and_paste_round_trip(field, monkeypatch):
+    scrap = FakeScrap()
+    monkeypatch.setattr(pygame, "scrap", scrap)
+    field.text = "Составь план урока"
+
+    _press(field, pygame.K_a)
+    _press(field, pygame.K_x)
+    assert field.text == ""
+    assert scrap.data[pygame.SCRAP_TEXT] == "Составь план урока".encode("utf-8")
+
+    _press(field, pygame.K_v)
+    _press(field, pygame.K_v)
+    assert field.text == "Составь план урокаСоставь план урока"
+
+
+def test_copy_keeps_text(field, monkeypatch):
+    scrap = FakeScrap()
+    monkeypatch.setattr(pygame, "scrap", scrap)
+    field.text = "урок"
+    field.set_selection(0, 2)
+
+    _press(field, pygame.K_c)
+
+    assert field.text == "урок"
+    assert scrap.data[pygame.SCRAP_TEXT] == "ур".encode("utf-8")
+
+
+def test_cut_keeps_selection_when_clipboard_fails(field, monkeypatch):
+    monkeypatch.setattr(pygame, "scrap", FakeScrap(writable=False))
+    field.text = "урок"
+
+    _press(field, pygame.K_a)
+    _press(field, pygame.K_x)
+
+    assert field.text == "урок"
+
+
+def test_paste_from_empty_clipboard_keeps_selection(field, monkeypatch):
+    monkeypatch.setattr(pygame, "scrap", FakeScrap())
+    field.text = "урок"
+
+    _press(field, pygame.K_a)
+    _press(field, pygame.K_v)
+
+    assert field.text == "урок"
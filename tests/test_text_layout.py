@@ -0,0 +1,51 @@
+import os
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame  # noqa: E402
+
+from ui.fonts import FontManager  # noqa: E402
+from ui.text_layout import LineLayout, wrap_text  # noqa: E402
+
+WORDS = ["план", "урока", "для", "7", "класса", "с", "примерами", "и", "вопросами", "\n", "  ", "оченьдлинноеслово"]
+
+
+def _snapshot(layout):
+    return [(line.start, line.words, line.text, line.width) for line in layout.lines]
+
+
+def test_incremental_layout_matches_fresh_layout():
+    pygame.init()
+    font = FontManager().get(22)
+    rnd = random.Random(11)
+    state = {"text": ""}
+
+    def source(start, end):
+        return state["text"][start:end]
+
+    def length():
+        return len(state["text"])
+
+    layout = LineLayout(font, 240, source, length)
+    for _ in range(600):
+        text = state["text"]
+        start = rnd.randint(0, len(text))
+        end = min(len(text), start + rnd.choice((0, 0, 1, 4, 30)))
+        inserted = "".join(rnd.choice(WORDS) + rnd.choice(("", " ")) for _ in range(rnd.choice((0, 1, 1, 3))))
+        state["text"] = text[:start] + inserted + text[end:]
+        layout.replace(start, end, len(inserted))
+
+        assert _snapshot(layout) == _snapshot(LineLayout(font, 240, source, length))
+
+
+def test_wrap_text_fits_width():
+    pygame.init()
+    font = FontManager().get(22)
+    text = "Составь план урока для 7 класса с примерами и вопросами на понимание темы"
+
+    lines = wrap_text(font, text, 200)
+
+    assert len(lines) > 1
+    assert " ".join(lines) == text
+    assert all(font.size(line)[0] <= 200 for line in lines)
@@ -3,27 +3,159 @@
 """
 from __future__ import annotations
 
+from bisect import bisect_right
 from dataclasses import dataclass
-from typing import Callable, List, Optional, Tuple
+from itertools import groupby
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 import pygame
 
 from core.settings import COLORS
 from ui.animations import clamp, lerp
+from ui.text_buffer import TextBuffer
+from ui.text_layout import LayoutLine, LineLayout, wrap_text
 
 
 def draw_rounded_rect(surface: pygame.Surface, color, rect: pygame.Rect, radius: int = 12) -> None:
     pygame.draw.rect(surface, color, rect, border_radius=radius)
 
 
+def alpha_surface(size: Tuple[int, int]) -> pygame.Surface:
+    """Прозрачная поверхность; после открытия окна — в формате, который быстрее всего блитится на экран."""
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    return surface.convert_alpha() if pygame.display.get_surface() is not None else surface
+
+
+def shadow_bounds(rect: pygame.Rect, blur: int) -> pygame.Rect:
+    """Область, которую занимает элемент вместе с тенью от ``draw_shadow``."""
+    return rect.union(rect.inflate(blur * 2, blur * 2).move(0, 4))
+
+
+class ShadowSprites:
+    """Готовые куски теней для ``draw_shadow`` (nine-slice).
+
+    Тень — скруглённый прямоугольник одного цвета, поэтому от её размера
+    зависят только длины прямых участков. Углы вырезаются из заготовки,
+    которая хранится по (радиусу, прозрачности), а прямые участки — из одной
+    залитой поверхности на каждую прозрачность. Новые поверхности создаются,
+    только когда встречается новый радиус или тень крупнее прежних.
+    """
+
+    def __init__(self, color: Tuple[int, int, int]) -> None:
+        self.color = color
+        self.surfaces_created = 0
+        self._corners: Dict[Tuple[int, int], pygame.Surface] = {}
+        self._fills: Dict[int, pygame.Surface] = {}
+
+    def _new_surface(self, size: Tuple[int, int]) -> pygame.Surface:
+        self.surfaces_created += 1
+        return alpha_surface(size)
+
+    def _corner_template(self, radius: int, alpha: int) -> pygame.Surface:
+        template = self._corners.get((radius, alpha))
+        if template is None:
+            template = self._new_surface((radius * 2 + 2, radius * 2 + 2))
+            template.fill((0, 0, 0, 0))
+            pygame.draw.rect(template, (*self.color, alpha), template.get_rect(), border_radius=radius)
+            self._corners[(radius, alpha)] = template
+        return template
+
+    def _fill(self, size: Tuple[int, int], alpha: int) -> pygame.Surface:
+        fill = self._fills.get(alpha)
+        if fill is None or fill.get_width() < size[0] or fill.get_height() < size[1]:
+            if fill is not None:
+                size = (max(size[0], fill.get_width()), max(size[1], fill.get_height()))
+            fill = self._new_surface(size)
+            fill.fill((*self.color, alpha))
+            self._fills[alpha] = fill
+        return fill
+
+    def draw(self, surface: pygame.Surface, rect: pygame.Rect, radius: int, alpha: int) -> None:
+        x, y, width, height = rect
+        radius = max(0, min(radius, width // 2, height // 2))
+        fill = self._fill((width, height), alpha)
+        if not radius:
+            surface.blit(fill, (x, y), (0, 0, width, height))
+            return
+        template = self._corner_template(radius, alpha)
+        right, bottom, far = x + width - radius, y + height - radius, radius + 2
+        surface.blits(
+            (
+                (template, (x, y), (0, 0, radius, radius)),
+                (template, (right, y), (far, 0, radius, radius)),
+                (template, (x, bottom), (0, far, radius, radius)),
+                (template, (right, bottom), (far, far, radius, radius)),
+                (fill, (x + radius, y), (0, 0, width - radius * 2, radius)),
+                (fill, (x, y + radius), (0, 0, width, height - radius * 2)),
+                (fill, (x + radius, bottom), (0, 0, width - radius * 2, radius)),
+            ),
+            doreturn=False,
+        )
+
+
+SHADOWS = ShadowSprites(COLORS.background_bottom)
+
+
 def draw_shadow(surface: pygame.Surface, rect: pygame.Rect, blur: int = 4, alpha: int = 80) -> None:
     shadow_rect = rect.inflate(blur * 2, blur * 2).move(0, 4)
-    shadow = pygame.Surface(shadow_rect.size, pygame.SRCALPHA)
-    pygame.draw.rect(shadow, (*COLORS.background_bottom, alpha), shadow.get_rect(), border_radius=rect.height // 4)
-    surface.blit(shadow, shadow_rect.topleft)
+    SHADOWS.draw(surface, shadow_rect, rect.height // 4, alpha)
+
+
+# На сколько ступеней делится анимация наведения: вид виджета меняется
+# (и перерисовывается) только при переходе на другую ступень.
+HOVER_STEPS = 32
+
+
+class RetainedWidget:
+    """Виджет, который хранит свою картинку в отдельной поверхности.
+
+    ``_appearance`` перечисляет всё, от чего зависит вид виджета. Пока оно
+    и размер не меняются, ``draw`` — один блит готовой поверхности размером
+    ``bounds``; иначе виджет перерисовывается через ``_render``. Заодно
+    ``update`` помечает виджет ``dirty``, а экран забирает его ``bounds``
+    в области перерисовки кадра. ``animating`` говорит главному циклу, что
+    анимации нужны кадры с полной частотой.
+    """
+
+    rect: pygame.Rect
 
+    def _init_retained(self) -> None:
+        self.animating = False
+        self.dirty = True
+        self._sprite: Optional[pygame.Surface] = None
+        self._sprite_key: Optional[tuple] = None
 
-class Button:
+    @property
+    def bounds(self) -> pygame.Rect:
+        return self.rect.copy()
+
+    def _appearance(self) -> tuple:
+        raise NotImplementedError
+
+    def _render(self, surface: pygame.Surface, rect: pygame.Rect) -> None:
+        """Рисует виджет в ``surface``; ``rect`` — его место внутри поверхности."""
+        raise NotImplementedError
+
+    def _sprite_state(self) -> tuple:
+        return self._appearance(), self.rect.size
+
+    def _check_changed(self) -> None:
+        if self._sprite_state() != self._sprite_key:
+            self.dirty = True
+
+    def draw(self, surface: pygame.Surface) -> None:
+        bounds = self.bounds
+        key = self._sprite_state()
+        if key != self._sprite_key:
+            if self._sprite is None or self._sprite.get_size() != bounds.size:
+                self._sprite = alpha_surface(bounds.size)
+            self._sprite.fill((0, 0, 0, 0))
+            self._render(self._sprite, self.rect.move(-bounds.x, -bounds.y))
+            self._sprite_key = key
+        surface.blit(self._sprite, bounds)
+
+
+class Button(RetainedWidget):
     """Стандартная кнопка с плавной анимацией наведения."""
 
     def __init__(
@@ -44,6 +176,23 @@ class Button:
         self._hover_progress = 0.0
         self._pressed = False
         self._enabled = True
+        self._init_retained()
+
+    @property
+    def bounds(self) -> pygame.Rect:
+        return shadow_bounds(self.rect, 3)
+
+    def _hover_step(self) -> int:
+        return round(self._hover_progress * HOVER_STEPS)
+
+    def _color(self) -> List[int]:
+        base_color = COLORS.accent if self.accent else COLORS.surface
+        hover_color = COLORS.accent_secondary if self.accent else COLORS.surface_variant
+        progress = self._hover_step() / HOVER_STEPS
+        return [int(base_color[i] * (1 - progress) + hover_color[i] * progress) for i in range(3)]
+
+    def _appearance(self) -> tuple:
+        return (self.text, self.accent, self._hover_step())
 
     def set_enabled(self, enabled: bool) -> None:
         self._enabled = enabled
@@ -64,19 +213,15 @@ class Button:
         hovered = self.rect.collidepoint(mouse_pos) and self._enabled
         target = 1.0 if hovered else 0.0
         self._hover_progress = lerp(self._hover_progress, target, min(dt * 8, 1))
+        self.animating = self._hover_step() != round(target * HOVER_STEPS)
+        self._check_changed()
 
-    def draw(self, surface: pygame.Surface) -> None:
-        draw_shadow(surface, self.rect, blur=3, alpha=50)
-        base_color = COLORS.accent if self.accent else COLORS.surface
-        hover_color = COLORS.accent_secondary if self.accent else COLORS.surface_variant
-        color = [
-            int(base_color[i] * (1 - self._hover_progress) + hover_color[i] * self._hover_progress)
-            for i in range(3)
-        ]
-        draw_rounded_rect(surface, color, self.rect, radius=16)
+    def _render(self, surface: pygame.Surface, rect: pygame.Rect) -> None:
+        draw_shadow(surface, rect, blur=3, alpha=50)
+        draw_rounded_rect(surface, self._color(), rect, radius=16)
 
         label = self.fonts.render(self.text, 26, COLORS.text_primary, bold=self.accent)
-        text_rect = label.get_rect(center=self.rect.center)
+        text_rect = label.get_rect(center=rect.center)
         surface.blit(label, text_rect)
 
 
@@ -96,94 +241,522 @@ class ToggleButton(Button):
                 if self.on_toggle:
                     self.on_toggle(self.state)
 
-    def draw(self, surface: pygame.Surface) -> None:
-        indicator_rect = pygame.Rect(self.rect.x + 12, self.rect.centery - 10, 48, 20)
+    @property
+    def bounds(self) -> pygame.Rect:
+        return self.rect.copy()
+
+    def update(self, dt: float, mouse_pos: Tuple[int, int]) -> None:
+        super().update(dt, mouse_pos)
+        # Наведение на переключатель не рисуется, ждать его анимацию незачем.
+        self.animating = False
+
+    def _appearance(self) -> tuple:
+        return (self.text, self.state)
+
+    def _render(self, surface: pygame.Surface, rect: pygame.Rect) -> None:
+        indicator_rect = pygame.Rect(rect.x + 12, rect.centery - 10, 48, 20)
         knob_rect = pygame.Rect(0, 0, 18, 18)
         knob_rect.centery = indicator_rect.centery
         knob_rect.left = indicator_rect.left + 2 if not self.state else indicator_rect.right - 20
 
         bar_color = COLORS.surface_variant if not self.state else COLORS.accent_secondary
-        draw_rounded_rect(surface, COLORS.surface, self.rect, radius=14)
+        draw_rounded_rect(surface, COLORS.surface, rect, radius=14)
         draw_rounded_rect(surface, bar_color, indicator_rect, radius=12)
         draw_rounded_rect(surface, COLORS.surface, knob_rect, radius=9)
 
         label = self.fonts.render(self.text, 22, COLORS.text_primary)
-        surface.blit(label, (self.rect.x + 72, self.rect.centery - label.get_height() // 2))
+        surface.blit(label, (rect.x + 72, rect.centery - label.get_height() // 2))
+
+
+def _scrap_ready() -> bool:
+    """Включает ``pygame.scrap``; до ``display.set_mode`` буфер обмена недоступен."""
+    try:
+        if not pygame.scrap.get_init():
+            pygame.scrap.init()
+        return bool(pygame.scrap.get_init())
+    except pygame.error:
+        return False
+
+
+def _clipboard_text() -> str:
+    if not _scrap_ready():
+        return ""
+    try:
+        data = pygame.scrap.get(pygame.SCRAP_TEXT)
+    except pygame.error:
+        return ""
+    if not data:
+        return ""
+    if isinstance(data, bytes):
+        data = data.decode("utf-8", errors="replace")
+    return data.rstrip("\x00")
+
+
+def _set_clipboard_text(text: str) -> bool:
+    """Кладёт ``text`` в буфер обмена; ``False``, если положить не удалось."""
+    if not _scrap_ready():
+        return False
+    try:
+        pygame.scrap.put(pygame.SCRAP_TEXT, text.encode("utf-8"))
+    except pygame.error:
+        return False
+    return True
+
+
+# Ctrl+A, Ctrl+C, Ctrl+X, Ctrl+V.
+_EDIT_SHORTCUTS = (pygame.K_a, pygame.K_c, pygame.K_x, pygame.K_v)
 
 
 class TextInput:
-    """Многострочное поле ввода для промптов."""
+    """Многострочное поле ввода для промптов.
+
+    Текст хранит ``TextBuffer``: правка в курсоре стоит O(длины правки),
+    а вставка из буфера обмена — одна правка, сколько бы символов в ней
+    ни было. Буфер сообщает о каждой правке ``LineLayout``, и тот
+    раскладывает заново только строки рядом с ней; отрисованные куски
+    строки живут, пока не изменятся её текст или подсветка.
+
+    Участки текста из ``highlights`` рисуются акцентным цветом.
+    ``on_edit(start, end, inserted)`` получает каждую правку: участок
+    ``[start, end)`` прежнего текста заменён строкой ``inserted``.
+    """
 
-    def __init__(self, rect: pygame.Rect, fonts, *, placeholder: str = "", max_length: int = 600) -> None:
+    def __init__(
+        self,
+        rect: pygame.Rect,
+        fonts,
+        *,
+        placeholder: str = "",
+        max_length: int = 600,
+        on_edit: Optional[Callable[[int, int, str], None]] = None,
+    ) -> None:
         self.rect = rect
         self.fonts = fonts
         self.placeholder = placeholder
         self.max_length = max_length
+        self.on_edit = on_edit
 
-        self.text = ""
         self.active = False
+        # Курсору хватает кадров простоя.
+        self.animating = False
+        self.highlights: Tuple[Tuple[int, int], ...] = ()
+        # Подсветка, слитая в непересекающиеся участки: их начала и концы по порядку.
+        self._marked_starts: List[int] = []
+        self._marked_ends: List[int] = []
         self._caret_visible = True
         self._caret_timer = 0.0
+        font = fonts.get(22)
+        self._buffer = TextBuffer()
+        self._lines = LineLayout(font, rect.width - 32, self._buffer.slice, self._buffer.__len__)
+        self._buffer.on_change = self._edited
+        self._placeholder_lines = LineLayout(
+            font, rect.width - 32, lambda start, end: placeholder[start:end], lambda: len(placeholder)
+        )
+        self._layout_key: Optional[tuple] = None
+        # Для каждой строки — готовые куски (смещение по x, поверхность).
+        self._layout: List[List[Tuple[int, pygame.Surface]]] = []
+        self.dirty = True
+        self._drawn: Optional[tuple] = None
+        self._drawn_extent = pygame.Rect(rect)
+
+    @property
+    def text(self) -> str:
+        return self._buffer.text
+
+    @text.setter
+    def text(self, value: str) -> None:
+        self._buffer.replace(0, len(self._buffer), value)
+
+    @property
+    def cursor(self) -> int:
+        return self._buffer.cursor
+
+    @property
+    def selection(self) -> Tuple[int, int]:
+        return self._buffer.selection
+
+    @property
+    def bounds(self) -> pygame.Rect:
+        # Длинный текст может выйти за нижний край поля — учитываем и прошлую высоту.
+        return shadow_bounds(self.rect, 6).union(self._text_extent()).union(self._drawn_extent)
+
+    def _appearance(self) -> tuple:
+        caret = self.active and self._caret_visible
+        return (self._lines.version, self.highlights, caret, self._buffer.cursor, self._buffer.anchor, tuple(self.rect))
+
+    def _text_extent(self) -> pygame.Rect:
+        line_height = self.fonts.get(22).get_height() + 6
+        lines = len(self._visible_lines())
+        return pygame.Rect(self.rect.x, self.rect.y, self.rect.width, 16 + lines * line_height + 8)
 
     def handle_event(self, event: pygame.event.Event) -> Optional[bool]:
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             self.active = self.rect.collidepoint(event.pos)
+            if self.active:
+                extend = bool(pygame.key.get_mods() & pygame.KMOD_SHIFT)
+                self._buffer.move_to(self._position_at(event.pos), extend=extend)
+                self._show_caret()
         elif event.type == pygame.KEYDOWN and self.active:
-            if event.key == pygame.K_BACKSPACE:
-                self.text = self.text[:-1]
-            elif event.key == pygame.K_RETURN:
+            if event.key == pygame.K_RETURN:
                 return True
-            else:
-                if len(self.text) < self.max_length and (event.unicode.isprintable() or event.unicode == "\n"):
-                    self.text += event.unicode
+            self._handle_key(event)
+            self._show_caret()
         return None
 
+    def _handle_key(self, event: pygame.event.Event) -> None:
+        buffer = self._buffer
+        shift = bool(event.mod & pygame.KMOD_SHIFT)
+        if event.mod & (pygame.KMOD_CTRL | pygame.KMOD_META) and event.key in _EDIT_SHORTCUTS:
+            if event.key == pygame.K_a:
+                buffer.select_all()
+            elif event.key == pygame.K_v:
+                pasted = _clipboard_text()
+                if pasted:
+                    self.paste(pasted)
+            elif buffer.has_selection:
+                # Вырезанное удаляем, только если оно попало в буфер обмена.
+                if _set_clipboard_text(buffer.selected_text()) and event.key == pygame.K_x:
+                    buffer.insert("")
+        elif event.key == pygame.K_BACKSPACE:
+            buffer.delete_backward()
+        elif event.key == pygame.K_DELETE:
+            buffer.delete_forward()
+        elif event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+            step = -1 if event.key == pygame.K_LEFT else 1
+            start, end = buffer.selection
+            if buffer.has_selection and not shift:
+                buffer.move_to(start if step < 0 else end)
+            else:
+                buffer.move_to(buffer.cursor + step, extend=shift)
+        elif event.key in (pygame.K_UP, pygame.K_DOWN, pygame.K_HOME, pygame.K_END):
+            buffer.move_to(self._line_target(event.key), extend=shift)
+        elif event.unicode and (event.unicode.isprintable() or event.unicode == "\n"):
+            self.paste(event.unicode)
+
+    def paste(self, text: str) -> None:
+        """Вставляет ``text`` вместо выделения одной правкой, обрезая его до ``max_length``."""
+        text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\t", " ")
+        text = "".join(char for char in text if char.isprintable() or char == "\n")
+        start, end = self._buffer.selection
+        room = max(self.max_length - (len(self._buffer) - (end - start)), 0)
+        if text[:room] or start != end:
+            self._buffer.insert(text[:room])
+
+    def _edited(self, start: int, end: int, length: int) -> None:
+        self._lines.replace(start, end, length)
+        if self.on_edit is not None:
+            self.on_edit(start, end, self._buffer.slice(start, start + length))
+
+    def _show_caret(self) -> None:
+        self._caret_visible = True
+        self._caret_timer = 0.0
+
     def update(self, dt: float) -> None:
         if self.active:
             self._caret_timer += dt
             if self._caret_timer >= 0.5:
                 self._caret_visible = not self._caret_visible
                 self._caret_timer = 0
+        if self._appearance() != self._drawn:
+            self.dirty = True
 
     def clear(self) -> None:
         self.text = ""
+        self.set_highlights(())
+
+    def set_selection(self, start: int, end: int) -> None:
+        """Выделяет ``[start, end)``; курсор встаёт в ``end``."""
+        self._buffer.move_to(start)
+        self._buffer.move_to(end, extend=True)
+
+    def set_highlights(self, spans: Iterable[Tuple[int, int]]) -> None:
+        """Задаёт участки текста ``[start, end)``, которые нужно подсветить."""
+        self.highlights = tuple(sorted(spans))
+        starts: List[int] = []
+        ends: List[int] = []
+        for start, end in self.highlights:
+            if starts and start <= ends[-1]:
+                ends[-1] = max(ends[-1], end)
+            elif start < end:
+                starts.append(start)
+                ends.append(end)
+        self._marked_starts, self._marked_ends = starts, ends
 
     def draw(self, surface: pygame.Surface) -> None:
+        self._drawn = self._appearance()
+        self._drawn_extent = self._text_extent()
         draw_shadow(surface, self.rect, blur=6)
         draw_rounded_rect(surface, COLORS.surface, self.rect, radius=12)
 
-        text_color = COLORS.text_primary
-        lines = self._wrap_text(self.text or self.placeholder, width=self.rect.width - 32)
+        layout = self._get_layout()
+        line_height = self.fonts.get(22).get_height() + 6
+        if self._buffer.has_selection:
+            self._draw_selection(surface, line_height)
         y = self.rect.y + 16
-        for line in lines:
-            color = COLORS.text_secondary if (not self.text and line == self.placeholder) else text_color
-            label = self.fonts.render(line, 22, color)
-            surface.blit(label, (self.rect.x + 16, y))
-            y += label.get_height() + 6
+        for pieces in layout:
+            for x, label in pieces:
+                surface.blit(label, (self.rect.x + 16 + x, y))
+            y += line_height
 
         if self.active and self._caret_visible:
-            caret_y = self.rect.y + 16 + (len(lines) - 1) * (self.fonts.get(22).get_height() + 6)
-            caret_x = self.rect.x + 16 + self.fonts.get(22).size(lines[-1])[0]
+            index, x = self._caret_place(self._buffer.cursor)
+            caret_y = self.rect.y + 16 + index * line_height
+            caret_x = self.rect.x + 16 + x
             pygame.draw.line(surface, COLORS.accent_secondary, (caret_x, caret_y), (caret_x, caret_y + 24), 2)
 
-    def _wrap_text(self, text: str, width: int) -> List[str]:
-        words = text.replace("\n", " \n ").split(" ")
-        lines: List[str] = []
-        current = ""
-        for word in words:
-            if word == "\n":
-                lines.append(current)
-                current = ""
-                continue
-            test_line = f"{current} {word}".strip()
-            if self.fonts.get(22).size(test_line)[0] <= width:
-                current = test_line
+    def _draw_selection(self, surface: pygame.Surface, line_height: int) -> None:
+        start, end = self._buffer.selection
+        first = self._lines.line_at(start)
+        last = self._lines.line_at(end)
+        font = self.fonts.get(22)
+        for index in range(first, last + 1):
+            line = self._lines.lines[index]
+            left = font.size(line.text[:line.column(start)])[0] if index == first else 0
+            right = font.size(line.text[:line.column(end)])[0] if index == last else line.width
+            if index < last:
+                # Выделенный перенос строки виден и на пустой строке.
+                right += 6
+            y = self.rect.y + 16 + index * line_height
+            rect = pygame.Rect(self.rect.x + 16 + left, y, right - left, line_height - 4)
+            pygame.draw.rect(surface, COLORS.surface_variant, rect)
+
+    def _caret_place(self, position: int) -> Tuple[int, int]:
+        """Строка раскладки и смещение по x для позиции курсора."""
+        if not len(self._buffer):
+            return 0, 0
+        index = self._lines.line_at(position)
+        line = self._lines.lines[index]
+        column = line.column(position)
+        return index, self.fonts.get(22).size(line.text[:column])[0] if column else 0
+
+    def _line_target(self, key: int) -> int:
+        """Куда ведут Home/End и стрелки вверх/вниз из текущей позиции курсора."""
+        lines = self._lines.lines
+        index = self._lines.line_at(self._buffer.cursor)
+        line = lines[index]
+        if key == pygame.K_HOME:
+            return line.start
+        if key == pygame.K_END:
+            return line.position(len(line.text))
+        target = index - 1 if key == pygame.K_UP else index + 1
+        if not 0 <= target < len(lines):
+            return 0 if target < 0 else len(self._buffer)
+        _, x = self._caret_place(self._buffer.cursor)
+        return self._position_in_line(lines[target], x)
+
+    def _position_at(self, point: Tuple[int, int]) -> int:
+        """Позиция текста под точкой ``point`` на экране."""
+        if not len(self._buffer):
+            return 0
+        line_height = self.fonts.get(22).get_height() + 6
+        lines = self._lines.lines
+        index = max(0, min((point[1] - self.rect.y - 16) // line_height, len(lines) - 1))
+        return self._position_in_line(lines[index], point[0] - self.rect.x - 16)
+
+    def _position_in_line(self, line: LayoutLine, x: int) -> int:
+        # Ищем первый символ, середина которого правее x.
+        font = self.fonts.get(22)
+        low, high = 0, len(line.text)
+        while low < high:
+            middle = (low + high) // 2
+            if (font.size(line.text[:middle])[0] + font.size(line.text[:middle + 1])[0]) // 2 < x:
+                low = middle + 1
             else:
-                lines.append(current)
-                current = word
-        if current:
-            lines.append(current)
-        return lines or [""]
+                high = middle
+        return line.position(low)
+
+    def _visible_lines(self) -> List[LayoutLine]:
+        width = self.rect.width - 32
+        if self._lines.width != width:
+            self._lines.reset(width)
+            self._placeholder_lines.reset(width)
+        return self._lines.lines if len(self._buffer) else self._placeholder_lines.lines
+
+    def _get_layout(self) -> List[List[Tuple[int, pygame.Surface]]]:
+        lines = self._visible_lines()
+        key = (bool(len(self._buffer)), self._lines.version, self._placeholder_lines.version, self.highlights)
+        if key != self._layout_key:
+            self._layout_key = key
+            if len(self._buffer):
+                self._layout = [self._line_pieces(line, COLORS.text_primary, self._line_marks(line)) for line in lines]
+            else:
+                self._layout = [self._line_pieces(line, COLORS.text_secondary, None) for line in lines]
+        return self._layout
+
+    def _line_marks(self, line: LayoutLine) -> Optional[bytes]:
+        """Подсвечен ли каждый символ текста строки; ``None`` — подсветки в строке нет."""
+        if not line.words:
+            return None
+        first = line.start + line.words[0][0]
+        last = line.start + line.words[-1][1]
+        starts, ends = self._marked_starts, self._marked_ends
+        index = bisect_right(ends, first)
+        if index == len(starts) or starts[index] >= last:
+            return None
+        marked = bytearray(last - first)
+        while index < len(starts) and starts[index] < last:
+            start = max(starts[index], first) - first
+            end = min(ends[index], last) - first
+            marked[start:end] = b"\x01" * (end - start)
+            index += 1
+
+        flags = bytearray()
+        offset = line.start - first
+        for number, (start, end) in enumerate(line.words):
+            start, end = start + offset, end + offset
+            if number:
+                # Пробел подсвечен, только если он внутри подсвеченной фразы.
+                flags.append(marked[start - 1] & marked[start] & flags[-1])
+            flags += marked[start:end]
+        return bytes(flags)
+
+    def _line_pieces(
+        self, line: LayoutLine, color: Tuple[int, int, int], marks: Optional[bytes]
+    ) -> List[Tuple[int, pygame.Surface]]:
+        key = (line.text, color, marks)
+        if line.render_key == key:
+            return line.pieces
+        line.render_key = key
+        if not line.text:
+            line.pieces = []
+        elif marks is None:
+            line.pieces = [(0, self.fonts.render(line.text, 22, color))]
+        else:
+            font = self.fonts.get(22)
+            pieces: List[Tuple[int, pygame.Surface]] = []
+            offset = 0
+            for highlighted, run in groupby(marks):
+                size = len(list(run))
+                piece_color = COLORS.accent_secondary if highlighted else color
+                x = font.size(line.text[:offset])[0] if offset else 0
+                pieces.append((x, self.fonts.render(line.text[offset:offset + size], 22, piece_color)))
+                offset += size
+            line.pieces = pieces
+        return line.pieces
+
+
+class StreamingWrap:
+    """Перенос текста по числу символов для текста, который дописывается кусками.
+
+    Перенос жадный, поэтому завершённые строки не меняются: новый кусок
+    затрагивает только последнюю строку и недописанное слово.
+    """
+
+    def __init__(self, width: int) -> None:
+        self.width = width
+        self.reset(width)
+
+    def reset(self, width: Optional[int] = None) -> None:
+        if width is not None:
+            self.width = width
+        self._lines: List[str] = []
+        self._line = ""
+        self._word = ""
+
+    def feed(self, chunk: str) -> None:
+        for char in chunk:
+            if char.isspace():
+                if self._word:
+                    self._line = self._place(self._line, self._word, self._lines)
+                    self._word = ""
+            else:
+                self._word += char
+
+    @property
+    def lines(self) -> List[str]:
+        lines = list(self._lines)
+        line = self._place(self._line, self._word, lines) if self._word else self._line
+        if line:
+            lines.append(line)
+        return lines
+
+    def _place(self, line: str, word: str, lines: List[str]) -> str:
+        """Добавляет слово к строке; завершённые строки дописываются в ``lines``."""
+        candidate = f"{line} {word}" if line else word
+        if len(candidate) <= self.width:
+            return candidate
+        if line:
+            lines.append(line)
+        while len(word) > self.width:
+            lines.append(word[: self.width])
+            word = word[self.width :]
+        return word
+
+
+class TextBlock:
+    """Статический многострочный текст, отрисованный в одну поверхность.
+
+    Текст переносится по ширине в пикселях, строки рисуются в общую
+    прозрачную поверхность, и ``draw`` — один блит. Поверхность строится
+    заново, только когда меняются текст, ширина или цвет. Перевод строки
+    в тексте начинает новую строку.
+    """
+
+    def __init__(
+        self,
+        fonts,
+        size: int,
+        color: Tuple[int, int, int],
+        width: int,
+        *,
+        text: str = "",
+        bold: bool = False,
+        line_spacing: int = 4,
+    ) -> None:
+        self.fonts = fonts
+        self.size = size
+        self.bold = bold
+        self.line_spacing = line_spacing
+        self.text = text
+        self.color = color
+        self.width = width
+        self._key: Optional[tuple] = None
+        self._lines: List[str] = []
+        self._surface: Optional[pygame.Surface] = None
+
+    @property
+    def lines(self) -> List[str]:
+        self._layout()
+        return self._lines
+
+    @property
+    def height(self) -> int:
+        """Высота отрисованной поверхности: надписи выше, чем ``font.get_height()``."""
+        self._layout()
+        return self._surface.get_height() if self._surface is not None else 0
+
+    def set_text(self, text: str, color: Optional[Tuple[int, int, int]] = None) -> None:
+        self.text = text
+        if color is not None:
+            self.color = color
+
+    def bounds(self, position: Tuple[int, int]) -> pygame.Rect:
+        """Область, которую блок займёт, если нарисовать его в ``position``."""
+        return pygame.Rect(position, (self.width, self.height))
+
+    def draw(self, surface: pygame.Surface, position: Tuple[int, int]) -> None:
+        self._layout()
+        if self._surface is not None:
+            surface.blit(self._surface, position)
+
+    def _layout(self) -> None:
+        key = (self.text, self.width, tuple(self.color))
+        if key == self._key:
+            return
+        if self._key is None or key[:2] != self._key[:2]:
+            self._lines = wrap_text(self.fonts.get(self.size, self.bold), self.text, self.width)
+        self._key = key
+        if not self._lines:
+            self._surface = None
+            return
+        labels = [self.fonts.render(line, self.size, self.color, bold=self.bold) for line in self._lines]
+        height = sum(label.get_height() for label in labels) + (len(labels) - 1) * self.line_spacing
+        self._surface = alpha_surface((max(label.get_width() for label in labels), height))
+        self._surface.fill((0, 0, 0, 0))
+        y = 0
+        for label in labels:
+            self._surface.blit(label, (0, y))
+            y += label.get_height() + self.line_spacing
 
 
 @dataclass
@@ -200,25 +773,51 @@ class TooltipManager:
     def __init__(self, fonts) -> None:
         self.fonts = fonts
         self.active_tooltip: Optional[Tooltip] = None
+        self.animating = False
+        self.dirty = False
+        self._surface_width = 0
+        self._drawn_bounds: Optional[pygame.Rect] = None
+
+    @property
+    def bounds(self) -> pygame.Rect:
+        """Прошлая и новая подсказка вместе с тенями."""
+        rects = [rect for rect in (self._drawn_bounds, self._bounds()) if rect is not None]
+        return rects[0].unionall(rects[1:]) if rects else pygame.Rect(0, 0, 0, 0)
 
     def update(self, mouse_pos: Tuple[int, int], tooltips: List[Tooltip]) -> None:
+        previous = self.active_tooltip
         self.active_tooltip = None
         for tip in tooltips:
             if tip.rect.collidepoint(mouse_pos):
                 self.active_tooltip = tip
                 break
+        if self.active_tooltip is not previous:
+            self.dirty = True
 
-    def draw(self, surface: pygame.Surface) -> None:
-        if not self.active_tooltip:
-            return
+    def _tip_rect(self, label: pygame.Surface, surface_width: int) -> pygame.Rect:
         padding = 12
-        label = self.fonts.render(self.active_tooltip.text, 20, COLORS.text_primary)
         tip_rect = label.get_rect()
         tip_rect.inflate_ip(padding * 2, padding * 2)
         tip_rect.topleft = (
-            min(self.active_tooltip.rect.right + 12, surface.get_width() - tip_rect.width - 16),
+            min(self.active_tooltip.rect.right + 12, surface_width - tip_rect.width - 16),
             max(self.active_tooltip.rect.top - tip_rect.height, 16),
         )
+        return tip_rect
+
+    def _bounds(self) -> Optional[pygame.Rect]:
+        if not self.active_tooltip:
+            return None
+        label = self.fonts.render(self.active_tooltip.text, 20, COLORS.text_primary)
+        return shadow_bounds(self._tip_rect(label, self._surface_width), 3)
+
+    def draw(self, surface: pygame.Surface) -> None:
+        self._surface_width = surface.get_width()
+        self._drawn_bounds = self._bounds()
+        if not self.active_tooltip:
+            return
+        padding = 12
+        label = self.fonts.render(self.active_tooltip.text, 20, COLORS.text_primary)
+        tip_rect = self._tip_rect(label, self._surface_width)
 
         draw_shadow(surface, tip_rect, blur=3, alpha=60)
         draw_rounded_rect(surface, COLORS.surface_variant, tip_rect, radius=12)
@@ -233,9 +832,19 @@ class StarMeter:
         self.fonts = fonts
         self.capacity = capacity
         self.value = 0
+        self.animating = False
+        self.dirty = True
+
+    @property
+    def bounds(self) -> pygame.Rect:
+        half_span = 56 * (self.capacity - 1) // 2 + 20
+        return pygame.Rect(self.rect.centerx - half_span, self.rect.centery - 20, half_span * 2, 40)
 
     def set_value(self, stars: int) -> None:
-        self.value = clamp(stars, 0, self.capacity)
+        value = clamp(stars, 0, self.capacity)
+        if value != self.value:
+            self.value = value
+            self.dirty = True
 
     def draw(self, surface: pygame.Surface) -> None:
         gap = 56
@@ -250,7 +859,7 @@ class StarMeter:
             surface.blit(star_label, star_label.get_rect(center=(cx, cy)))
 
 
-class MissionCard:
+class MissionCard(RetainedWidget):
     """Карточка миссии для экрана выбора."""
 
     def __init__(self, rect: pygame.Rect, fonts, data: dict, on_click: Callable[[str], None]):
@@ -259,6 +868,20 @@ class MissionCard:
         self.data = data
         self.on_click = on_click
         self.hover = 0.0
+        # Что показывает строка статуса: пройдена ли миссия и лучший результат.
+        self._status: Tuple[bool, int] = (False, 0)
+        self._summary = TextBlock(fonts, 20, COLORS.text_secondary, rect.width - 40, text=data["summary"])
+        self._init_retained()
+
+    @property
+    def bounds(self) -> pygame.Rect:
+        return shadow_bounds(self.rect, 4)
+
+    def _hover_step(self) -> int:
+        return round(self.hover * HOVER_STEPS)
+
+    def _appearance(self) -> tuple:
+        return (self._hover_step(), self._status)
 
     def handle_event(self, event: pygame.event.Event) -> None:
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -269,55 +892,37 @@ class MissionCard:
         hovered = self.rect.collidepoint(mouse_pos)
         target = 1.0 if hovered else 0.0
         self.hover = lerp(self.hover, target, min(dt * 6, 1))
+        self.animating = self._hover_step() != round(target * HOVER_STEPS)
+        self._check_changed()
 
     def draw(self, surface: pygame.Surface, progress: Optional[dict] = None) -> None:
-        draw_shadow(surface, self.rect, blur=4, alpha=50)
-        bg_color = [
-            int(COLORS.surface[i] * (1 - self.hover) + COLORS.surface_variant[i] * self.hover)
-            for i in range(3)
-        ]
-        draw_rounded_rect(surface, bg_color, self.rect, radius=18)
+        completed = bool(progress and progress.get("completed"))
+        self._status = (completed, progress.get("best_stars", 0) if completed else 0)
+        super().draw(surface)
+
+    def _render(self, surface: pygame.Surface, rect: pygame.Rect) -> None:
+        hover = self._hover_step() / HOVER_STEPS
+        bg_color = [int(COLORS.surface[i] * (1 - hover) + COLORS.surface_variant[i] * hover) for i in range(3)]
+        draw_shadow(surface, rect, blur=4, alpha=50)
+        draw_rounded_rect(surface, bg_color, rect, radius=18)
 
         title = self.fonts.render(self.data["title"], 26, COLORS.text_primary, bold=True)
-        surface.blit(title, (self.rect.x + 20, self.rect.y + 16))
+        surface.blit(title, (rect.x + 20, rect.y + 16))
 
-        summary_font = self.fonts.get(20)
-        summary_lines = self._wrap_text(summary_font, self.data["summary"], self.rect.width - 40)
-        y = self.rect.y + 56
-        for line in summary_lines:
-            label = summary_font.render(line, True, COLORS.text_secondary)
-            surface.blit(label, (self.rect.x + 20, y))
-            y += label.get_height() + 4
+        self._summary.width = rect.width - 40
+        self._summary.draw(surface, (rect.x + 20, rect.y + 56))
 
         difficulty_label = self.fonts.render("Сложность:", 18, COLORS.text_secondary)
-        difficulty_y = self.rect.bottom - 70
-        surface.blit(difficulty_label, (self.rect.x + 20, difficulty_y))
+        difficulty_y = rect.bottom - 70
+        surface.blit(difficulty_label, (rect.x + 20, difficulty_y))
         for i in range(3):
-            cx = self.rect.x + 130 + i * 22
+            cx = rect.x + 130 + i * 22
             cy = difficulty_y + 10
             color = COLORS.accent if i < self.data["difficulty"] else COLORS.surface_variant
             pygame.draw.circle(surface, color, (cx, cy), 8)
 
-        status_text = "Не пройдено"
-        if progress and progress.get("completed"):
-            stars = progress.get("best_stars", 0)
-            status_text = f"Пройдено: {stars}★"
+        completed, stars = self._status
+        status_text = f"Пройдено: {stars}★" if completed else "Не пройдено"
         status_label = self.fonts.render(status_text, 18, COLORS.accent_secondary)
-        surface.blit(status_label, (self.rect.x + 20, self.rect.bottom - 34))
-
-    def _wrap_text(self, font: pygame.font.Font, text: str, max_width: int) -> List[str]:
-        words = text.split()
-        lines: List[str] = []
-        current = ""
-        for word in words:
-            candidate = (current + " " + word).strip()
-            if font.size(candidate)[0] <= max_width:
-                current = candidate
-            else:
-                if current:
-                    lines.append(current)
-                current = word
-        if current:
-            lines.append(current)
-        return lines
+        surface.blit(status_label, (rect.x + 20, rect.bottom - 34))
 
@@ -3,20 +3,36 @@
 """
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import Dict, Tuple
 
 import pygame
 
+from core.cache_stats import CacheStats
+
 PREFERRED_FONTS = ["Segoe UI", "Verdana", "Calibri", "Arial"]
+# Сколько байт пикселей могут занимать закэшированные надписи.
+TEXT_CACHE_BUDGET = 8 * 1024 * 1024
+
+TextKey = Tuple[str, int, Tuple[int, ...], bool]
 
 
 @dataclass
 class FontManager:
-    """Загружает и кэширует шрифты разных размеров."""
+    """Загружает и кэширует шрифты разных размеров и отрисованные надписи.
+
+    Надписи хранятся в LRU-кэше с бюджетом ``text_cache_budget`` байт:
+    одинаковый текст того же размера, цвета и начертания не растеризуется
+    повторно. Возвращённые поверхности общие — рисовать на них нельзя.
+    """
 
     base_name: str = ""
+    text_cache_budget: int = TEXT_CACHE_BUDGET
+    text_stats: CacheStats = field(default_factory=CacheStats, init=False)
     _cache: Dict[Tuple[int, bool], pygame.font.Font] = field(default_factory=dict, init=False)
+    _text_cache: "OrderedDict[TextKey, pygame.Surface]" = field(default_factory=OrderedDict, init=False)
+    _text_cache_bytes: int = field(default=0, init=False)
 
     def __post_init__(self) -> None:
         pygame.font.init()
@@ -39,6 +55,32 @@ class FontManager:
         return self._cache[key]
 
     def render(self, text: str, size: int, color, bold: bool = False) -> pygame.Surface:
-        font = self.get(size, bold=bold)
-        return font.render(text, True, color)
+        key = (text, size, tuple(color), bold)
+        cache = self._text_cache
+        label = cache.get(key)
+        if label is not None:
+            cache.move_to_end(key)
+            self.text_stats.hits += 1
+            return label
+
+        self.text_stats.misses += 1
+        label = self.get(size, bold=bold).render(text, True, color)
+        cost = label.get_pitch() * label.get_height()
+        if cost > self.text_cache_budget:
+            return label
+        cache[key] = label
+        self._text_cache_bytes += cost
+        while self._text_cache_bytes > self.text_cache_budget:
+            _, evicted = cache.popitem(last=False)
+            self._text_cache_bytes -= evicted.get_pitch() * evicted.get_height()
+            self.text_stats.evictions += 1
+        return label
+
+    @property
+    def text_cache_bytes(self) -> int:
+        return self._text_cache_bytes
+
+    def clear_text_cache(self) -> None:
+        self._text_cache.clear()
+        self._text_cache_bytes = 0
 
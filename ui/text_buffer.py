@@ -0,0 +1,131 @@
+"""
+Текстовая модель поля ввода: gap-буфер с курсором и выделением.
+"""
+from __future__ import annotations
+
+from typing import Callable, List, Optional, Tuple
+
+# Сколько свободных ячеек держать в разрыве после расширения.
+MIN_GAP = 64
+
+ChangeListener = Callable[[int, int, int], None]
+
+
+class TextBuffer:
+    """Текст в gap-буфере: символы лежат в списке с «разрывом» на месте правки.
+
+    Правка сдвигает разрыв к месту правки и пишет символы прямо в него,
+    поэтому стоит O(длины правки + расстояния от прошлой правки), а не
+    O(длины текста): набор и удаление подряд в одном месте — O(1) на символ.
+    Разрыв растёт вдвое, когда в него не помещается вставка.
+
+    После каждой правки вызывается ``on_change(start, end, length)`` —
+    участок ``[start, end)`` старого текста заменён ``length`` символами.
+    Выделение — участок между ``anchor`` и ``cursor``; если они равны,
+    выделения нет.
+    """
+
+    def __init__(self, text: str = "", on_change: Optional[ChangeListener] = None) -> None:
+        self._chars: List[str] = list(text) + [""] * MIN_GAP
+        self._gap_start = len(text)
+        self._gap_end = len(self._chars)
+        self._text: Optional[str] = text
+        self.on_change = on_change
+        self.cursor = len(text)
+        self.anchor = len(text)
+
+    def __len__(self) -> int:
+        return len(self._chars) - (self._gap_end - self._gap_start)
+
+    @property
+    def text(self) -> str:
+        """Весь текст; строка собирается заново только после правки."""
+        if self._text is None:
+            chars = self._chars
+            self._text = "".join(chars[:self._gap_start]) + "".join(chars[self._gap_end:])
+        return self._text
+
+    @property
+    def selection(self) -> Tuple[int, int]:
+        return min(self.anchor, self.cursor), max(self.anchor, self.cursor)
+
+    @property
+    def has_selection(self) -> bool:
+        return self.anchor != self.cursor
+
+    def slice(self, start: int, end: int) -> str:
+        """Текст ``[start, end)`` без сборки всей строки."""
+        if self._text is not None:
+            return self._text[start:end]
+        chars, gap_start, gap = self._chars, self._gap_start, self._gap_end - self._gap_start
+        if end <= gap_start:
+            return "".join(chars[start:end])
+        if start >= gap_start:
+            return "".join(chars[start + gap:end + gap])
+        return "".join(chars[start:gap_start]) + "".join(chars[gap_start + gap:end + gap])
+
+    def selected_text(self) -> str:
+        return self.slice(*self.selection)
+
+    def move_to(self, position: int, *, extend: bool = False) -> None:
+        """Ставит курсор в ``position``; с ``extend`` выделение тянется за ним."""
+        self.cursor = max(0, min(position, len(self)))
+        if not extend:
+            self.anchor = self.cursor
+
+    def select_all(self) -> None:
+        self.anchor = 0
+        self.cursor = len(self)
+
+    def insert(self, text: str) -> None:
+        """Заменяет выделение (или вставляет в курсор) текстом ``text``."""
+        start, end = self.selection
+        self.replace(start, end, text)
+
+    def delete_backward(self) -> None:
+        start, end = self.selection
+        if start == end and start:
+            start -= 1
+        self.replace(start, end, "")
+
+    def delete_forward(self) -> None:
+        start, end = self.selection
+        if start == end and end < len(self):
+            end += 1
+        self.replace(start, end, "")
+
+    def replace(self, start: int, end: int, inserted: str) -> None:
+        """Заменяет ``[start, end)`` строкой ``inserted``; курсор — после вставки."""
+        if start == end and not inserted:
+            self.move_to(start)
+            return
+        self._move_gap(start)
+        self._gap_end += end - start
+        self._reserve(len(inserted))
+        self._chars[self._gap_start:self._gap_start + len(inserted)] = inserted
+        self._gap_start += len(inserted)
+        self._text = None
+        self.move_to(start + len(inserted))
+        if self.on_change is not None:
+            self.on_change(start, end, len(inserted))
+
+    def _move_gap(self, position: int) -> None:
+        chars = self._chars
+        if position < self._gap_start:
+            count = self._gap_start - position
+            chars[self._gap_end - count:self._gap_end] = chars[position:self._gap_start]
+            self._gap_start -= count
+            self._gap_end -= count
+        elif position > self._gap_start:
+            count = position - self._gap_start
+            chars[self._gap_start:self._gap_start + count] = chars[self._gap_end:self._gap_end + count]
+            self._gap_start += count
+            self._gap_end += count
+
+    def _reserve(self, size: int) -> None:
+        free = self._gap_end - self._gap_start
+        if free >= size:
+            return
+        grow = max(size - free, len(self), MIN_GAP)
+        self._chars[self._gap_end:self._gap_end] = [""] * grow
+        self._gap_end += grow
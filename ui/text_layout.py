@@ -0,0 +1,227 @@
+"""
+Инкрементальная раскладка текста по строкам для поля ввода.
+"""
+from __future__ import annotations
+
+import re
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import pygame
+
+Span = Tuple[int, int]
+
+TOKEN = re.compile(r"\n|[^ \n]+")
+# Сколько символов читать из источника за раз при поиске слов.
+SCAN_CHUNK = 256
+# Кэш ширин слов сбрасывается, когда в нём становится больше слов.
+MAX_CACHED_WORDS = 4096
+
+
+class LayoutLine:
+    """Строка раскладки.
+
+    ``start`` — позиция в тексте, с которой начинается строка, ``words`` —
+    позиции её слов относительно ``start``. Поэтому правка выше по тексту
+    только сдвигает ``start``, а ``pieces`` — готовые куски, которые рисует
+    владелец раскладки, — остаются действительными.
+    """
+
+    __slots__ = ("start", "words", "text", "width", "render_key", "pieces")
+
+    def __init__(self, start: int, words: Tuple[Span, ...], text: str, width: int) -> None:
+        self.start = start
+        self.words = words
+        self.text = text
+        self.width = width
+        self.render_key: Optional[tuple] = None
+        self.pieces: List[Tuple[int, pygame.Surface]] = []
+
+    def same_as(self, other: "LayoutLine") -> bool:
+        return self.start == other.start and self.words == other.words and self.text == other.text
+
+    def column(self, position: int) -> int:
+        """Индекс в ``text``, куда попадает позиция ``position`` исходного текста.
+
+        Лишние пробелы между словами в ``text`` схлопнуты, поэтому позиция
+        внутри них прижимается к началу следующего слова.
+        """
+        offset = position - self.start
+        column = 0
+        for number, (start, end) in enumerate(self.words):
+            if number:
+                column += 1
+            if offset <= end:
+                return column + max(offset - start, 0)
+            column += end - start
+        return column
+
+    def position(self, column: int) -> int:
+        """Позиция исходного текста для индекса ``column`` в ``text``."""
+        first = 0
+        for number, (start, end) in enumerate(self.words):
+            if number:
+                first += 1
+            last = first + end - start
+            if column <= last:
+                return self.start + start + max(column - first, 0)
+            first = last
+        return self.start + (self.words[-1][1] if self.words else 0)
+
+
+class LineLayout:
+    """Жадный перенос по словам по ширине в пикселях, пересчитываемый частями.
+
+    Текст читается через ``source(start, end)``, поэтому раскладке не нужна
+    собственная копия. После правки ``replace`` раскладывает заново строки,
+    начиная с предыдущей перед правкой (в неё может подтянуться укоротившееся
+    слово), и останавливается, как только новая строка начинается там же,
+    где одна из старых после правки: с этого места перенос зависит только
+    от текста дальше, а он не менялся, — хвост раскладки просто сдвигается.
+
+    Ширины слов кэшируются. Сумма ширин слов может на пиксель-другой
+    отличаться от ширины всей строки из-за кернинга, поэтому рядом с
+    границей строка измеряется целиком — переносы те же, что при
+    измерении каждой строки ``font.size``.
+    """
+
+    def __init__(
+        self,
+        font: pygame.font.Font,
+        width: int,
+        source: Callable[[int, int], str],
+        length: Callable[[], int],
+    ) -> None:
+        self.font = font
+        self.width = width
+        self._source = source
+        self._length = length
+        self._space = font.size(" ")[0]
+        self._widths: Dict[str, int] = {}
+        self.lines: List[LayoutLine] = []
+        # Меняется при каждой правке — по нему владелец понимает, что раскладка другая.
+        self.version = 0
+        # Сколько строк разложено заново при последней правке.
+        self.relaid = 0
+        self.reset()
+
+    def reset(self, width: Optional[int] = None) -> None:
+        """Раскладывает весь текст заново, например под новую ширину."""
+        if width is not None:
+            self.width = width
+        self.lines = list(self._break(0))
+        self.relaid = len(self.lines)
+        self.version += 1
+
+    def replace(self, start: int, end: int, length: int) -> None:
+        """Сообщает, что ``[start, end)`` старого текста заменено ``length`` символами."""
+        lines = self.lines
+        delta = length - (end - start)
+        index = max(self.line_at(start) - 1, 0)
+        fresh: List[LayoutLine] = []
+        old = index
+        tail: Optional[int] = None
+        for line in self._break(lines[index].start):
+            while old < len(lines) and (lines[old].start < end or lines[old].start + delta < line.start):
+                old += 1
+            if old < len(lines) and lines[old].start + delta == line.start:
+                tail = old
+                break
+            # Строка до правки могла не измениться — тогда её куски не перерисовываются.
+            previous = index + len(fresh)
+            if line.start < end and previous < len(lines) and line.same_as(lines[previous]):
+                line = lines[previous]
+            fresh.append(line)
+
+        if tail is None:
+            rest: List[LayoutLine] = []
+        else:
+            rest = lines[tail:]
+            if delta:
+                for line in rest:
+                    line.start += delta
+        self.lines = lines[:index] + fresh + rest
+        self.relaid = len(fresh)
+        self.version += 1
+
+    def line_at(self, position: int) -> int:
+        """Индекс последней строки, которая начинается не позже ``position``."""
+        lines = self.lines
+        low, high = 0, len(lines)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if lines[middle].start <= position:
+                low = middle
+            else:
+                high = middle
+        return low
+
+    def _break(self, position: int) -> Iterator[LayoutLine]:
+        """Строки, начиная с ``position`` — начала строки, до конца текста."""
+        start = position
+        words: List[Span] = []
+        texts: List[str] = []
+        used = 0
+        for begin, end, token in self._tokens(position):
+            if token == "\n":
+                yield self._line(start, words, texts)
+                start, words, texts, used = end, [], [], 0
+                continue
+            width = self._word_width(token)
+            if words:
+                candidate = used + self._space + width
+                if self._fits(texts, token, candidate):
+                    used = candidate
+                else:
+                    yield self._line(start, words, texts)
+                    start, words, texts, used = begin, [], [], width
+            else:
+                used = width
+            words.append((begin - start, end - start))
+            texts.append(token)
+        yield self._line(start, words, texts)
+
+    def _line(self, start: int, words: List[Span], texts: List[str]) -> LayoutLine:
+        text = " ".join(texts)
+        return LayoutLine(start, tuple(words), text, self.font.size(text)[0] if text else 0)
+
+    def _fits(self, texts: List[str], token: str, estimate: int) -> bool:
+        # На каждом стыке слов кернинг сдвигает ширину не больше чем на пиксель.
+        slack = len(texts)
+        if estimate <= self.width - slack:
+            return True
+        if estimate > self.width + slack:
+            return False
+        return self.font.size(" ".join(texts) + " " + token)[0] <= self.width
+
+    def _word_width(self, word: str) -> int:
+        width = self._widths.get(word)
+        if width is None:
+            if len(self._widths) >= MAX_CACHED_WORDS:
+                self._widths.clear()
+            width = self._widths[word] = self.font.size(word)[0]
+        return width
+
+    def _tokens(self, position: int) -> Iterator[Tuple[int, int, str]]:
+        """Слова и переводы строк начиная с ``position``; текст читается кусками."""
+        length = self._length()
+        chunk_size = SCAN_CHUNK
+        while position < length:
+            stop = min(position + chunk_size, length)
+            chunk = self._source(position, stop)
+            resume = stop
+            for match in TOKEN.finditer(chunk):
+                if match.end() == len(chunk) and stop < length:
+                    # Слово могло оборваться на границе куска — перечитаем его со следующим.
+                    resume = position + match.start()
+                    break
+                yield position + match.start(), position + match.end(), match.group()
+            chunk_size = SCAN_CHUNK if resume > position else chunk_size * 2
+            position = resume
+
+
+def wrap_text(font: pygame.font.Font, text: str, width: int) -> List[str]:
+    """Переносит ``text`` по словам так, чтобы строки помещались в ``width`` пикселей."""
+    if not text:
+        return []
+    layout = LineLayout(font, width, lambda start, end: text[start:end], lambda: len(text))
+    return [line.text for line in layout.lines]